@@ -0,0 +1,142 @@
+"""End-to-end agent benchmark that runs entirely offline.
+
+Runs ``scout.agent.graph.create_agent()`` against ``ScriptedChatModel`` and
+``FakeProviderServer`` at several concurrency levels and reports throughput,
+per-run latency, per-stage latency and LLM/tool call counts per run.
+
+    python -m benchmarks.agent_bench --runs 40 --concurrency 1,4,16 \\
+        --llm-latency-ms 50 --api-latency-ms 30 --out bench_agent.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from benchmarks.fakes import FakeProviderServer, ScriptedChatModel, stand_in_tools
+from scout.agent import nodes
+from scout.agent.graph import create_agent
+from scout.agent.prefetch import prefetch_stats
+from scout.agent.tool_cache import shared_cache
+from scout.tracing import percentile, stage_report, start_run
+
+CITIES = [("Tokyo", "SFO"), ("Paris", "JFK"), ("London", "BOS"), ("Rome", "ORD"),
+          ("Sydney", "LAX"), ("Singapore", "SEA"), ("Lisbon", "MIA"), ("Seoul", "DFW")]
+
+
+def make_request(i: int) -> str:
+    """A complete planning request; dates vary so runs do not share cache entries."""
+    city, origin = CITIES[i % len(CITIES)]
+    start = date(2030, 1, 1) + timedelta(days=i)
+    end = start + timedelta(days=6)
+    return f"Trip to {city} from {origin} {start.isoformat()} to {end.isoformat()} for 2 people, budget $4000"
+
+
+def run_level(agent, concurrency: int, runs: int) -> dict:
+    """Run the agent ``runs`` times with ``concurrency`` workers."""
+    spans = []
+    durations = []
+
+    def one_run(i: int):
+        started = time.perf_counter()
+        with start_run(name="bench", sinks=[spans.extend]):
+            agent.invoke(
+                {"messages": [HumanMessage(content=make_request(i))], "stage": "intake"},
+                {"configurable": {"thread_id": f"bench-{concurrency}-{i}"}},
+            )
+        durations.append((time.perf_counter() - started) * 1000)
+
+    shared_cache.clear()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_run, range(runs)))
+    wall = time.perf_counter() - wall_start
+
+    llm_calls = sum(1 for s in spans if s["kind"] == "llm")
+    tool_calls = sum(1 for s in spans if s["kind"] == "tool")
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "runs_per_sec": round(runs / wall, 3),
+        "run_p50_ms": round(percentile(durations, 50), 3),
+        "run_p95_ms": round(percentile(durations, 95), 3),
+        "llm_calls_per_run": round(llm_calls / runs, 3),
+        "tool_calls_per_run": round(tool_calls / runs, 3),
+        "prefetch": prefetch_stats(),
+        "stages": stage_report(
+            (s["kind"], s["name"], s["duration_ms"]) for s in spans if s["kind"] != "run"
+        ),
+    }
+
+
+def run_benchmark(
+    runs: int = 20,
+    concurrency=(1, 4, 16),
+    llm_latency_ms: float = 20.0,
+    api_latency_ms: float = 20.0,
+) -> dict:
+    """Run every concurrency level against fresh fakes and return the report."""
+    model = ScriptedChatModel(latency_ms=llm_latency_ms)
+    with FakeProviderServer(latency_ms=api_latency_ms) as server:
+        os.environ.setdefault("SERPAPI_API_KEY", "offline-benchmark")
+        nodes.set_model_factory(lambda: model)
+        try:
+            agent = create_agent(tools=stand_in_tools(server.url), checkpointer=InMemorySaver())
+            levels = [run_level(agent, c, runs) for c in concurrency]
+        finally:
+            nodes.set_model_factory(None)
+        requests = dict(server.requests)
+    return {
+        "benchmark": "agent",
+        "config": {
+            "runs": runs,
+            "llm_latency_ms": llm_latency_ms,
+            "api_latency_ms": api_latency_ms,
+        },
+        "provider_requests": requests,
+        "levels": levels,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{'conc':>5} {'runs/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'llm/run':>8} {'tools/run':>9} {'prefetch hit':>12}"
+    ]
+    for level in report["levels"]:
+        lines.append(
+            f"{level['concurrency']:>5} {level['runs_per_sec']:>8.2f} {level['run_p50_ms']:>9.1f} "
+            f"{level['run_p95_ms']:>9.1f} {level['llm_calls_per_run']:>8.2f} "
+            f"{level['tool_calls_per_run']:>9.2f} {level['prefetch']['hit_rate']:>12.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=20, help="Runs per concurrency level")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated worker counts")
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--api-latency-ms", type=float, default=20.0)
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        runs=args.runs,
+        concurrency=[int(c) for c in args.concurrency.split(",")],
+        llm_latency_ms=args.llm_latency_ms,
+        api_latency_ms=args.api_latency_ms,
+    )
+    print(format_report(report))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
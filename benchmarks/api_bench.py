@@ -0,0 +1,228 @@
+"""Dashboard API load test against a synthetic database.
+
+Builds (or reuses) a database from ``benchmarks.dataset``, drives the FastAPI
+app in-process with concurrent clients and reports throughput and p50/p99
+latency per endpoint. ``EXPLAIN QUERY PLAN`` checks run the endpoints' own
+SQL, with and without the archive, to guard the hot queries against losing
+their indexes; a failing check makes the command exit 1.
+
+    python -m benchmarks.api_bench --tier medium --requests 500 --concurrency 8 \\
+        --out bench_api.json --baseline bench_api.previous.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from benchmarks.dataset import TIERS, build_database
+from scout.tracing import percentile
+
+
+def _calendar_week(rng: random.Random, ctx: dict) -> str:
+    start = date(2023, 1, 1) + timedelta(days=rng.randrange(5 * 365))
+    return f"/api/calendar?start={start}&end={start + timedelta(days=7)}"
+
+
+# name -> function(rng, context) returning the request path
+ENDPOINTS = {
+    "trips": lambda rng, ctx: "/api/trips",
+    "trips_by_status": lambda rng, ctx: f"/api/trips?status={rng.choice(['planning', 'booked'])}",
+    "trip_itinerary": lambda rng, ctx: f"/api/trips/{rng.randint(1, ctx['trips'])}/itinerary",
+    "calendar_week": _calendar_week,
+    "stats": lambda rng, ctx: "/api/stats",
+}
+
+def _plan_checks() -> list:
+    """Hot queries as the endpoints send them, with the index each must keep
+    using on the live tables and, with ``include_archived``, on the archive.
+
+    Returns:
+        List of (name, query for ``tiered``, params, order_by, live index,
+        archive index or None for queries that never read the archive)
+    """
+    from scout.api import chat_history, routes
+
+    cursor = chat_history.encode_cursor("2025-01-08 00:00:00", 1000)
+    return [
+        ("trips_by_start", routes.TRIPS_QUERY, (), routes.TRIPS_ORDER, "idx_trips_start", "idx_trips_start_date"),
+        ("trips_by_status", routes.TRIPS_QUERY + routes.TRIPS_BY_STATUS, ("planning",), routes.TRIPS_ORDER,
+         "idx_trips_status", "idx_trips_start_date"),
+        ("trip_itinerary", routes.ITINERARY_QUERY, (1,), routes.ITINERARY_ORDER,
+         "idx_itinerary_items_trip", "idx_itinerary_items_trip_id_start_datetime"),
+        ("calendar_range", routes.CALENDAR_QUERY + routes.CALENDAR_RANGE, ("2025-01-01", "2025-01-08"),
+         routes.CALENDAR_ORDER, "idx_itinerary_items_start", "idx_itinerary_items_start_datetime"),
+        ("chat_page", *chat_history.page_query(1, cursor), chat_history.PAGE_ORDER,
+         "idx_chat_messages_page", "idx_chat_messages_trip_id_created_at_id"),
+        ("upcoming_trips", routes.UPCOMING_TRIPS_QUERY, (), "", "idx_trips_start", None),
+    ]
+
+
+def check_query_plans(path: str) -> list:
+    """Run ``EXPLAIN QUERY PLAN`` for each hot query, as the endpoints build it
+    with ``include_archived`` off and (as ``<name>_archived``) on.
+
+    A check passes when the plan uses the expected indexes, scans no table
+    without one and needs no temporary B-tree for sorting.
+    """
+    from scout.api import models
+    from scout.api.archive import attach, tiered
+
+    conn = models.connect(path)
+    attach(conn, create=True)
+    results = []
+    for name, query, params, order_by, index, archive_index in _plan_checks():
+        modes = [(name, False, [index])]
+        if archive_index:
+            modes.append((f"{name}_archived", True, [index, archive_index]))
+        for label, include_archived, indexes in modes:
+            sql, all_params = tiered(conn, query, params, include_archived, order_by)
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", all_params)]
+            used = {word for step in plan for word in step.split()}
+            full_scan = any(step.startswith("SCAN ") and " USING " not in step for step in plan)
+            results.append({
+                "name": label,
+                "plan": plan,
+                "ok": used.issuperset(indexes) and not full_scan and not any("TEMP B-TREE" in step for step in plan),
+            })
+    conn.close()
+    return results
+
+
+def drive(client, name: str, requests: int, concurrency: int, ctx: dict, seed: int = 0) -> dict:
+    """Send ``requests`` requests to one endpoint from ``concurrency`` workers."""
+    make_path = ENDPOINTS[name]
+    rng = random.Random(seed)
+    paths = [make_path(rng, ctx) for _ in range(requests)]
+    durations = []
+    sizes = []
+    statuses = []
+
+    def one(path):
+        started = time.perf_counter()
+        response = client.get(path)
+        durations.append((time.perf_counter() - started) * 1000)
+        sizes.append(len(response.content))
+        statuses.append(response.status_code)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, paths))
+    wall = time.perf_counter() - wall_start
+    return {
+        "requests": requests,
+        "errors": sum(1 for status in statuses if status != 200),
+        "requests_per_sec": round(requests / wall, 2),
+        "p50_ms": round(percentile(durations, 50), 3),
+        "p99_ms": round(percentile(durations, 99), 3),
+        "mean_bytes": round(sum(sizes) / len(sizes)),
+    }
+
+
+def run_benchmark(
+    tier: str = "small",
+    requests: int = 200,
+    concurrency: int = 4,
+    endpoints=None,
+    db_path: str = None,
+    rebuild: bool = False,
+) -> dict:
+    """Build or reuse the tier's database, check query plans and load each endpoint."""
+    from fastapi.testclient import TestClient
+    from scout.api import models
+
+    trips, items = TIERS[tier]
+    path = db_path or os.path.join("data", "bench", f"{tier}.db")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    dataset = None
+    if rebuild or not os.path.exists(path):
+        dataset = build_database(path, trips, items)
+    models.DB_PATH = path
+
+    import server
+
+    plans = check_query_plans(path)
+    ctx = {"trips": trips, "items": items}
+    results = {}
+    with TestClient(server.app) as client:
+        for name in endpoints or ENDPOINTS:
+            client.get(ENDPOINTS[name](random.Random(-1), ctx))  # warm up
+            results[name] = drive(client, name, requests, concurrency, ctx)
+    return {
+        "benchmark": "api",
+        "config": {"tier": tier, "trips": trips, "items": items,
+                   "requests": requests, "concurrency": concurrency},
+        "dataset": dataset,
+        "query_plans": plans,
+        "endpoints": results,
+    }
+
+
+def compare(report: dict, baseline: dict) -> list:
+    """Per-endpoint change in throughput and latency against an earlier report."""
+    rows = []
+    for name, current in report["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        rows.append({
+            "endpoint": name,
+            **{
+                f"{metric}_change_pct": round(100 * (current[metric] - before[metric]) / before[metric], 1)
+                for metric in ("requests_per_sec", "p50_ms", "p99_ms") if before[metric]
+            },
+        })
+    return rows
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'endpoint':<16} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'bytes':>10} {'errors':>6}"]
+    for name, r in report["endpoints"].items():
+        lines.append(
+            f"{name:<16} {r['requests_per_sec']:>9.1f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+            f"{r['mean_bytes']:>10} {r['errors']:>6}"
+        )
+    for check in report["query_plans"]:
+        lines.append(f"plan {check['name']:<16} {'ok' if check['ok'] else 'REGRESSED'}: {' | '.join(check['plan'])}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tier", choices=sorted(TIERS), default="small")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--endpoints", help=f"Comma-separated subset of {', '.join(ENDPOINTS)}")
+    parser.add_argument("--db", help="Database file (default data/bench/<tier>.db)")
+    parser.add_argument("--rebuild", action="store_true", help="Regenerate the database")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        tier=args.tier,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        endpoints=args.endpoints.split(",") if args.endpoints else None,
+        db_path=args.db,
+        rebuild=args.rebuild,
+    )
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+    print(format_report(report))
+    for row in report.get("comparison", []):
+        print(row)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if not all(check["ok"] for check in report["query_plans"]):
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,169 @@
+"""Synthetic dashboard database at configurable scale.
+
+Fills the Scout schema with trips and itinerary items whose dates, item
+types, coordinates and costs follow plausible distributions, so API timings
+can be measured at sizes the 20 KB sample database never reaches.
+
+    python -m benchmarks.dataset --tier medium --out data/bench/medium.db
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+# name -> (trips, itinerary items)
+TIERS = {
+    "tiny": (50, 1_000),
+    "small": (1_000, 20_000),
+    "medium": (10_000, 200_000),
+    "large": (10_000, 1_000_000),
+}
+
+CITIES = [
+    ("Tokyo", 35.6762, 139.6503), ("Paris", 48.8566, 2.3522), ("London", 51.5074, -0.1278),
+    ("New York", 40.7128, -74.0060), ("Rome", 41.9028, 12.4964), ("Barcelona", 41.3874, 2.1686),
+    ("Sydney", -33.8688, 151.2093), ("Singapore", 1.3521, 103.8198), ("Lisbon", 38.7223, -9.1393),
+    ("Seoul", 37.5665, 126.9780), ("Mexico City", 19.4326, -99.1332), ("Cape Town", -33.9249, 18.4241),
+]
+
+# item type -> (share of items, typical minutes, median cost in USD)
+ITEM_TYPES = {
+    "activity": (0.45, 120, 40.0),
+    "dining": (0.25, 90, 55.0),
+    "transport": (0.12, 45, 25.0),
+    "hotel": (0.10, 0, 180.0),
+    "flight": (0.08, 420, 650.0),
+}
+
+TITLES = {
+    "activity": ["Museum visit", "Walking tour", "Market stroll", "Day trip", "Gallery", "Park"],
+    "dining": ["Lunch", "Dinner", "Breakfast", "Food tour", "Cafe"],
+    "transport": ["Train", "Taxi", "Bus", "Ferry", "Metro"],
+    "hotel": ["Hotel check-in"],
+    "flight": ["Flight"],
+}
+
+FIRST_DAY = np.datetime64("2023-01-01")
+DAYS_SPAN = 5 * 365
+
+
+def generate_trips(rng: np.random.Generator, count: int, today: np.datetime64) -> tuple:
+    """Trip rows (without id) in insertion order, plus their start dates,
+    durations and city indexes for placing items."""
+    city = rng.integers(0, len(CITIES), count)
+    start = FIRST_DAY + rng.integers(0, DAYS_SPAN, count).astype("timedelta64[D]")
+    duration = np.clip(rng.geometric(1 / 7, count), 2, 21)
+    end = start + duration.astype("timedelta64[D]")
+    budget = np.round(rng.lognormal(np.log(3000), 0.6, count), -1)
+    travelers = rng.choice([1, 2, 3, 4], count, p=[0.35, 0.4, 0.15, 0.1])
+    status = np.where(end < today, "completed", np.where(rng.random(count) < 0.5, "planning", "booked"))
+    status = np.where(rng.random(count) < 0.05, "cancelled", status)
+    return [
+        (
+            f"{CITIES[c][0]} {str(s)[:4]}", CITIES[c][0], str(s), str(e), float(b), int(t),
+            str(st), CITIES[c][1], CITIES[c][2],
+        )
+        for c, s, e, b, t, st in zip(city, start, end, budget, travelers, status)
+    ], start, duration, city
+
+
+def generate_items(rng: np.random.Generator, count: int, trip_start, trip_duration, trip_city):
+    """Itinerary item rows spread over trips in proportion to their length."""
+    trip = rng.choice(len(trip_start), count, p=trip_duration / trip_duration.sum())
+    names = list(ITEM_TYPES)
+    shares = np.array([ITEM_TYPES[n][0] for n in names])
+    kind = rng.choice(len(names), count, p=shares / shares.sum())
+    day = (rng.random(count) * trip_duration[trip]).astype(int)
+    minute = rng.integers(7 * 60, 22 * 60, count) // 15 * 15
+    start = (
+        trip_start[trip].astype("datetime64[m]")
+        + day.astype("timedelta64[D]")
+        + minute.astype("timedelta64[m]")
+    )
+    typical = np.array([ITEM_TYPES[n][1] for n in names])[kind]
+    length = np.maximum(15, rng.normal(typical, typical / 3 + 1)).astype(int) // 15 * 15
+    end = start + length.astype("timedelta64[m]")
+    # Hotel items span the rest of the trip
+    is_hotel = kind == names.index("hotel")
+    checkout = (trip_start[trip] + trip_duration[trip].astype("timedelta64[D]")).astype("datetime64[m]") + 11 * 60
+    end = np.where(is_hotel, checkout, end)
+    lat = np.array([c[1] for c in CITIES])[trip_city[trip]] + rng.normal(0, 0.04, count)
+    lng = np.array([c[2] for c in CITIES])[trip_city[trip]] + rng.normal(0, 0.04, count)
+    cost = np.round(np.array([ITEM_TYPES[n][2] for n in names])[kind] * rng.lognormal(0, 0.5, count), 2)
+    title_index = rng.integers(0, 100, count)
+
+    start_text = np.datetime_as_string(start, unit="s")
+    end_text = np.datetime_as_string(end, unit="s")
+    for i in range(count):
+        name = names[kind[i]]
+        titles = TITLES[name]
+        yield (
+            int(trip[i]) + 1, titles[title_index[i] % len(titles)], name,
+            start_text[i], end_text[i], float(lat[i]), float(lng[i]), float(cost[i]),
+        )
+
+
+def build_database(path: str, trips: int, items: int, seed: int = 0) -> dict:
+    """Create a fresh database at ``path`` with the given number of rows.
+
+    Returns:
+        dict with the row counts, file size and build time
+    """
+    from scout.api import models
+
+    if os.path.exists(path):
+        os.remove(path)
+    models.DB_PATH = path
+    models.init_db()
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    today = np.datetime64("today")
+    trip_rows, trip_start, trip_duration, trip_city = generate_trips(rng, trips, today)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany("""
+        INSERT INTO trips (name, destination, start_date, end_date, budget, travelers, status, lat, lng)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, trip_rows)
+    conn.executemany("""
+        INSERT INTO itinerary_items
+        (trip_id, title, item_type, start_datetime, end_datetime, lat, lng, cost)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, generate_items(rng, items, trip_start, trip_duration, trip_city))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    return {
+        "trips": trips,
+        "items": items,
+        "bytes": os.path.getsize(path),
+        "build_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tier", choices=sorted(TIERS), default="small")
+    parser.add_argument("--trips", type=int, help="Override the tier's trip count")
+    parser.add_argument("--items", type=int, help="Override the tier's item count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Database file (default data/bench/<tier>.db)")
+    args = parser.parse_args(argv)
+
+    trips, items = TIERS[args.tier]
+    out = args.out or os.path.join("data", "bench", f"{args.tier}.db")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    summary = build_database(out, args.trips or trips, args.items or items, args.seed)
+    print(f"{out}: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,312 @@
+"""Deterministic stand-ins for Gemini and the external travel APIs.
+
+``FakeProviderServer`` is a local HTTP server that answers like SerpApi
+Google Flights, a hotel search API, a preference store and the Google
+Calendar v3 events API (including batch requests), with a configurable delay
+per request. ``ScriptedChatModel`` replaces Gemini: it
+chooses its reply from the node's system prompt and the conversation so far,
+so any number of concurrent runs get the same sequence of LLM calls.
+"""
+import email
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+
+AIRLINES = ["ANA", "JAL", "United", "Delta", "Singapore Airlines", "Air France"]
+
+
+def _flight_results(origin: str, destination: str, date: str) -> dict:
+    """Build a SerpApi-shaped response with ten itineraries."""
+    flights = []
+    for i in range(10):
+        legs = [{
+            "airline": AIRLINES[i % len(AIRLINES)],
+            "departure_airport": {"id": origin, "time": f"{date} {8 + i}:00"},
+            "arrival_airport": {"id": destination, "time": f"{date} {18 + i % 6}:30"},
+        }] * (1 + i % 2)
+        flights.append({
+            "price": 450 + 37 * i,
+            "total_duration": 600 + 45 * i,
+            "flights": legs,
+            "booking_token": uuid.uuid5(uuid.NAMESPACE_URL, f"{origin}{destination}{date}{i}").hex * 4,
+        })
+    return {"best_flights": flights[:3], "other_flights": flights[3:]}
+
+
+def _hotel_results(destination: str) -> dict:
+    return {
+        "hotels": [
+            {
+                "name": f"{destination} Hotel {i + 1}",
+                "price_per_night": 90 + 40 * i,
+                "stars": 3 + i % 3,
+                "rating": round(3.9 + 0.2 * (i % 5), 1),
+                "amenities": ["WiFi", "Breakfast", "Gym", "Pool", "Spa"][: 2 + i % 4],
+                "location": destination,
+            }
+            for i in range(6)
+        ]
+    }
+
+
+class FakeProviderServer:
+    """Threaded local HTTP server standing in for the external APIs.
+
+    Args:
+        latency_ms: Delay added to every request before it is answered
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._preferences = []
+        self.events = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload: dict, status: int = 200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self) -> dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                server._record(url.path)
+                if url.path == "/search":
+                    return self._reply(_flight_results(
+                        query.get("departure_id", "SFO"),
+                        query.get("arrival_id", "NRT"),
+                        query.get("outbound_date", "2025-03-15"),
+                    ))
+                if url.path == "/hotels":
+                    return self._reply(_hotel_results(query.get("destination", "Tokyo")))
+                if url.path == "/preferences":
+                    user = query.get("user_id")
+                    with server._lock:
+                        prefs = [p["text"] for p in server._preferences if p["user_id"] == user]
+                    return self._reply({"preferences": prefs[-5:]})
+                self._reply({"error": "not found"}, 404)
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                server._record(url.path)
+                if url.path == "/preferences":
+                    with server._lock:
+                        server._preferences.append(self._body())
+                    return self._reply({"stored": True})
+                if url.path == "/batch/calendar/v3":
+                    length = int(self.headers.get("Content-Length") or 0)
+                    boundary, body = server._calendar_batch(
+                        self.headers["Content-Type"], self.rfile.read(length).decode()
+                    )
+                    payload = body.encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", f"multipart/mixed; boundary={boundary}")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+                self._calendar("POST")
+
+            def do_PUT(self):
+                server._record(urlparse(self.path).path)
+                self._calendar("PUT")
+
+            def do_DELETE(self):
+                server._record(urlparse(self.path).path)
+                self._calendar("DELETE")
+
+            def _calendar(self, method: str):
+                body = self._body() if method != "DELETE" else None
+                status, payload = server._calendar_call(method, self.path, body)
+                if payload is None:
+                    self.send_response(status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self._reply(payload, status)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def _record(self, path: str) -> None:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def _calendar_call(self, method: str, path: str, body: dict = None) -> tuple:
+        """Apply one Calendar events call; returns (status, JSON payload or None)."""
+        match = re.fullmatch(r"/calendar/v3/calendars/([^/]+)/events(?:/([^/]+))?", urlparse(path).path)
+        if not match:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        calendar_id, event_id = match.groups()
+        with self._lock:
+            self.requests["calendar_ops"] = self.requests.get("calendar_ops", 0) + 1
+            if method == "POST" and event_id is None:
+                event_id = uuid.uuid4().hex
+                self.events[(calendar_id, event_id)] = {**body, "id": event_id}
+                return 200, {**body, "id": event_id, "htmlLink": f"https://calendar.test/{event_id}"}
+            if (calendar_id, event_id) not in self.events:
+                return 404, {"error": {"code": 404, "message": "Not Found"}}
+            if method == "PUT":
+                self.events[(calendar_id, event_id)] = {**body, "id": event_id}
+                return 200, {**body, "id": event_id}
+            if method == "DELETE":
+                del self.events[(calendar_id, event_id)]
+                return 204, None
+        return 405, {"error": {"code": 405, "message": "Method Not Allowed"}}
+
+    def _calendar_batch(self, content_type: str, body: str) -> tuple:
+        """Answer a multipart/mixed batch of Calendar calls."""
+        message = email.message_from_string(f"Content-Type: {content_type}\r\n\r\n{body}")
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in message.get_payload():
+            request_line, rest = part.get_payload().split("\n", 1)
+            method, path, _ = request_line.split(" ", 2)
+            inner = email.message_from_string(rest)
+            payload = inner.get_payload()
+            status, result = self._calendar_call(method, path, json.loads(payload) if payload.strip() else None)
+            content_id = part["Content-ID"].strip("<>")
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\n\r\n"
+                f"{json.dumps(result) if result is not None else ''}\r\n"
+            )
+        return boundary, "".join(parts) + f"--{boundary}--\r\n"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def stand_in_tools(server_url: str) -> list:
+    """Build the agent's tools with external calls routed to the fake server.
+
+    Flight search runs the real tool (pointed at the fake SerpApi). The hotel
+    tool has no HTTP integration yet and the memory tools need Pinecone plus
+    OpenAI embeddings, so they are replaced by tools with the same names and
+    argument schemas that call the fake server instead.
+    """
+    from scout.tools import flights, hotels, memory
+
+    flights.SERPAPI_URL = f"{server_url}/search"
+    client = httpx.Client(base_url=server_url, timeout=30.0)
+
+    def search_hotels(**kwargs) -> dict:
+        return client.get("/hotels", params={"destination": kwargs["destination"]}).json()
+
+    def store_preference(user_id: str, preference_type: str, value: str) -> dict:
+        payload = {"user_id": user_id, "text": f"{preference_type}: {value}"}
+        return client.post("/preferences", json=payload).json()
+
+    def recall_preferences(user_id: str, query: str) -> dict:
+        return client.get("/preferences", params={"user_id": user_id}).json()
+
+    def stand_in(original, func):
+        return StructuredTool.from_function(
+            func=func, name=original.name, description=original.description,
+            args_schema=original.args_schema,
+        )
+
+    return [
+        flights.search_flights,
+        stand_in(hotels.search_hotels, search_hotels),
+        stand_in(memory.store_preference, store_preference),
+        stand_in(memory.recall_preferences, recall_preferences),
+    ]
+
+
+KNOWN_DETAILS = re.compile(r"Known trip details: (\{.*\})", re.S)
+
+
+class ScriptedChatModel:
+    """Deterministic replacement for the Gemini chat model.
+
+    Args:
+        latency_ms: Simulated model latency per call
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages):
+        with self._lock:
+            self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        system = str(messages[0].content)
+        last_human = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        turn = messages[last_human:]
+        results = [m for m in turn if isinstance(m, ToolMessage)]
+
+        if system.startswith("Extract travel details"):
+            return AIMessage(content="Which dates and where are you flying from?")
+        if "You are researching" in system:
+            if results:
+                return AIMessage(content=f"I found results from {len(results)} searches.")
+            return AIMessage(content="", tool_calls=self._research_calls(system))
+        if system.startswith("Present the flight and hotel options"):
+            return AIMessage(content="Option F1 is the cheapest flight and H1 the best value hotel. Which would you like?")
+        return AIMessage(content="Your trip is summarized; booking F1 and H1.")
+
+    def _research_calls(self, system: str) -> list:
+        match = KNOWN_DETAILS.search(system)
+        known = json.loads(match.group(1)) if match else {}
+        dates = known.get("dates", {})
+        prefs = known.get("preferences", {})
+        travelers = known.get("travelers", 1)
+        start, end = dates.get("start", "2025-03-15"), dates.get("end", "2025-03-22")
+        destination = known.get("destination", "Tokyo")
+
+        hotel_args = {"destination": destination, "checkin": start, "checkout": end}
+        if travelers > 1:
+            hotel_args["guests"] = travelers
+        calls = [
+            ("recall_preferences", {"user_id": "bench", "query": f"{destination} trip"}),
+            ("search_hotels", hotel_args),
+            ("search_flights", {
+                "origin": prefs.get("origin", "SFO"),
+                "destination": prefs.get("destination_airport", "NRT"),
+                "departure_date": start,
+                "return_date": end,
+                "adults": travelers,
+            }),
+        ]
+        return [{"id": f"call_{uuid.uuid4().hex[:12]}", "name": n, "args": a} for n, a in calls]
@@ -0,0 +1,128 @@
+"""Row serialization: validated response models vs. the direct JSON path.
+
+Compares, on the same synthetic rows, what list endpoints used to do per
+request (``dict(row)``, validation against the response model,
+``jsonable_encoder`` and ``json.dumps``) with ``scout.api.serialization``
+(tuples zipped with column names, encoded by orjson in one call).
+
+    python -m benchmarks.serialization_bench --rows 1000,10000,100000 --out bench_serialization.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+from benchmarks.dataset import build_database
+
+# endpoint -> (response model name, query)
+QUERIES = {
+    "trips": ("Trip", "SELECT {columns} FROM trips ORDER BY start_date DESC LIMIT ?"),
+    "itinerary": ("ItineraryItem", "SELECT {columns} FROM itinerary_items ORDER BY start_datetime LIMIT ?"),
+}
+
+
+def validated(conn, model, sql: str, limit: int) -> bytes:
+    """The previous path: Row -> dict -> model validation -> encoder -> json."""
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    rows = [dict(row) for row in conn.execute(sql, (limit,)).fetchall()]
+    content = jsonable_encoder(TypeAdapter(List[model]).validate_python(rows))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def direct(conn, model, sql: str, limit: int) -> bytes:
+    """The current path: tuples straight to JSON bytes."""
+    from scout.api.serialization import rows_json
+
+    return rows_json(conn.execute(sql, (limit,)))
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def run_benchmark(sizes=(1_000, 10_000, 100_000), repeat: int = 5, db_path: str = None) -> dict:
+    """Time both paths per endpoint and row count.
+
+    The database holds ``max(sizes)`` itinerary items (and as many trips),
+    so every size reads real rows.
+    """
+    from scout.api import models
+    from scout.api.serialization import orjson, select_list
+
+    largest = max(sizes)
+    tmp = None
+    if db_path is None:
+        tmp = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp.name, "serialization.db")
+    previous = models.DB_PATH
+    try:
+        build_database(db_path, largest, largest)
+        conn = models.get_db()
+        results = []
+        for endpoint, (model_name, template) in QUERIES.items():
+            model = getattr(models, model_name)
+            sql = template.format(columns=select_list(model))
+            for size in sizes:
+                before = validated(conn, model, sql, size)
+                after = direct(conn, model, sql, size)
+                if json.loads(before) != json.loads(after):
+                    raise AssertionError(f"{endpoint}: paths disagree at {size} rows")
+                validated_ms = _best_ms(lambda: validated(conn, model, sql, size), repeat)
+                direct_ms = _best_ms(lambda: direct(conn, model, sql, size), repeat)
+                results.append({
+                    "endpoint": endpoint,
+                    "rows": size,
+                    "bytes": len(after),
+                    "validated_ms": round(validated_ms, 3),
+                    "direct_ms": round(direct_ms, 3),
+                    "speedup": round(validated_ms / direct_ms, 2) if direct_ms else None,
+                })
+        conn.close()
+    finally:
+        models.DB_PATH = previous
+        if tmp is not None:
+            tmp.cleanup()
+    return {
+        "benchmark": "serialization",
+        "config": {"sizes": list(sizes), "repeat": repeat, "encoder": "orjson" if orjson else "json"},
+        "results": results,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'endpoint':<10} {'rows':>8} {'validated ms':>13} {'direct ms':>10} {'speedup':>8} {'bytes':>11}"]
+    for r in report["results"]:
+        lines.append(
+            f"{r['endpoint']:<10} {r['rows']:>8} {r['validated_ms']:>13.2f} {r['direct_ms']:>10.2f} "
+            f"{r['speedup']:>7.1f}x {r['bytes']:>11}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", default="1000,10000,100000", help="Comma-separated row counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (best is kept)")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(sizes=[int(n) for n in args.rows.split(",")], repeat=args.repeat)
+    print(format_report(report))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,98 @@
+"""Write throughput with one shared database vs. one shard per user.
+
+Every simulated tenant inserts trips through ``scout.api.writer.write`` from
+its own threads. With a shared file all tenants queue on one writer; with
+``SCOUT_SHARD_BY_USER`` each tenant's shard has its own writer and lock.
+
+    python -m benchmarks.shard_bench --tenants 1,4,16 --writes 200 --out bench_shards.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+INSERT = (
+    "INSERT INTO trips (name, destination, start_date, end_date, budget) "
+    "VALUES (?, 'Lisbon', '2025-05-01', '2025-05-04', 1200)"
+)
+
+
+def _run(tenants: int, writes: int, threads_per_tenant: int) -> float:
+    from scout.api import shards, writer
+
+    def tenant_writes(job):
+        user, count = job
+        with shards.using_user(user):
+            for i in range(count):
+                writer.write(INSERT, (f"{user} trip {i}",))
+
+    per_thread = writes // threads_per_tenant
+    jobs = [(f"tenant{t}", per_thread) for t in range(tenants) for _ in range(threads_per_tenant)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        list(pool.map(tenant_writes, jobs))
+    elapsed = time.perf_counter() - started
+    writer.close_writer()
+    return len(jobs) * per_thread / elapsed
+
+
+def run_benchmark(tenant_counts=(1, 4, 16), writes: int = 200, threads_per_tenant: int = 2) -> dict:
+    """Writes per second for each tenant count, shared and sharded."""
+    from scout.api import models
+    from scout.config.settings import settings
+
+    previous = (models.DB_PATH, settings.SHARD_BY_USER, settings.SHARD_DIR, settings.SHARD_MAX_OPEN)
+    levels = []
+    try:
+        for tenants in tenant_counts:
+            level = {"tenants": tenants}
+            for mode in ("shared", "sharded"):
+                with tempfile.TemporaryDirectory() as tmp:
+                    models.DB_PATH = os.path.join(tmp, "scout.db")
+                    settings.SHARD_BY_USER = mode == "sharded"
+                    settings.SHARD_DIR = os.path.join(tmp, "shards")
+                    settings.SHARD_MAX_OPEN = max(tenants, 1)
+                    models.init_db()
+                    level[f"{mode}_writes_per_sec"] = round(_run(tenants, writes, threads_per_tenant), 1)
+            level["speedup"] = round(level["sharded_writes_per_sec"] / level["shared_writes_per_sec"], 2)
+            levels.append(level)
+    finally:
+        models.DB_PATH, settings.SHARD_BY_USER, settings.SHARD_DIR, settings.SHARD_MAX_OPEN = previous
+    return {
+        "benchmark": "shards",
+        "config": {"writes_per_tenant": writes, "threads_per_tenant": threads_per_tenant},
+        "levels": levels,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'tenants':>7} {'shared w/s':>11} {'sharded w/s':>12} {'speedup':>8}"]
+    for level in report["levels"]:
+        lines.append(
+            f"{level['tenants']:>7} {level['shared_writes_per_sec']:>11.1f} "
+            f"{level['sharded_writes_per_sec']:>12.1f} {level['speedup']:>7.2f}x"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tenants", default="1,4,16", help="Comma-separated tenant counts")
+    parser.add_argument("--writes", type=int, default=200, help="Writes per tenant")
+    parser.add_argument("--threads", type=int, default=2, help="Writing threads per tenant")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark([int(n) for n in args.tenants.split(",")], args.writes, args.threads)
+    print(format_report(report))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
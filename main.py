@@ -1,16 +1,32 @@
 """Entry point for Scout travel agent."""
-from scout.agent.graph import agent
-from scout.agent.state import TravelState
+import argparse
+import functools
+import os
+import uuid
 from scout.config.settings import settings
-from langchain_core.messages import HumanMessage
 
+# Prune stored checkpoints once every this many runs
+PRUNE_EVERY_RUNS = 20
+_runs_since_prune = 0
 
-def run_scout(user_input: str, user_id: str = "default") -> str:
+
+def run_scout(
+    user_input: str,
+    user_id: str = "default",
+    thread_id: str = None,
+    run_id: str = None,
+    raise_errors: bool = False,
+) -> str:
     """Run the Scout travel agent.
 
     Args:
         user_input: User's travel request
-        user_id: Unique identifier for the user (for preference storage)
+        user_id: Unique identifier for the user (for preference storage and,
+            with per-user shards, the database the tools use)
+        thread_id: Conversation ID; turns sharing a thread resume from the
+            saved graph state. A new thread is started when omitted.
+        run_id: ID under which the run's trace is recorded
+        raise_errors: Raise failures instead of returning them as text
 
     Returns:
         The agent's final response as a string
@@ -18,8 +34,20 @@ def run_scout(user_input: str, user_id: str = "default") -> str:
     # Validate configuration
     missing = settings.validate()
     if missing:
+        if raise_errors:
+            raise RuntimeError(f"Missing required configuration: {', '.join(missing)}")
         return f"Error: Missing required configuration: {', '.join(missing)}\n\nPlease set these environment variables in your .env file."
 
+    # The agent stack is heavy, so it is only imported once a run is requested
+    from langchain_core.messages import HumanMessage
+    from scout.agent.graph import get_agent
+    from scout.agent.state import RESET, TravelState
+    from scout.api.shards import using_user
+    from scout.tracing import start_run
+
+    agent = get_agent()
+    config = {"configurable": {"thread_id": thread_id or uuid.uuid4().hex}}
+
     # Create initial state
     initial_state: TravelState = {
         "messages": [HumanMessage(content=user_input)],
@@ -34,11 +62,29 @@ def run_scout(user_input: str, user_id: str = "default") -> str:
         "selected_hotel": {},
         "calendar_event_id": "",
         "stage": "intake",
+        "tool_cache": {},
+        "side_store": {},
     }
 
     # Run the agent
     try:
-        result = agent.invoke(initial_state)
+        # Tools read and write the user's own database shard
+        with using_user(user_id), start_run(run_id, name="scout", thread_id=config["configurable"]["thread_id"]):
+            previous = agent.get_state(config).values
+            if previous:
+                # Follow-up turn: append to the saved conversation and start
+                # over from intake with everything gathered so far. The side
+                # store starts afresh, keeping only the rows of the latest
+                # options so the user can still pick one by handle.
+                side_store = previous.get("side_store") or {}
+                current = [*previous.get("flight_options", []), *previous.get("hotel_options", [])]
+                initial_state = {
+                    "messages": [HumanMessage(content=user_input)],
+                    "stage": "intake",
+                    "side_store": {RESET: True, **{h: side_store[h] for h in current if h in side_store}},
+                }
+            result = agent.invoke(initial_state, config)
+        _maybe_prune_checkpoints()
         final_message = result["messages"][-1]
 
         # Extract content from the final message
@@ -47,11 +93,58 @@ def run_scout(user_input: str, user_id: str = "default") -> str:
         return str(final_message)
 
     except Exception as e:
+        if raise_errors:
+            raise
         return f"Error running agent: {str(e)}"
 
 
-def main():
-    """Interactive CLI for Scout travel agent."""
+def _maybe_prune_checkpoints():
+    """Bound the checkpoint store without paying for a prune on every run."""
+    global _runs_since_prune
+    _runs_since_prune += 1
+    if _runs_since_prune >= PRUNE_EVERY_RUNS:
+        _runs_since_prune = 0
+        from scout.agent.checkpoint import prune_checkpoints
+
+        prune_checkpoints()
+
+
+def run_batch(input_path: str, output_path: str, concurrency: int, mode: str) -> dict:
+    """Plan a JSONL file of requests, streaming results to output_path."""
+    from scout.batch import process_batch
+
+    def report(record):
+        print(f"[{record['status']}] {record['id']} ({record['duration_ms']:.0f} ms)")
+
+    summary = process_batch(
+        input_path,
+        output_path,
+        functools.partial(run_scout, raise_errors=True),
+        concurrency=concurrency,
+        mode=mode,
+        on_result=report,
+    )
+    print(
+        f"\nDone: {summary['ok']} planned, {summary['error']} failed, "
+        f"{summary['skipped']} already complete (of {summary['total']})"
+    )
+    return summary
+
+
+def main(argv=None):
+    """Run the interactive CLI, or plan a JSONL batch with --batch."""
+    parser = argparse.ArgumentParser(description="Scout: Agentic Travel Concierge")
+    parser.add_argument("--batch", metavar="REQUESTS.jsonl", help="Plan every request in a JSONL file")
+    parser.add_argument("--output", metavar="RESULTS.jsonl", help="Batch results file (default: <input>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batch requests in flight")
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread", help="Batch worker type")
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        output = args.output or os.path.splitext(args.batch)[0] + ".results.jsonl"
+        run_batch(args.batch, output, args.concurrency, args.mode)
+        return
+
     print("=" * 60)
     print("Scout: Agentic Travel Concierge")
     print("=" * 60)
@@ -59,6 +152,9 @@ def main():
     print("I'll search for flights, hotels, and add events to your calendar.")
     print("\nType 'quit' or 'exit' to end the session.\n")
 
+    # One thread per CLI session so follow-up questions keep their context
+    thread_id = uuid.uuid4().hex
+
     while True:
         try:
             user_input = input("\nYou: ").strip()
@@ -71,7 +167,7 @@ def main():
                 continue
 
             print("\nScout: ", end="")
-            response = run_scout(user_input)
+            response = run_scout(user_input, thread_id=thread_id)
             print(response)
 
         except KeyboardInterrupt:
@@ -0,0 +1,93 @@
+"""SQLite checkpointing so conversations resume from their saved graph state."""
+import logging
+import os
+import sqlite3
+import threading
+
+from scout.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_checkpointer = None
+_lock = threading.Lock()
+
+
+def get_checkpointer():
+    """Return the process-wide checkpointer, creating it on first use.
+
+    Falls back to an in-memory saver when langgraph-checkpoint-sqlite is not
+    installed, in which case conversations only resume within one process.
+    """
+    global _checkpointer
+    if _checkpointer is None:
+        with _lock:
+            if _checkpointer is None:
+                try:
+                    from langgraph.checkpoint.sqlite import SqliteSaver
+                except ImportError:
+                    from langgraph.checkpoint.memory import InMemorySaver
+
+                    logger.warning(
+                        "langgraph-checkpoint-sqlite not installed; "
+                        "conversation state will not survive restarts"
+                    )
+                    _checkpointer = InMemorySaver()
+                else:
+                    path = settings.CHECKPOINT_DB_PATH
+                    if path != ":memory:":
+                        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                    conn = sqlite3.connect(path, check_same_thread=False)
+                    _checkpointer = SqliteSaver(conn)
+                    _checkpointer.setup()
+    return _checkpointer
+
+
+def prune_checkpoints(
+    keep_per_thread: int = settings.CHECKPOINT_KEEP_PER_THREAD,
+    max_threads: int = settings.CHECKPOINT_MAX_THREADS,
+) -> int:
+    """Delete old checkpoints to keep the store bounded.
+
+    Only the newest ``keep_per_thread`` checkpoints of each thread are kept,
+    and whole threads beyond the ``max_threads`` most recently active are
+    dropped. Checkpoint IDs are time-ordered UUIDs, so ordering by ID orders
+    by recency.
+
+    Returns:
+        Number of checkpoint rows deleted
+    """
+    saver = get_checkpointer()
+    conn = getattr(saver, "conn", None)
+    if conn is None:
+        return 0
+
+    with saver.lock, conn:
+        stale = conn.execute("""
+            SELECT thread_id, checkpoint_ns, checkpoint_id FROM (
+                SELECT thread_id, checkpoint_ns, checkpoint_id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY thread_id, checkpoint_ns
+                           ORDER BY checkpoint_id DESC
+                       ) AS rank
+                FROM checkpoints
+            ) WHERE rank > ?
+            UNION ALL
+            SELECT thread_id, checkpoint_ns, checkpoint_id FROM checkpoints
+            WHERE thread_id NOT IN (
+                SELECT thread_id FROM checkpoints
+                GROUP BY thread_id
+                ORDER BY MAX(checkpoint_id) DESC
+                LIMIT ?
+            )
+        """, (keep_per_thread, max_threads)).fetchall()
+        if not stale:
+            return 0
+        conn.executemany(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            stale,
+        )
+        conn.executemany(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            stale,
+        )
+    return len(set(stale))
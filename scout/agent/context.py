@@ -0,0 +1,208 @@
+"""Token-budgeted compaction of the agent's message history.
+
+Every node sends the whole history to the model, so the history itself is
+kept bounded: tool results the model has already read are replaced with short
+digests, and once the estimate exceeds the budget the oldest turns are folded
+into a summary on the first user message. Compaction works on message IDs, so
+the checkpointed state shrinks too, not just the prompt.
+"""
+import json
+import logging
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, ToolMessage
+
+from scout.config.settings import settings
+from .encoding import summarize_table
+from .state import TravelState
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English text and JSON
+CHARS_PER_TOKEN = 4
+# Per-message overhead for role and framing tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+DIGEST_PREFIX = "[digest] "
+SUMMARY_MARKER = "[Earlier conversation, condensed]"
+# Summary lines kept for dropped turns; older lines fall off
+MAX_SUMMARY_LINES = 12
+SUMMARY_LINE_CHARS = 160
+
+
+def _text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, default=str)
+
+
+def estimate_tokens(messages) -> int:
+    """Estimate the prompt tokens of a message list without a tokenizer."""
+    chars = 0
+    for message in messages:
+        chars += len(_text(message))
+        for call in getattr(message, "tool_calls", None) or []:
+            chars += len(call["name"]) + len(json.dumps(call["args"], default=str))
+    return chars // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS * len(messages)
+
+
+def _describe(value) -> str:
+    if isinstance(value, list):
+        numbers = {}
+        for row in value:
+            if isinstance(row, dict):
+                for k, v in row.items():
+                    if isinstance(v, (int, float)) and not isinstance(v, bool):
+                        numbers.setdefault(k, []).append(v)
+        desc = f"{len(value)} items"
+        for k, vs in list(numbers.items())[:2]:
+            desc += f", {k} {min(vs)}-{max(vs)}"
+        return desc
+    if isinstance(value, dict):
+        return f"{len(value)} fields"
+    text = str(value)
+    return text if len(text) <= 80 else text[:77] + "..."
+
+
+def digest_tool_result(name: str, content: str) -> str:
+    """Summarize a tool result the model has already consumed."""
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        table = summarize_table(content)
+        if table:
+            return f"{DIGEST_PREFIX}{name} -> {table}"
+        first_line = content.strip().splitlines()[0] if content.strip() else ""
+        return f"{DIGEST_PREFIX}{name}: {first_line[:200]}"
+    if isinstance(data, dict):
+        parts = [f"{k}: {_describe(v)}" for k, v in data.items()]
+        return f"{DIGEST_PREFIX}{name} -> " + "; ".join(parts)
+    return f"{DIGEST_PREFIX}{name} -> {_describe(data)}"
+
+
+def _group_turns(messages) -> list:
+    """Group messages so an AI tool call always stays with its tool results."""
+    turns = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and turns:
+            turns[-1].append(message)
+        else:
+            turns.append([message])
+    return turns
+
+
+def _summary_line(message: BaseMessage) -> str:
+    speaker = "User" if isinstance(message, HumanMessage) else "Scout"
+    text = " ".join(_text(message).split())
+    if len(text) > SUMMARY_LINE_CHARS:
+        text = text[: SUMMARY_LINE_CHARS - 3] + "..."
+    return f"- {speaker}: {text}"
+
+
+def _fold_summary(first: HumanMessage, dropped: list) -> HumanMessage:
+    """Append one line per dropped turn to the first user message."""
+    request, _, previous = _text(first).partition(f"\n\n{SUMMARY_MARKER}\n")
+    lines = previous.splitlines() if previous else []
+    for turn in dropped:
+        head = turn[0]
+        if isinstance(head, ToolMessage) or not _text(head).strip():
+            continue
+        lines.append(_summary_line(head))
+    lines = lines[-MAX_SUMMARY_LINES:]
+    content = request if not lines else f"{request}\n\n{SUMMARY_MARKER}\n" + "\n".join(lines)
+    return HumanMessage(content=content, id=first.id)
+
+
+def compact_history(
+    messages,
+    budget: int = settings.CONTEXT_TOKEN_BUDGET,
+    digest_min_chars: int = settings.TOOL_DIGEST_MIN_CHARS,
+):
+    """Compute the message updates that bring the history within budget.
+
+    Args:
+        messages: Current message history (each message must have an ID)
+        budget: Target size of the history in estimated tokens
+        digest_min_chars: Consumed tool results longer than this are digested
+
+    Returns:
+        Tuple of (updates for the ``messages`` channel, compacted history)
+    """
+    messages = list(messages)
+    if not messages:
+        return [], []
+
+    # Tool results followed by a later AI message have been read by the model
+    last_ai = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+    updates = []
+    compacted = []
+    for i, message in enumerate(messages):
+        if (
+            isinstance(message, ToolMessage)
+            and i < last_ai
+            and len(_text(message)) > digest_min_chars
+            and not _text(message).startswith(DIGEST_PREFIX)
+        ):
+            message = ToolMessage(
+                content=digest_tool_result(message.name or "tool", _text(message)),
+                name=message.name,
+                tool_call_id=message.tool_call_id,
+                id=message.id,
+            )
+            updates.append(message)
+        compacted.append(message)
+
+    if estimate_tokens(compacted) <= budget:
+        return updates, compacted
+
+    # Drop whole turns, oldest first, but never the first user message or
+    # anything from the latest user message on.
+    turns = _group_turns(compacted)
+    last_human = max(
+        (i for i, t in enumerate(turns) if isinstance(t[0], HumanMessage)), default=len(turns) - 1
+    )
+    first = turns[0][0]
+    if not isinstance(first, HumanMessage) or last_human == 0:
+        return updates, compacted
+
+    dropped = []
+    kept_middle = turns[1:last_human]
+    tail = [m for t in turns[last_human:] for m in t]
+    while kept_middle:
+        head = _fold_summary(first, dropped) if dropped else first
+        current = [head] + [m for t in kept_middle for m in t] + tail
+        if estimate_tokens(current) <= budget:
+            break
+        dropped.append(kept_middle.pop(0))
+    if not dropped:
+        return updates, compacted
+
+    summary = _fold_summary(first, dropped)
+    dropped_ids = {m.id for t in dropped for m in t}
+    updates = [u for u in updates if u.id not in dropped_ids]
+    updates.append(summary)
+    updates.extend(RemoveMessage(id=message_id) for message_id in dropped_ids)
+    compacted = [summary] + [m for t in kept_middle for m in t] + tail
+    return updates, compacted
+
+
+def context_node(state: TravelState) -> dict:
+    """Keep the history within the token budget before the next LLM call."""
+    messages = state["messages"]
+    before = estimate_tokens(messages)
+    updates, compacted = compact_history(messages)
+    after = estimate_tokens(compacted)
+    if updates:
+        logger.info("Compacted context from ~%d to ~%d tokens", before, after)
+    return {
+        "messages": updates,
+        "context_tokens": {
+            "before": before,
+            "after": after,
+            "budget": settings.CONTEXT_TOKEN_BUDGET,
+        },
+    }
+
+
+def route_after_context(state: TravelState) -> str:
+    """Continue to intake for a new turn, otherwise back to research."""
+    return "intake" if state.get("stage", "intake") == "intake" else "research"
@@ -0,0 +1,129 @@
+"""Compact encoding of tool results for the model.
+
+Search tools return lists of verbose dicts. Before a result enters the
+message history it is rendered as a column-oriented table with a short handle
+per row (``F1``, ``H2``). Bulky fields such as booking tokens are left out of
+the table and kept in the run's ``side_store`` under the row's handle, where
+the finalize step can resolve them.
+"""
+import json
+import re
+
+# Fields that are useless to the model but needed when booking
+BULKY_FIELDS = {"booking_token"}
+# Longer string values are treated as bulky too
+MAX_CELL_CHARS = 80
+HANDLE_PREFIXES = {"search_flights": "F", "search_hotels": "H"}
+DEFAULT_HANDLE_PREFIX = "R"
+HANDLE_PATTERN = re.compile(r"\b([FHR])(\d+)\b")
+TABLE_HEADER = re.compile(r"^(\w+) \((\d+) rows")
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, list):
+        return ",".join(_cell(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def _next_number(prefix: str, side_store: dict) -> int:
+    numbers = [int(m.group(2)) for m in map(HANDLE_PATTERN.fullmatch, side_store) if m and m.group(1) == prefix]
+    return max(numbers, default=0) + 1
+
+
+def _render_table(key: str, rows: list, prefix: str, start: int) -> tuple:
+    columns = []
+    for row in rows:
+        for column in row:
+            if column not in columns:
+                columns.append(column)
+
+    # Columns with the same value in every row are stated once
+    constant = {}
+    table_columns = []
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        if column in BULKY_FIELDS:
+            continue
+        if any(isinstance(v, str) and len(v) > MAX_CELL_CHARS for v in values):
+            continue
+        if len(rows) > 1 and all(v == values[0] for v in values):
+            constant[column] = values[0]
+            continue
+        table_columns.append(column)
+
+    handles = [f"{prefix}{start + i}" for i in range(len(rows))]
+    lines = [f"{key} ({len(rows)} rows; id is a handle for the full record)"]
+    if constant:
+        lines.append("all rows: " + ", ".join(f"{k}={_cell(v)}" for k, v in constant.items()))
+    lines.append("|".join(["id"] + table_columns))
+    for handle, row in zip(handles, rows):
+        lines.append("|".join([handle] + [_cell(row.get(c)) for c in table_columns]))
+    return "\n".join(lines), dict(zip(handles, rows))
+
+
+def encode_tool_result(name: str, result, side_store: dict) -> tuple:
+    """Render a tool result for the message history.
+
+    Args:
+        name: Tool name, used to pick the handle prefix
+        result: Raw tool output
+        side_store: Handles already issued in this run
+
+    Returns:
+        Tuple of (message content, {handle: full row} entries for the side store)
+    """
+    if not isinstance(result, dict):
+        return json.dumps(result, separators=(",", ":"), default=str), {}
+
+    tables = {
+        key: value
+        for key, value in result.items()
+        if isinstance(value, list) and value and all(isinstance(row, dict) for row in value)
+    }
+    if not tables:
+        return json.dumps(result, separators=(",", ":"), default=str), {}
+
+    prefix = HANDLE_PREFIXES.get(name, DEFAULT_HANDLE_PREFIX)
+    start = _next_number(prefix, side_store)
+    parts = []
+    entries = {}
+    for key, value in result.items():
+        if key in tables:
+            text, rows = _render_table(key, value, prefix, start)
+            start += len(rows)
+            entries.update(rows)
+            parts.append(text)
+        else:
+            parts.append(f"{key}: {_cell(value)}")
+    return "\n".join(parts), entries
+
+
+def summarize_table(content: str):
+    """Describe an encoded table in one line, or return None if it is not one."""
+    lines = content.splitlines()
+    match = TABLE_HEADER.match(lines[0]) if lines else None
+    if not match:
+        return None
+    handles = [line.split("|", 1)[0] for line in lines if HANDLE_PATTERN.fullmatch(line.split("|", 1)[0])]
+    summary = f"{match.group(1)}: {match.group(2)} rows"
+    if handles:
+        summary += f" {handles[0]}-{handles[-1]}"
+    return summary
+
+
+def resolve_handles(text: str, side_store: dict) -> dict:
+    """Return the full records for every known handle mentioned in text."""
+    found = {}
+    for match in HANDLE_PATTERN.finditer(text or ""):
+        handle = match.group(0)
+        if handle in side_store:
+            found[handle] = side_store[handle]
+    return found
@@ -1,58 +1,99 @@
 """LangGraph workflow for Scout travel agent."""
+import threading
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
+from scout.tracing import traced
 from .state import TravelState
+from .context import context_node, route_after_context
+from .prefetch import make_prefetch_node
 from .nodes import (
     intake_node,
     research_node,
     compare_node,
     finalize_node,
-    should_use_tools,
-)
-from scout.tools import (
-    search_flights,
-    search_hotels,
-    create_trip_event,
-    store_preference,
-    recall_preferences,
+    compare_finalize_node,
+    route_after_research,
+    get_tools,
+    make_tools_node,
 )
 
 
-def create_agent():
-    """Create and compile the Scout travel agent graph."""
+def create_agent(tools: list = None, checkpointer=None):
+    """Create and compile the Scout travel agent graph.
+
+    Args:
+        tools: Tools the tools node may execute; defaults to all Scout tools
+        checkpointer: LangGraph checkpointer used to persist state per thread
+    """
 
     # Define tools
-    tools = [
-        search_flights,
-        search_hotels,
-        create_trip_event,
-        store_preference,
-        recall_preferences,
-    ]
+    if tools is None:
+        tools = get_tools()
 
     # Build graph
     workflow = StateGraph(TravelState)
 
     # Add nodes
-    workflow.add_node("intake", intake_node)
-    workflow.add_node("research", research_node)
-    workflow.add_node("tools", ToolNode(tools))
-    workflow.add_node("compare", compare_node)
-    workflow.add_node("finalize", finalize_node)
+    nodes = {
+        "context": context_node,
+        "intake": intake_node,
+        "prefetch": make_prefetch_node(tools),
+        "research": research_node,
+        "tools": make_tools_node(tools),
+        "compare": compare_node,
+        "finalize": finalize_node,
+        "compare_finalize": compare_finalize_node,
+    }
+    for name, node in nodes.items():
+        workflow.add_node(name, traced("node", name, node))
 
     # Define edges
-    workflow.set_entry_point("intake")
-    workflow.add_edge("intake", "research")
+    workflow.set_entry_point("context")
     workflow.add_conditional_edges(
-        "research", should_use_tools, {"tools": "tools", "compare": "compare"}
+        "context", route_after_context, {"intake": "intake", "research": "research"}
     )
-    workflow.add_edge("tools", "research")  # Loop back after tool execution
+    workflow.add_edge("intake", "prefetch")
+    workflow.add_edge("prefetch", "research")
+    workflow.add_conditional_edges(
+        "research",
+        route_after_research,
+        {
+            "tools": "tools",
+            "compare": "compare",
+            "finalize": "finalize",
+            "compare_finalize": "compare_finalize",
+            "end": END,
+        },
+    )
+    workflow.add_edge("tools", "context")  # Compact, then loop back to research
     workflow.add_edge("compare", "finalize")
     workflow.add_edge("finalize", END)
+    workflow.add_edge("compare_finalize", END)
 
     # Compile
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+_agent = None
+_agent_lock = threading.Lock()
+
+
+def get_agent():
+    """Return the shared agent, compiling the graph on first use."""
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                # The itinerary tools write to the dashboard database
+                from scout.api.models import init_db
+                from .checkpoint import get_checkpointer
+
+                init_db()
+                _agent = create_agent(checkpointer=get_checkpointer())
+    return _agent
 
 
-# Create the agent instance
-agent = create_agent()
+def __getattr__(name: str):
+    """Keep ``from scout.agent.graph import agent`` working without compiling at import."""
+    if name == "agent":
+        return get_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,303 @@
+"""Rule-based extraction of trip details from a user's request.
+
+Most requests state the destination, dates, budget and party size plainly, so
+they can be parsed without a model round-trip. The intake node only falls
+back to the LLM when this parser cannot fill the required fields.
+"""
+import re
+from datetime import date, timedelta
+from typing import Optional
+
+# City name -> main airport IATA code
+CITY_AIRPORTS = {
+    "amsterdam": "AMS", "atlanta": "ATL", "austin": "AUS", "bangkok": "BKK",
+    "barcelona": "BCN", "beijing": "PEK", "berlin": "BER", "boston": "BOS",
+    "buenos aires": "EZE", "cancun": "CUN", "cape town": "CPT", "chicago": "ORD",
+    "copenhagen": "CPH", "dallas": "DFW", "delhi": "DEL", "denver": "DEN",
+    "dubai": "DXB", "dublin": "DUB", "edinburgh": "EDI", "florence": "FLR",
+    "frankfurt": "FRA", "hong kong": "HKG", "honolulu": "HNL", "istanbul": "IST",
+    "kyoto": "KIX", "las vegas": "LAS", "lisbon": "LIS", "london": "LHR",
+    "los angeles": "LAX", "madrid": "MAD", "mexico city": "MEX", "miami": "MIA",
+    "milan": "MXP", "montreal": "YUL", "mumbai": "BOM", "munich": "MUC",
+    "nairobi": "NBO", "new york": "JFK", "osaka": "KIX", "paris": "CDG",
+    "prague": "PRG", "reykjavik": "KEF", "rio de janeiro": "GIG", "rome": "FCO",
+    "san diego": "SAN", "san francisco": "SFO", "seattle": "SEA", "seoul": "ICN",
+    "shanghai": "PVG", "singapore": "SIN", "sydney": "SYD", "taipei": "TPE",
+    "tokyo": "NRT", "toronto": "YYZ", "vancouver": "YVR", "venice": "VCE",
+    "vienna": "VIE", "washington": "IAD", "zurich": "ZRH",
+}
+
+# Airports that are not a city's main airport -> city they serve
+OTHER_AIRPORTS = {
+    "HND": "tokyo", "LGA": "new york", "EWR": "new york", "ORY": "paris",
+    "LGW": "london", "STN": "london", "OAK": "oakland", "SJC": "san jose",
+    "MDW": "chicago", "DCA": "washington", "ITM": "osaka",
+}
+AIRPORT_CODES = set(CITY_AIRPORTS.values()) | set(OTHER_AIRPORTS)
+# Default city for an airport code; KIX serves both Kyoto and Osaka
+CITY_BY_AIRPORT = {**{code: city for city, code in CITY_AIRPORTS.items()}, **OTHER_AIRPORTS}
+
+ORIGIN_WORDS = ("from", "out of", "leaving", "departing", "live in", "living in", "based in")
+DESTINATION_WORDS = ("to", "into", "in", "for", "visit", "visiting")
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "a": 1, "a couple of": 2,
+}
+COMPANION_TRAVELERS = {
+    "my partner": 2, "my wife": 2, "my husband": 2, "my girlfriend": 2,
+    "my boyfriend": 2, "my friend": 2, "solo": 1, "alone": 1, "just me": 1,
+}
+
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sept?|oct|nov|dec)[a-z]*\.?"
+_NUM = r"(\d+|one|two|three|four|five|six|seven|eight|nine|ten|a couple of|a)"
+_CITY = "|".join(sorted((re.escape(c) for c in CITY_AIRPORTS), key=len, reverse=True))
+
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+# "March 15-22", "March 15 to April 2", "Mar 15 - 22, 2026"
+MONTH_DAY_RANGE = re.compile(
+    rf"\b{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?\s*(?:-|–|to|through|until)\s*(?:{_MONTH}\s+)?(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s*(\d{{4}}))?",
+    re.I,
+)
+# "15-22 March", "15 March to 2 April"
+DAY_MONTH_RANGE = re.compile(
+    rf"\b(\d{{1,2}})(?:st|nd|rd|th)?(?:\s+{_MONTH})?\s*(?:-|–|to|through|until)\s*(\d{{1,2}})(?:st|nd|rd|th)?\s+{_MONTH}(?:,?\s*(\d{{4}}))?",
+    re.I,
+)
+# "March 15", "15 March", optionally with a year
+SINGLE_DATE = re.compile(
+    rf"\b(?:{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?|(\d{{1,2}})(?:st|nd|rd|th)?\s+{_MONTH})(?:,?\s*(\d{{4}}))?",
+    re.I,
+)
+DURATION = re.compile(rf"\b{_NUM}[\s-]*(day|night|week)s?\b", re.I)
+IN_MONTH = re.compile(rf"\b(?:in|during)\s+{_MONTH}\b", re.I)
+BUDGET = re.compile(
+    r"(?:\$\s*(\d[\d,]*(?:\.\d+)?)\s*(k)?|\b(\d[\d,]*(?:\.\d+)?)\s*(k)?\s*(?:usd|dollars|bucks)\b)"
+    r"(\s*(?:per|a|/)\s*night)?",
+    re.I,
+)
+TRAVELERS = re.compile(
+    rf"\b(?:{_NUM}\s+(?:people|persons|adults|travell?ers|guests|passengers|of us)|family of\s+{_NUM}|party of\s+{_NUM})\b",
+    re.I,
+)
+_LEAD = "|".join(sorted(ORIGIN_WORDS + DESTINATION_WORDS + ("not",), key=len, reverse=True))
+CITY_MENTION = re.compile(rf"\b(?:({_LEAD})\s+)?({_CITY})\b", re.I)
+# "Boston to Paris": a bare city followed by another is the origin
+ROUTE_TAIL = re.compile(rf"\s*(?:to|->|→)\s*(?:{_CITY})\b", re.I)
+AIRPORT_MENTION = re.compile(r"\b(from|to|into|out of)\s+([A-Z]{3})\b")
+STARS = re.compile(r"\b([1-5])[\s-]*stars?\b", re.I)
+CABIN = re.compile(r"\b(economy|premium economy|business|first)[\s-]+class\b", re.I)
+DIRECT = re.compile(r"\b(direct|non-?stop)\b", re.I)
+
+
+def _number(token: str) -> int:
+    token = token.lower()
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+
+def _month(token: str) -> int:
+    return MONTHS[token.lower()[:3]]
+
+
+def _upcoming(month: int, day: int, year: Optional[str], today: date) -> Optional[date]:
+    """Resolve a month/day to its next valid occurrence on or after today.
+
+    Without a year, a date that does not exist this year (Feb 29) resolves
+    to the next year that has it.
+    """
+    if year:
+        try:
+            return date(int(year), month, day)
+        except ValueError:
+            return None
+    for offset in range(5):
+        try:
+            candidate = date(today.year + offset, month, day)
+        except ValueError:
+            continue
+        if candidate >= today:
+            return candidate
+    return None
+
+
+def _after(start: Optional[date], month: int, day: int, year: Optional[str], today: date) -> Optional[date]:
+    """Resolve a range's end date, in the start's year or the one after."""
+    if start is None:
+        return _upcoming(month, day, year, today)
+    end = _upcoming(month, day, str(start.year), today)
+    if end is None or end < start:
+        end = _upcoming(month, day, str(start.year + 1), today)
+    return end
+
+
+def _parse_dates(text: str, today: date) -> dict:
+    # Impossible dates ("2026-02-30") resolve to None and are skipped
+    iso = [_upcoming(int(m), int(d), y, today) for y, m, d in ISO_DATE.findall(text)]
+    if len(iso) >= 2 and iso[0] and iso[1]:
+        return {"start": iso[0].isoformat(), "end": iso[1].isoformat()}
+
+    start = end = None
+    match = MONTH_DAY_RANGE.search(text)
+    if match:
+        m1, d1, m2, d2, year = match.groups()
+        start = _upcoming(_month(m1), int(d1), year, today)
+        end = _after(start, _month(m2 or m1), int(d2), year, today)
+    else:
+        match = DAY_MONTH_RANGE.search(text)
+        if match:
+            d1, m1, d2, m2, year = match.groups()
+            start = _upcoming(_month(m1 or m2), int(d1), year, today)
+            end = _after(start, _month(m2), int(d2), year, today)
+
+    if start is None and end is None and iso:
+        start, end = iso[0], iso[1] if len(iso) > 1 else None
+    if start is None and end is None:
+        match = SINGLE_DATE.search(text)
+        if match:
+            m1, d1, d2, m2, year = match.groups()
+            start = _upcoming(_month(m1 or m2), int(d1 or d2), year, today)
+
+    duration = DURATION.search(text)
+    if start and end is None and duration:
+        count, unit = _number(duration.group(1)), duration.group(2).lower()
+        days = count * 7 if unit == "week" else count
+        # "5 days" spans 4 nights; "5 nights" spans 5
+        end = start + timedelta(days=days if unit != "day" else max(days - 1, 1))
+
+    if start and end:
+        return {"start": start.isoformat(), "end": end.isoformat()}
+    if start:
+        return {"start": start.isoformat()}
+    if end:
+        # Keep the half of a range that exists; the LLM asks for the other
+        return {"end": end.isoformat()}
+    month = IN_MONTH.search(text)
+    if month:
+        return {"month": _month(month.group(1))}
+    return {}
+
+
+def _parse_budget(text: str) -> dict:
+    budget = {}
+    for amount, k1, amount2, k2, per_night in BUDGET.findall(text):
+        value = float((amount or amount2).replace(",", ""))
+        if k1 or k2:
+            value *= 1000
+        value = int(value) if value.is_integer() else value
+        key = "hotel_per_night" if per_night else "total"
+        budget.setdefault(key, value)
+    return budget
+
+
+def _parse_travelers(text: str) -> Optional[int]:
+    match = TRAVELERS.search(text)
+    if match:
+        return _number(next(g for g in match.groups() if g))
+    lowered = text.lower()
+    for phrase, count in COMPANION_TRAVELERS.items():
+        if re.search(rf"\b{phrase}\b", lowered):
+            return count
+    return None
+
+
+def _airport_city(code: str, named: list) -> str:
+    """The city an airport serves, preferring one the user named."""
+    for city in named:
+        if CITY_AIRPORTS[city] == code or OTHER_AIRPORTS.get(code) == city:
+            return city
+    return CITY_BY_AIRPORT.get(code, code.lower())
+
+
+def _parse_places(text: str) -> tuple:
+    """Return (destination city, destination IATA, origin IATA).
+
+    "from X", "leaving X", "live in X" and "X to Y" name the origin. Cities
+    after to/in/for/visit win over bare mentions and "not X" rules X out;
+    if more than one destination is left it stays unset for the LLM.
+    """
+    origin = None
+    named, excluded, marked, bare = [], set(), [], []
+    for match in CITY_MENTION.finditer(text):
+        lead, city = (match.group(1) or "").lower(), match.group(2).lower()
+        code = CITY_AIRPORTS[city]
+        named.append(city)
+        if lead == "not":
+            excluded.add(city)
+        elif lead in ORIGIN_WORDS or (not lead and ROUTE_TAIL.match(text, match.end())):
+            origin = origin or code
+            excluded.add(city)
+        else:
+            (marked if lead else bare).append((city, code))
+    for word, code in AIRPORT_MENTION.findall(text):
+        if code not in AIRPORT_CODES:
+            continue
+        if word.lower() in ("from", "out of"):
+            origin = origin or code
+        else:
+            marked.append((_airport_city(code, named), code))
+
+    candidates = [place for place in marked if place[0] not in excluded]
+    candidates = candidates or [place for place in bare if place[0] not in excluded]
+    if len({city for city, _ in candidates}) != 1:
+        return None, None, origin
+    # An airport the user named comes last and beats the city's main one
+    city, code = candidates[-1]
+    return city.title(), code, origin
+
+
+def parse_travel_request(text: str, today: Optional[date] = None) -> dict:
+    """Extract trip details that are stated explicitly in a request.
+
+    Args:
+        text: The user's message
+        today: Reference date for resolving dates without a year
+
+    Returns:
+        dict with any of "destination", "dates", "budget", "travelers" and
+        "preferences" that could be extracted
+    """
+    today = today or date.today()
+    details = {}
+
+    destination, destination_code, origin = _parse_places(text)
+    if destination:
+        details["destination"] = destination
+
+    dates = _parse_dates(text, today)
+    if dates:
+        details["dates"] = dates
+
+    budget = _parse_budget(text)
+    if budget:
+        details["budget"] = budget
+
+    travelers = _parse_travelers(text)
+    if travelers:
+        details["travelers"] = travelers
+
+    preferences = {}
+    if destination_code:
+        preferences["destination_airport"] = destination_code
+    if origin:
+        preferences["origin"] = origin
+    if DIRECT.search(text):
+        preferences["direct_only"] = True
+    stars = STARS.search(text)
+    if stars:
+        preferences["hotel_stars"] = int(stars.group(1))
+    cabin = CABIN.search(text)
+    if cabin:
+        preferences["cabin"] = cabin.group(1).lower()
+    if preferences:
+        details["preferences"] = preferences
+    return details
+
+
+def is_complete(state: dict) -> bool:
+    """True when the state has what research needs: a destination and both dates."""
+    dates = state.get("dates") or {}
+    return bool(state.get("destination") and dates.get("start") and dates.get("end"))
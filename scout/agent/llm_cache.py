@@ -0,0 +1,208 @@
+"""Persistent cache of LLM responses.
+
+With temperature 0, the same model, tools and messages give effectively the
+same response, so demo queries, regression runs and retries can be answered
+from SQLite instead of calling Gemini again. The cache is opt-in
+(``SCOUT_LLM_CACHE=1``), evicts least recently used entries beyond
+``SCOUT_LLM_CACHE_MAX_ENTRIES`` and expires entries after
+``SCOUT_LLM_CACHE_TTL`` seconds.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from langchain_core.messages import messages_from_dict, messages_to_dict
+
+from scout.config.settings import settings
+from scout.tracing import span
+
+# Evict at most once per this many writes
+EVICT_EVERY_PUTS = 50
+
+
+def _normalize_messages(messages) -> list:
+    """Reduce messages to what determines the response.
+
+    Message IDs, provider metadata and generated tool call IDs differ between
+    otherwise identical runs, so they are left out; tool call IDs are replaced
+    by their order of appearance to keep calls matched to their results.
+    """
+    call_ids = {}
+
+    def placeholder(call_id):
+        return call_ids.setdefault(call_id, f"call_{len(call_ids)}")
+
+    normalized = []
+    for message in messages:
+        entry = {"type": message.type, "content": message.content}
+        if getattr(message, "name", None):
+            entry["name"] = message.name
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            entry["tool_calls"] = [
+                {"name": c["name"], "args": c["args"], "id": placeholder(c.get("id"))}
+                for c in tool_calls
+            ]
+        if getattr(message, "tool_call_id", None):
+            entry["tool_call_id"] = placeholder(message.tool_call_id)
+        normalized.append(entry)
+    return normalized
+
+
+def model_fingerprint(model) -> dict:
+    """Describe a (possibly tool-bound) chat model for the cache key."""
+    bound = getattr(model, "bound", model)
+    kwargs = getattr(model, "kwargs", None) or {}
+    return {
+        "model": getattr(bound, "model", None) or type(bound).__name__,
+        "temperature": getattr(bound, "temperature", None),
+        "tools": kwargs.get("tools", []),
+    }
+
+
+def cache_key(model, messages) -> str:
+    """Hash the model, bound tool schemas and normalized messages.
+
+    The system prompt is the first message, so it is part of the key.
+    """
+    payload = {"model": model_fingerprint(model), "messages": _normalize_messages(messages)}
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed LRU cache of model responses with a time to live."""
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at);
+        """)
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._stats = {}
+
+    def get(self, key: str, node: str = ""):
+        """Return the cached response message, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row:
+                self._conn.execute(
+                    "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+            self._count(node, "hits" if row else "misses")
+        if not row:
+            return None
+        message = messages_from_dict(json.loads(row[0]))[0]
+        # Replayed tool calls get fresh IDs so they never collide in a thread
+        for call in getattr(message, "tool_calls", None) or []:
+            call["id"] = f"call_{uuid.uuid4().hex}"
+        return message
+
+    def put(self, key: str, message) -> None:
+        """Store a response and evict old entries when the cache is full."""
+        now = time.time()
+        response = json.dumps(messages_to_dict([message]), default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._puts += 1
+            if self._puts % EVICT_EVERY_PUTS == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        self._conn.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def _count(self, node: str, field: str) -> None:
+        counts = self._stats.setdefault(node, {"hits": 0, "misses": 0})
+        counts[field] += 1
+
+    def stats(self) -> dict:
+        """Return hits, misses and hit rate per node."""
+        with self._lock:
+            return {
+                node: {**c, "hit_rate": c["hits"] / (c["hits"] + c["misses"])}
+                for node, c in self._stats.items()
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the process-wide cache, or None when caching is disabled."""
+    global _cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(
+                    settings.LLM_CACHE_DB_PATH,
+                    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                )
+    return _cache
+
+
+def invoke_cached(node: str, model, messages):
+    """Invoke the model, answering from the cache when enabled."""
+    from .context import estimate_tokens
+
+    with span("llm", node, estimated_input_tokens=estimate_tokens(messages)) as s:
+        cache = get_llm_cache()
+        key = cache_key(model, messages) if cache else None
+        cached = cache.get(key, node) if cache else None
+        if cached is not None:
+            s.set(cache="hit")
+            return cached
+        response = model.invoke(messages)
+        if cache:
+            cache.put(key, response)
+        usage = getattr(response, "usage_metadata", None) or {}
+        s.set(
+            cache="miss" if cache else "off",
+            input_tokens=usage.get("input_tokens"),
+            output_tokens=usage.get("output_tokens"),
+        )
+        return response
+
+
+def llm_cache_stats() -> dict:
+    """Return per-node hit rates, or an empty dict when caching is disabled."""
+    cache = get_llm_cache()
+    return cache.stats() if cache else {}
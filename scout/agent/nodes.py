@@ -1,41 +1,212 @@
 """Node functions for the Scout travel agent workflow."""
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
+from .encoding import encode_tool_result, resolve_handles
+from .intake_parser import parse_travel_request, is_complete
+from .llm_cache import invoke_cached
 from .state import TravelState
+from .tool_cache import (
+    CACHEABLE_TOOLS, shared_cache, tool_call_key, canonical_args, is_cacheable, thread_entry, thread_result
+)
+from scout.tracing import span, record_span
+import contextvars
+import json
+import logging
 import os
+import time
 
+logger = logging.getLogger(__name__)
 
-def get_model_with_tools():
-    """Get the LLM model with tools bound."""
-    from langchain_google_genai import ChatGoogleGenerativeAI
+
+def get_tools() -> list:
+    """Get the tools available to the agent."""
     from scout.tools import (
         search_flights,
         search_hotels,
         create_trip_event,
+        sync_trip_calendar,
         store_preference,
         recall_preferences,
         add_itinerary_item,
+        optimize_itinerary,
         list_trips
     )
 
-    model = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0,
-        google_api_key=os.getenv("GOOGLE_API_KEY"),
-    )
-    tools = [
+    return [
         search_flights,
         search_hotels,
         create_trip_event,
+        sync_trip_calendar,
         store_preference,
         recall_preferences,
         add_itinerary_item,
+        optimize_itinerary,
         list_trips
     ]
-    return model.bind_tools(tools)
+
+
+# Optional replacement for the Gemini model, e.g. a scripted model in benchmarks
+_model_factory = None
+
+
+def set_model_factory(factory) -> None:
+    """Make nodes obtain their model from factory; None restores Gemini."""
+    global _model_factory
+    _model_factory = factory
+
+
+def get_model_with_tools():
+    """Get the LLM model with tools bound."""
+    if _model_factory is not None:
+        return _model_factory()
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    model = ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        temperature=0,
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+    )
+    return model.bind_tools(get_tools())
+
+
+# State fields that list the handles returned by each search tool
+OPTION_FIELDS = {"search_flights": "flight_options", "search_hotels": "hotel_options"}
+
+
+def make_tools_node(tools: list):
+    """Build the node that executes the tool calls requested by the model.
+
+    Results of read-only searches are looked up first in the thread's own
+    ``tool_cache`` (restored from its checkpoint) and then in the process-wide
+    cache, so a resumed conversation does not repeat searches it already ran
+    and prefetched searches resolve without a second request. Thread entries
+    expire after ``SCOUT_TOOL_CACHE_TTL`` like shared ones, so prices are not
+    replayed from a conversation resumed days later.
+    """
+    tools_by_name = {t.name: t for t in tools}
+
+    def run_tool(call: dict):
+        cache = "miss" if call["name"] in CACHEABLE_TOOLS else "off"
+        with span("tool", call["name"], cache=cache) as s:
+            tool = tools_by_name.get(call["name"])
+            if tool is None:
+                result = {"error": f"Unknown tool: {call['name']}"}
+            else:
+                try:
+                    result = tool.invoke(call["args"])
+                except Exception as e:
+                    result = {"error": f"Tool {call['name']} failed: {str(e)}"}
+            if isinstance(result, dict) and "error" in result:
+                s.status = "error"
+                s.set(error=result["error"])
+            return result
+
+    def tools_node(state: TravelState) -> dict:
+        calls = state["messages"][-1].tool_calls
+        thread_cache = state.get("tool_cache") or {}
+        keys = [
+            tool_call_key(call["name"], canonical_args(tools_by_name.get(call["name"]), call["args"]))
+            for call in calls
+        ]
+
+        results = {}
+        pending = []
+        new_cache_entries = {}
+        for call, key in zip(calls, keys):
+            started = time.perf_counter()
+            source = "thread"
+            cached = thread_result(thread_cache.get(key))
+            if cached is None:
+                # May wait for a prefetched search that is still running
+                cached, prefetched = shared_cache.lookup(key)
+                source = "prefetch" if prefetched else "shared"
+                if cached is not None:
+                    new_cache_entries[key] = thread_entry(cached)
+            if cached is not None:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                record_span("tool", call["name"], elapsed_ms, cache="hit", source=source)
+                results[call["id"]] = cached
+            else:
+                pending.append((call, key))
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+                # Copy the context so tool spans land in the current trace
+                futures = [
+                    pool.submit(contextvars.copy_context().run, run_tool, call)
+                    for call, _ in pending
+                ]
+                outputs = [f.result() for f in futures]
+                for (call, key), result in zip(pending, outputs):
+                    results[call["id"]] = result
+                    if is_cacheable(call["name"], result):
+                        shared_cache.put(key, result)
+                        new_cache_entries[key] = thread_entry(result)
+
+        # Encode results as compact tables; full rows stay in the side store
+        side_store = dict(state.get("side_store") or {})
+        new_rows = {}
+        messages = []
+        update = {}
+        for call in calls:
+            content, rows = encode_tool_result(call["name"], results[call["id"]], side_store)
+            side_store.update(rows)
+            new_rows.update(rows)
+            if call["name"] in OPTION_FIELDS and rows:
+                update[OPTION_FIELDS[call["name"]]] = list(rows)
+            messages.append(
+                ToolMessage(content=content, name=call["name"], tool_call_id=call["id"])
+            )
+        update.update(
+            {"messages": messages, "tool_cache": new_cache_entries, "side_store": new_rows}
+        )
+        return update
+
+    return tools_node
+
+
+def extract_trip_details(state: TravelState) -> dict:
+    """Parse the latest user message and merge it into the known trip fields."""
+    latest = next(
+        (m for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), None
+    )
+    parsed = parse_travel_request(str(latest.content)) if latest else {}
+
+    details = {}
+    if parsed.get("destination"):
+        details["destination"] = parsed["destination"]
+    if parsed.get("travelers"):
+        details["travelers"] = parsed["travelers"]
+    for field in ("dates", "budget", "preferences"):
+        if parsed.get(field):
+            details[field] = {**(state.get(field) or {}), **parsed[field]}
+    return details
+
+
+def describe_trip(state: TravelState) -> str:
+    """Render the known trip fields for a system prompt."""
+    known = {
+        field: state.get(field)
+        for field in ("destination", "dates", "budget", "travelers", "preferences")
+        if state.get(field)
+    }
+    if not known:
+        return ""
+    return "\n\nKnown trip details: " + json.dumps(known, default=str)
 
 
 def intake_node(state: TravelState) -> dict:
-    """Extract travel requirements from user input."""
+    """Extract travel requirements from user input.
+
+    The rule-based parser fills the trip fields first; the LLM is only asked
+    when destination and dates are still missing afterwards.
+    """
+    details = extract_trip_details(state)
+    if is_complete({**state, **details}):
+        logger.info("Intake parsed without LLM: %s", details)
+        return {**details, "stage": "research"}
+
     messages = state["messages"]
     model = get_model_with_tools()
 
@@ -51,9 +222,9 @@ def intake_node(state: TravelState) -> dict:
         Be conversational and helpful."""
     )
 
-    response = model.invoke([system_message] + list(messages))
+    response = invoke_cached("intake", model, [system_message] + list(messages))
 
-    return {"messages": [response], "stage": "research"}
+    return {**details, "messages": [response], "stage": "research"}
 
 
 def research_node(state: TravelState) -> dict:
@@ -67,9 +238,10 @@ def research_node(state: TravelState) -> dict:
         Search for 3-5 flight options and 3-5 hotel options.
 
         After gathering options, summarize what you found and prepare to present them."""
+        + describe_trip(state)
     )
 
-    response = model.invoke([system_message] + list(state["messages"]))
+    response = invoke_cached("research", model, [system_message] + list(state["messages"]))
 
     return {"messages": [response]}
 
@@ -82,6 +254,49 @@ def should_use_tools(state: TravelState) -> str:
     return "compare"
 
 
+# Tools whose results are options the user chooses between
+SEARCH_TOOLS = {"search_flights", "search_hotels"}
+
+
+def route_after_research(state: TravelState) -> str:
+    """Pick the cheapest path to an answer once research stops calling tools.
+
+    - "tools": the model requested tool calls
+    - "compare_finalize": the user picked options (their latest message cites
+      handles such as F2), so confirming and finalizing share one LLM call
+    - "end": research searched nothing this turn, so its reply already
+      answers the user (pure Q&A)
+    - "finalize": at most one option per category, nothing to compare
+    - "compare": present the options, then finalize
+    """
+    messages = state["messages"]
+    last_message = messages[-1]
+    if getattr(last_message, "tool_calls", None):
+        return "tools"
+
+    last_human = max(
+        (i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0
+    )
+    side_store = state.get("side_store") or {}
+    chosen = resolve_handles(str(messages[last_human].content), side_store)
+    searched = any(
+        isinstance(m, ToolMessage) and m.name in SEARCH_TOOLS for m in messages[last_human:]
+    )
+    options = max(len(state.get("flight_options") or []), len(state.get("hotel_options") or []))
+
+    if chosen:
+        decision, reason = "compare_finalize", f"user chose {', '.join(chosen)}"
+    elif not searched:
+        decision, reason = "end", "no searches this turn"
+    elif options <= 1:
+        decision, reason = "finalize", f"{options} option(s) to compare"
+    else:
+        decision, reason = "compare", f"{options} options to compare"
+    logger.info("Route after research: %s (%s)", decision, reason)
+    record_span("route", "after_research", 0.0, decision=decision, reason=reason)
+    return decision
+
+
 def compare_node(state: TravelState) -> dict:
     """Present options and help user choose."""
     model = get_model_with_tools()
@@ -94,17 +309,60 @@ def compare_node(state: TravelState) -> dict:
         - Key features (stops, duration, amenities)
         - Your recommendation based on their preferences
 
+        Refer to each option by its id (e.g. F1, H2) so the user can pick it.
         Ask which options they'd like to book."""
     )
 
-    response = model.invoke([system_message] + list(state["messages"]))
+    response = invoke_cached("compare", model, [system_message] + list(state["messages"]))
 
     return {"messages": [response], "stage": "finalize"}
 
 
+def select_options(state: TravelState) -> dict:
+    """Resolve the flight and hotel handles the user picked or was recommended.
+
+    The latest user message wins; otherwise the most recent AI message that
+    mentions a handle (the comparison's recommendation) is used.
+    """
+    side_store = state.get("side_store") or {}
+    selected = {}
+    candidates = [m for m in reversed(state["messages"]) if isinstance(m, HumanMessage)][:1]
+    candidates += [m for m in reversed(state["messages"]) if isinstance(m, AIMessage)]
+    for message in candidates:
+        for handle, record in resolve_handles(str(message.content), side_store).items():
+            field = "selected_flights" if handle.startswith("F") else "selected_hotel"
+            if handle[0] in "FH" and field not in selected:
+                selected[field] = {"id": handle, **record}
+        if selected:
+            break
+    return selected
+
+
+def compare_finalize_node(state: TravelState) -> dict:
+    """Confirm the options the user already picked and finalize in one call."""
+    model = get_model_with_tools()
+    selected = select_options(state)
+    chosen = ", ".join(option["id"] for option in selected.values())
+
+    system_message = SystemMessage(
+        content=f"""The user has chosen {chosen or "their options"}. In one reply:
+        1. Confirm the chosen flights and hotel with price and key features
+        2. Use create_trip_event to add the trip to their calendar
+        3. Store any new preferences with store_preference
+        4. Provide booking links and next steps
+
+        Booking details for the chosen options are held by the system."""
+    )
+
+    response = invoke_cached("compare_finalize", model, [system_message] + list(state["messages"]))
+
+    return {"messages": [response], "stage": "complete", **selected}
+
+
 def finalize_node(state: TravelState) -> dict:
     """Create calendar event and confirm booking details."""
     model = get_model_with_tools()
+    selected = select_options(state)
 
     system_message = SystemMessage(
         content="""Finalize the trip:
@@ -113,7 +371,13 @@ def finalize_node(state: TravelState) -> dict:
         3. Store any new preferences with store_preference
         4. Provide booking links and next steps"""
     )
+    if selected:
+        chosen = ", ".join(option["id"] for option in selected.values())
+        system_message.content += (
+            f"\n\nThe user's selection resolves to {chosen}; "
+            "booking details for these are held by the system."
+        )
 
-    response = model.invoke([system_message] + list(state["messages"]))
+    response = invoke_cached("finalize", model, [system_message] + list(state["messages"]))
 
-    return {"messages": [response], "stage": "complete"}
+    return {"messages": [response], "stage": "complete", **selected}
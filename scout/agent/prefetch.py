@@ -0,0 +1,93 @@
+"""Speculative flight and hotel searches started right after intake.
+
+Once intake knows the destination and dates, research will almost always
+search for flights and hotels. The prefetch stage predicts those calls and
+runs them in the background while the research LLM call is in flight. The
+pending results are registered in the shared tool cache, so when the model
+requests the same search the tools node picks up the result instead of
+starting a new request.
+"""
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from scout.config.settings import settings
+from .state import TravelState
+from .tool_cache import shared_cache, tool_call_key, canonical_args
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PREFETCH_WORKERS, thread_name_prefix="scout-prefetch"
+        )
+    return _executor
+
+
+def predict_tool_calls(state: TravelState) -> list:
+    """Predict the searches research is about to request.
+
+    Returns:
+        List of (tool name, args) tuples; empty if intake is incomplete
+    """
+    dates = state.get("dates") or {}
+    preferences = state.get("preferences") or {}
+    destination = state.get("destination")
+    if not (destination and dates.get("start") and dates.get("end")):
+        return []
+
+    travelers = state.get("travelers") or 1
+    hotel_args = {"destination": destination, "checkin": dates["start"], "checkout": dates["end"]}
+    # Leave unstated options to the tool defaults, as the model usually does
+    if travelers > 1:
+        hotel_args["guests"] = travelers
+    if preferences.get("hotel_stars"):
+        hotel_args["min_stars"] = preferences["hotel_stars"]
+    calls = [("search_hotels", hotel_args)]
+    if preferences.get("origin") and preferences.get("destination_airport"):
+        calls.append(("search_flights", {
+            "origin": preferences["origin"],
+            "destination": preferences["destination_airport"],
+            "departure_date": dates["start"],
+            "return_date": dates["end"],
+            "adults": travelers,
+            "direct_only": bool(preferences.get("direct_only", False)),
+        }))
+    return calls
+
+
+def _run(tool, args: dict, future: Future) -> None:
+    try:
+        future.set_result(tool.invoke(args))
+    except Exception as e:
+        future.set_exception(e)
+
+
+def make_prefetch_node(tools: list):
+    """Build the node that starts predicted searches in the background."""
+    tools_by_name = {t.name: t for t in tools}
+
+    def prefetch_node(state: TravelState) -> dict:
+        if not settings.PREFETCH_ENABLED:
+            return {}
+        for name, args in predict_tool_calls(state):
+            tool = tools_by_name.get(name)
+            if tool is None:
+                continue
+            key = tool_call_key(name, canonical_args(tool, args))
+            future = Future()
+            if shared_cache.put_pending(key, future):
+                logger.debug("Prefetching %s", key)
+                _get_executor().submit(_run, tool, args, future)
+        return {}
+
+    return prefetch_node
+
+
+def prefetch_stats() -> dict:
+    """Return prefetch counters and hit rate for this process."""
+    return shared_cache.prefetch_stats.snapshot()
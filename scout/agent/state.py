@@ -3,6 +3,23 @@ from typing import TypedDict, Annotated, Sequence
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 
+from .tool_cache import merge_thread_cache
+
+# Key in a merge_dicts update that discards the current value first
+RESET = "__reset__"
+
+
+def merge_dicts(left: dict, right: dict) -> dict:
+    """Reducer that merges dict updates instead of replacing the whole value.
+
+    An update containing ``RESET`` replaces the value with the rest of the
+    update.
+    """
+    right = dict(right or {})
+    if right.pop(RESET, False):
+        return right
+    return {**(left or {}), **right}
+
 
 class TravelState(TypedDict):
     """State schema for multi-step travel planning workflow."""
@@ -13,9 +30,12 @@ class TravelState(TypedDict):
     budget: dict  # {"flights": 500, "hotels": 1000, "total": 2000}
     travelers: int
     preferences: dict  # {"airline": "any", "hotel_stars": 4, "direct_only": False}
-    flight_options: list
-    hotel_options: list
+    flight_options: list  # row handles from the latest flight search, e.g. ["F1", "F2"]
+    hotel_options: list  # row handles from the latest hotel search
     selected_flights: dict
     selected_hotel: dict
     calendar_event_id: str
     stage: str  # "intake" | "research" | "compare" | "finalize" | "complete"
+    tool_cache: Annotated[dict, merge_thread_cache]  # {call key: [stored at, tool result]} for this thread
+    side_store: Annotated[dict, merge_dicts]  # {row handle: full tool record}
+    context_tokens: dict  # {"before": 9100, "after": 5200, "budget": 8000}
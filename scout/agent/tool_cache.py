@@ -0,0 +1,198 @@
+"""Cache of read-only tool results shared by all agent runs in a process.
+
+Entries may also be futures for searches that were started speculatively
+(see ``scout.agent.prefetch``); a lookup waits for the search to finish.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Optional
+
+from scout.config.settings import settings
+
+# Only searches are safe to reuse; memory and itinerary tools have side effects
+# or depend on data that changes between calls.
+CACHEABLE_TOOLS = {"search_flights", "search_hotels"}
+
+
+def canonical_args(tool, args: dict) -> dict:
+    """Fill in a tool's schema defaults so equivalent calls compare equal."""
+    schema = getattr(tool, "args_schema", None)
+    if schema is None or not hasattr(schema, "model_validate"):
+        return dict(args)
+    try:
+        return schema.model_validate(args).model_dump()
+    except Exception:
+        return dict(args)
+
+
+def tool_call_key(name: str, args: dict) -> str:
+    """Build a stable cache key for a tool call.
+
+    Arguments left at None are dropped so that omitted and explicitly-null
+    optional parameters share an entry.
+    """
+    normalized = {k: v for k, v in sorted(args.items()) if v is not None}
+    return f"{name}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+
+def is_cacheable(name: str, result: Any) -> bool:
+    """Return True if a tool result may be reused for identical calls."""
+    return name in CACHEABLE_TOOLS and not (isinstance(result, dict) and "error" in result)
+
+
+def thread_entry(result: Any) -> list:
+    """Wrap a result for a thread's checkpointed ``tool_cache``.
+
+    The wall-clock time is stored with it, since checkpoints outlive the
+    process.
+    """
+    return [time.time(), result]
+
+
+def thread_result(entry) -> Optional[Any]:
+    """The result in a thread cache entry, or None if it is missing or expired."""
+    if not isinstance(entry, list) or len(entry) != 2:
+        # Missing, or saved before entries carried their time
+        return None
+    stored_at, result = entry
+    if time.time() - stored_at > settings.TOOL_CACHE_TTL_SECONDS:
+        return None
+    return result
+
+
+def merge_thread_cache(left: dict, right: dict) -> dict:
+    """Reducer for a thread's ``tool_cache``: merge, drop expired entries and
+    keep the newest ``SCOUT_TOOL_CACHE_MAX_PER_THREAD``."""
+    merged = {**(left or {}), **(right or {})}
+    merged = {key: entry for key, entry in merged.items() if thread_result(entry) is not None}
+    if len(merged) > settings.TOOL_CACHE_MAX_PER_THREAD:
+        newest = sorted(merged, key=lambda key: merged[key][0], reverse=True)[:settings.TOOL_CACHE_MAX_PER_THREAD]
+        merged = {key: merged[key] for key in newest}
+    return merged
+
+
+class PrefetchStats:
+    """Counters for speculative searches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.issued = 0
+            self.hits = 0
+            self.waited = 0
+
+    def record(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self) -> dict:
+        """Return counters and the share of prefetches the agent used."""
+        with self._lock:
+            return {
+                "issued": self.issued,
+                "hits": self.hits,
+                "waited": self.waited,
+                "hit_rate": self.hits / self.issued if self.issued else 0.0,
+            }
+
+
+class ToolResultCache:
+    """Thread-safe LRU cache with a per-entry time to live."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.prefetch_stats = PrefetchStats()
+        self._entries: OrderedDict = OrderedDict()
+        self._prefetched = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, timeout: Optional[float] = None) -> Optional[Any]:
+        """Return the cached result for key, or None if missing or expired.
+
+        A pending prefetch is waited on; if it failed, the entry is dropped and
+        None is returned so the caller runs the tool itself.
+        """
+        return self.lookup(key, timeout)[0]
+
+    def lookup(self, key: str, timeout: Optional[float] = None) -> tuple:
+        """Like ``get``, also telling whether the result is a prefetched search
+        used for the first time.
+
+        Returns:
+            (result or None, prefetched)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._prefetched.discard(key)
+                return None, False
+            self._entries.move_to_end(key)
+            first_use = key in self._prefetched
+            self._prefetched.discard(key)
+
+        if isinstance(value, Future):
+            if first_use and not value.done():
+                self.prefetch_stats.record("waited")
+            try:
+                value = value.result(timeout=timeout)
+            except Exception:
+                value = None
+            name = key.split(":", 1)[0]
+            if value is None or not is_cacheable(name, value):
+                with self._lock:
+                    if self._entries.get(key, (None, None))[1] is entry[1]:
+                        del self._entries[key]
+                return None, False
+        if first_use:
+            self.prefetch_stats.record("hits")
+        return value, first_use
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a result, evicting the least recently used entry when full."""
+        with self._lock:
+            self._store(key, value)
+
+    def put_pending(self, key: str, future: Future) -> bool:
+        """Register a speculative search unless the key is already cached.
+
+        Returns:
+            True if the future was registered
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl_seconds:
+                return False
+            self._store(key, future)
+            self._prefetched.add(key)
+        self.prefetch_stats.record("issued")
+        return True
+
+    def _store(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._prefetched.discard(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._prefetched.clear()
+        self.prefetch_stats.reset()
+
+
+shared_cache = ToolResultCache(
+    ttl_seconds=settings.TOOL_CACHE_TTL_SECONDS,
+    max_entries=settings.TOOL_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,289 @@
+"""Spending analytics over trips and itinerary costs.
+
+The columns the reports need are read from SQLite once into NumPy arrays
+and cached per database; every grouped aggregate is then a ``bincount``
+over integer group codes instead of a Python loop over rows. The cache is
+keyed on this process's writer commit count for the database and on the
+size and modification time of its files (WAL and archive included), so a
+commit from this process or another causes a reload on the next request.
+
+``export_stream`` streams whole tables as Parquet or Arrow IPC in record
+batches for offline analysis; it needs ``pyarrow``.
+"""
+import os
+import threading
+
+import numpy as np
+
+from scout.api import archive, models
+from scout.api.writer import generation
+
+TABLES = ("trips", "itinerary_items")
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+EXPORT_BATCH_ROWS = 65_536
+
+
+def _factorize(values) -> tuple:
+    """(codes, labels) with ``labels[codes] == values``."""
+    labels, codes = np.unique(np.asarray(values), return_inverse=True)
+    return codes.ravel(), labels
+
+
+def _columns(rows: list, count: int) -> list:
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in range(count)]
+
+
+class SpendData:
+    """Column arrays for trips and their items' costs.
+
+    Item arrays are aligned with each other; ``item_trip`` holds each item's
+    position in the trip arrays. Items whose trip no longer exists are
+    dropped. Days stay ISO strings, which compare in date order.
+    """
+
+    def __init__(self, trip_rows: list, item_rows: list):
+        ids, names, destinations, budgets, travelers = _columns(trip_rows, 5)
+        order = np.argsort(np.array(ids, dtype=np.int64), kind="stable")
+        self.trip_ids = np.array(ids, dtype=np.int64)[order]
+        self.trip_names = np.array(names, dtype=object)[order]
+        self.budget = np.array(budgets, dtype=np.float64)[order]
+        self.travelers = np.maximum(np.nan_to_num(np.array(travelers, dtype=np.float64)[order], nan=1), 1)
+        self.destination_code, self.destinations = _factorize(np.array(destinations, dtype=str)[order])
+
+        trip_ids, item_types, days, costs = _columns(item_rows, 4)
+        item_trip_ids = np.array(trip_ids, dtype=np.int64)
+        position = np.searchsorted(self.trip_ids, item_trip_ids)
+        known = position < len(self.trip_ids)
+        known[known] = self.trip_ids[position[known]] == item_trip_ids[known]
+        self.item_trip = position[known]
+        self.cost = np.nan_to_num(np.array(costs, dtype=np.float64)[known])
+        self.day = np.array(days, dtype="U10")[known]
+        self.month_code, self.months = _factorize(np.array(days, dtype="U7")[known])
+        self.type_code, self.item_types = _factorize(np.array(item_types, dtype=str)[known])
+
+    @property
+    def items(self) -> int:
+        return len(self.cost)
+
+
+def _files(include_archived: bool) -> list:
+    path = models.database_path()
+    paths = [path, path + "-wal"]
+    if include_archived:
+        paths += [archive.archive_path(), archive.archive_path() + "-wal"]
+    return paths
+
+
+def _fingerprint(paths: list) -> tuple:
+    stamps = [generation(paths[0])]
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load(include_archived: bool = False) -> SpendData:
+    """The current database's spend columns, from cache unless a file changed."""
+    paths = _files(include_archived)
+    key = (paths[0], include_archived)
+    fingerprint = _fingerprint(paths)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+
+    conn = models.get_db()
+    try:
+        trips = conn.execute(*archive.tiered(
+            conn, "SELECT id, name, destination, budget, travelers FROM {trips}", (), include_archived
+        )).fetchall()
+        items = conn.execute(*archive.tiered(
+            conn, "SELECT trip_id, item_type, substr(start_datetime, 1, 10), cost FROM {itinerary_items}",
+            (), include_archived
+        )).fetchall()
+    finally:
+        conn.close()
+    data = SpendData([tuple(row) for row in trips], [tuple(row) for row in items])
+    with _cache_lock:
+        _cache[key] = (fingerprint, data)
+    return data
+
+
+def invalidate() -> None:
+    """Drop every cached dataset."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _grouped(codes, labels, cost, key: str) -> list:
+    spend = np.bincount(codes, weights=cost, minlength=len(labels))
+    count = np.bincount(codes, minlength=len(labels))
+    return [
+        {key: str(label), "spend": round(float(s), 2), "items": int(n)}
+        for label, s, n in zip(labels, spend, count) if n
+    ]
+
+
+def spending_report(start: str = None, end: str = None, include_archived: bool = False, limit: int = 50) -> dict:
+    """Spend by month, destination, item type and party size, and budget vs actual.
+
+    Args:
+        start: First day (YYYY-MM-DD) of items to include
+        end: Last day (YYYY-MM-DD) of items to include
+        include_archived: Include archived trips
+        limit: Trips listed under budget_vs_actual, most over budget first
+
+    Returns:
+        dict of grouped aggregates; spend is the sum of item costs
+    """
+    data = load(include_archived)
+    mask = np.ones(data.items, dtype=bool)
+    if start:
+        mask &= data.day >= start[:10]
+    if end:
+        mask &= data.day <= end[:10]
+    trip, cost = data.item_trip[mask], data.cost[mask]
+    n_trips = len(data.trip_ids)
+
+    actual = np.bincount(trip, weights=cost, minlength=n_trips)
+    spending = actual > 0
+
+    party_code, parties = _factorize(data.travelers[spending].astype(np.int64))
+    party_spend = np.bincount(party_code, weights=actual[spending], minlength=len(parties))
+    party_people = np.bincount(party_code, weights=data.travelers[spending], minlength=len(parties))
+    party_trips = np.bincount(party_code, minlength=len(parties))
+
+    has_budget = ~np.isnan(data.budget)
+    variance = data.budget - actual
+    # Most over budget first; trips without a budget last
+    order = np.argsort(np.where(has_budget, variance, np.inf), kind="stable")[:limit]
+
+    return {
+        "items": int(mask.sum()),
+        "total_spend": round(float(cost.sum()), 2),
+        "by_month": _grouped(data.month_code[mask], data.months, cost, "month"),
+        "by_destination": _grouped(data.destination_code[trip], data.destinations, cost, "destination"),
+        "by_item_type": _grouped(data.type_code[mask], data.item_types, cost, "item_type"),
+        "by_travelers": [
+            {
+                "travelers": int(size),
+                "trips": int(n),
+                "spend": round(float(total), 2),
+                "per_traveler": round(float(total / people), 2),
+            }
+            for size, n, total, people in zip(parties, party_trips, party_spend, party_people)
+        ],
+        "budget_vs_actual": {
+            "trips": n_trips,
+            "with_budget": int(has_budget.sum()),
+            "over_budget": int((has_budget & (variance < 0)).sum()),
+            "total_budget": round(float(data.budget[has_budget].sum()), 2),
+            "total_actual": round(float(actual.sum()), 2),
+            "trips_by_variance": [
+                {
+                    "trip_id": int(data.trip_ids[i]),
+                    "name": data.trip_names[i],
+                    "budget": None if not has_budget[i] else round(float(data.budget[i]), 2),
+                    "actual": round(float(actual[i]), 2),
+                    "variance": None if not has_budget[i] else round(float(variance[i]), 2),
+                }
+                for i in order
+            ],
+        },
+    }
+
+
+class _Chunks:
+    """Write-only file object collecting bytes until they are taken."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_type(pa, declared: str):
+    declared = declared.upper()
+    if "INT" in declared:
+        return pa.int64()
+    if any(kind in declared for kind in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return pa.string()
+
+
+def export_stream(table: str, fmt: str = "parquet", include_archived: bool = False,
+                  batch_rows: int = EXPORT_BATCH_ROWS):
+    """Yield ``table`` encoded as Parquet or an Arrow IPC stream, batch by batch.
+
+    Rows are read from the cursor ``batch_rows`` at a time, so memory stays
+    bounded however large the table is. Each batch becomes one Parquet row
+    group or one IPC record batch.
+
+    Raises:
+        ImportError: pyarrow is not installed
+        ValueError: Unknown table or format
+    """
+    import pyarrow as pa
+
+    if table not in TABLES or fmt not in FORMATS:
+        raise ValueError(f"table must be one of {TABLES} and format one of {tuple(FORMATS)}")
+
+    conn = models.get_db()
+    declared = [(row[1], row[2]) for row in conn.execute(f"PRAGMA main.table_info({table})")]
+    schema = pa.schema([(name, _arrow_type(pa, kind)) for name, kind in declared])
+    columns = ", ".join(name for name, _ in declared)
+    cursor = conn.execute(*archive.tiered(
+        conn, f"SELECT {columns} FROM {{{table}}}", (), include_archived, "id"
+    ))
+    cursor.row_factory = None
+
+    sink = _Chunks()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    else:
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield sink.take()
+        writer.close()
+        yield sink.take()
+    finally:
+        conn.close()
@@ -0,0 +1,206 @@
+"""Cold storage for finished trips.
+
+Completed and cancelled trips that ended more than ``SCOUT_ARCHIVE_AFTER_DAYS``
+ago are moved, with their itinerary items and chat messages, into a second
+SQLite file ``ATTACH``ed as ``archive``. Each batch of trips is copied and
+deleted in one transaction, so the hot tables (and their indexes and
+backups) only hold live data and a crashed run can simply be repeated.
+
+Readers opt in with ``include_archived``: ``tiered()`` runs the same query
+over the hot and archived tables and combines them with ``UNION ALL``.
+
+    python -m scout.api.archive --older-than-days 90
+"""
+import argparse
+import os
+import sys
+import time
+
+from scout.config.settings import settings
+
+ARCHIVED_STATUSES = ("completed", "cancelled")
+
+# Tables moved per trip: name -> column linking the row to its trip
+TABLES = {"trips": "id", "itinerary_items": "trip_id", "chat_messages": "trip_id"}
+
+INDEXES = {
+    "trips": ["start_date"],
+    "itinerary_items": ["trip_id, start_datetime", "start_datetime"],
+    "chat_messages": ["trip_id, created_at, id"],
+}
+
+
+def archive_path(db: str = None) -> str:
+    """Archive file: ``SCOUT_ARCHIVE_DB_PATH``, else ``<db>-archive.db`` next to
+    ``db`` or the current database (so each user shard has its own archive)."""
+    from scout.api import models
+
+    if settings.ARCHIVE_DB_PATH:
+        return settings.ARCHIVE_DB_PATH
+    stem, ext = os.path.splitext(db or models.database_path())
+    return f"{stem}-archive{ext or '.db'}"
+
+
+def _columns(conn, table: str, schema: str = "main") -> list:
+    return [(row[1], row[2]) for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _sync_schema(conn) -> None:
+    for table in TABLES:
+        hot = _columns(conn, table)
+        cold = {name for name, _ in _columns(conn, table, "archive")}
+        if not cold:
+            definitions = ", ".join(
+                "id INTEGER PRIMARY KEY" if name == "id" else f"{name} {kind}" for name, kind in hot
+            )
+            conn.execute(f"CREATE TABLE archive.{table} ({definitions}, archived_at TEXT)")
+        else:
+            # Columns added to the hot table since the archive was created
+            for name, kind in hot:
+                if name not in cold:
+                    conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {kind}")
+        for columns in INDEXES[table]:
+            suffix = columns.replace(", ", "_")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_{suffix} ON {table}({columns})")
+
+
+def attach(conn, create: bool = False) -> bool:
+    """Attach the archive to ``conn`` as ``archive``.
+
+    The archive's tables are brought up to date with the hot schema, so
+    queries can ``UNION ALL`` the two.
+
+    Args:
+        conn: Connection to the dashboard database, outside a transaction
+        create: Create the archive file if missing; otherwise a missing
+            archive is not attached
+
+    Returns:
+        True if the archive is attached
+    """
+    databases = {row[1]: row[2] for row in conn.execute("PRAGMA database_list")}
+    if "archive" in databases:
+        return True
+    path = archive_path(databases["main"] or None)
+    if not create and not os.path.exists(path):
+        return False
+    conn.execute("ATTACH DATABASE ? AS archive", (path,))
+    _sync_schema(conn)
+    return True
+
+
+def tiered(conn, query: str, params=(), include_archived: bool = False, order_by: str = "") -> tuple:
+    """Build ``query`` over live data, plus archived data when asked.
+
+    ``query`` names tables as ``{trips}``, ``{itinerary_items}`` and
+    ``{chat_messages}``. With ``include_archived`` (and an archive present)
+    the query is repeated over ``archive.*`` and combined with
+    ``UNION ALL``; ``order_by`` is applied to the combined result, so it
+    must name result columns.
+
+    Returns:
+        (sql, params) ready for ``conn.execute``
+    """
+    hot = query.format(**{table: f"main.{table}" for table in TABLES})
+    sql, all_params = hot, tuple(params)
+    if include_archived and attach(conn):
+        cold = query.format(**{table: f"archive.{table}" for table in TABLES})
+        sql, all_params = f"{hot} UNION ALL {cold}", all_params * 2
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    return sql, all_params
+
+
+def archive_trips(older_than_days: int = None, batch_size: int = None, limit: int = None, db: str = None) -> dict:
+    """Move finished trips that ended before the cutoff into the archive.
+
+    This is an offline maintenance job and deliberately bypasses the single
+    writer: the copy needs the archive ``ATTACH``ed, which the writer's
+    connection never has. To keep it from starving the writer, each batch of
+    ``batch_size`` trips is its own short ``BEGIN IMMEDIATE`` transaction
+    (well inside the writer's ``SCOUT_WRITER_BUSY_TIMEOUT_MS``), and after
+    each one the job sleeps as long as the batch held the lock, so queued
+    writer batches get the lock at least half of the time.
+
+    Args:
+        older_than_days: Minimum days since the trip ended
+        batch_size: Trips moved per transaction
+        limit: Stop after this many trips
+        db: Database file to archive; the current user's by default
+
+    Returns:
+        dict with trips, itinerary_items and chat_messages moved, batches and seconds
+    """
+    from scout.api import models
+
+    older_than_days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    started = time.perf_counter()
+    moved = {table: 0 for table in TABLES}
+    batches = 0
+
+    conn = models.connect(db) if db else models.get_db()
+    conn.isolation_level = None
+    conn.execute(f"PRAGMA busy_timeout={settings.WRITER_BUSY_TIMEOUT_MS}")
+    attach(conn, create=True)
+    columns = {table: ", ".join(name for name, _ in _columns(conn, table)) for table in TABLES}
+    placeholders = ", ".join("?" for _ in ARCHIVED_STATUSES)
+    try:
+        while limit is None or moved["trips"] < limit:
+            size = batch_size if limit is None else min(batch_size, limit - moved["trips"])
+            locked = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [row[0] for row in conn.execute(
+                    f"SELECT id FROM main.trips WHERE status IN ({placeholders}) "
+                    "AND end_date < date('now', ?) ORDER BY id LIMIT ?",
+                    (*ARCHIVED_STATUSES, f"-{int(older_than_days)} days", size),
+                )]
+                if not ids:
+                    conn.execute("ROLLBACK")
+                    break
+                id_list = ", ".join("?" for _ in ids)
+                for table, key in TABLES.items():
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO archive.{table} ({columns[table]}, archived_at) "
+                        f"SELECT {columns[table]}, CURRENT_TIMESTAMP FROM main.{table} WHERE {key} IN ({id_list})",
+                        ids,
+                    )
+                    moved[table] += conn.execute(f"DELETE FROM main.{table} WHERE {key} IN ({id_list})", ids).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            batches += 1
+            # Leave the lock to the writer for as long as this batch held it
+            time.sleep(time.perf_counter() - locked)
+    finally:
+        conn.close()
+
+    return {**moved, "batches": batches, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move finished trips into the archive database")
+    parser.add_argument("--older-than-days", type=int, default=None,
+                        help=f"Days since the trip ended (default {settings.ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--batch-size", type=int, default=None, help="Trips per transaction")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many trips per database")
+    parser.add_argument("--user", help="Only archive this user's shard (default: every shard)")
+    args = parser.parse_args(argv)
+
+    from scout.api import models
+    from scout.api.shards import shard_paths
+
+    if not settings.SHARD_BY_USER:
+        models.init_db()
+    paths = [models.database_path(args.user)] if args.user else list(shard_paths().values())
+    summaries = {}
+    for path in paths:
+        summaries[path] = archive_trips(args.older_than_days, args.batch_size, args.limit, db=path)
+        print(f"{archive_path(path)}: {summaries[path]}")
+    return summaries
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
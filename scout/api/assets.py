@@ -0,0 +1,189 @@
+"""Dashboard asset build and precompressed static serving.
+
+``static/index.html`` carries its CSS and JavaScript inline. The build step
+moves each inline ``<style>`` and ``<script>`` block into its own
+content-hashed file under ``static/dist/``, rewrites the shell to reference
+them, and writes gzip (and, when the ``brotli`` package is installed, brotli)
+variants of every output next to it::
+
+    python -m scout.api.assets
+
+``PrecompressedStaticFiles`` then serves the best variant the client accepts.
+Hashed files never change under the same name, so they are cached for a
+year as immutable; everything else, including the HTML shell, must be
+revalidated on each use (a cheap 304 thanks to the ETag).
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "static")
+DIST = "dist"
+URL_PREFIX = "/static/dist/"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Preferred encoding first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_HASHED = re.compile(r"\.[0-9a-f]{10}\.[a-z0-9]+$")
+_INLINE = re.compile(r"<(style|script)>(.*?)</\1>", re.DOTALL)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def _compress(path: str, data: bytes) -> dict:
+    sizes = {"bytes": len(data)}
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(path + ".gz", "wb") as f:
+        f.write(compressed)
+    sizes["gzip"] = len(compressed)
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        with open(path + ".br", "wb") as f:
+            f.write(compressed)
+        sizes["br"] = len(compressed)
+    return sizes
+
+
+def build(source: str = None, out_dir: str = None) -> dict:
+    """Split, hash and precompress the dashboard shell.
+
+    Args:
+        source: HTML file with inline assets (default ``static/index.html``)
+        out_dir: Output directory, emptied first (default ``static/dist``)
+
+    Returns:
+        Manifest mapping each output file to its raw and compressed sizes
+    """
+    source = source or os.path.join(STATIC_DIR, "index.html")
+    out_dir = out_dir or os.path.join(STATIC_DIR, DIST)
+    with open(source, encoding="utf-8") as f:
+        html = f.read()
+
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    assets = {}
+
+    def extract(match):
+        tag, body = match.group(1), match.group(2)
+        data = body.strip().encode("utf-8") + b"\n"
+        ext = "css" if tag == "style" else "js"
+        name = f"{stem}.{content_hash(data)}.{ext}"
+        assets[name] = data
+        if tag == "style":
+            return f'<link rel="stylesheet" href="{URL_PREFIX}{name}">'
+        return f'<script src="{URL_PREFIX}{name}"></script>'
+
+    # Inline blocks become external files in place, so execution order is kept
+    shell = _INLINE.sub(extract, html)
+    assets[os.path.basename(source)] = shell.encode("utf-8")
+
+    manifest = {}
+    for name, data in assets.items():
+        path = os.path.join(out_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        manifest[name] = _compress(path, data)
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def accepted_encodings(header: str) -> set:
+    """Content codings from an ``Accept-Encoding`` header with a non-zero q."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def cache_control(path: str) -> str:
+    return IMMUTABLE if _HASHED.search(path) else REVALIDATE
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """``StaticFiles`` that prefers prebuilt ``.br``/``.gz`` siblings and sets
+    ``Cache-Control`` by whether the file name is content-hashed."""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        media_type = guess_type(full_path)[0] or "text/plain"
+        policy = cache_control(full_path)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        encoding = None
+        compressible = False
+        for coding, suffix in ENCODINGS:
+            variant = full_path + suffix
+            if os.path.isfile(variant):
+                compressible = True
+                if coding in accepted:
+                    full_path, stat_result, encoding = variant, os.stat(variant), coding
+                    break
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, media_type=media_type)
+        response.headers["cache-control"] = policy
+        if compressible:
+            response.headers["vary"] = "Accept-Encoding"
+        if encoding:
+            response.headers["content-encoding"] = encoding
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def shell_path(directory: str = None) -> str:
+    """Path of the HTML shell relative to the static directory: the built one if present."""
+    directory = directory or STATIC_DIR
+    built = os.path.join(DIST, "index.html")
+    return built if os.path.isfile(os.path.join(directory, built)) else "index.html"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build hashed, precompressed dashboard assets")
+    parser.add_argument("--source", help="HTML shell with inline assets (default static/index.html)")
+    parser.add_argument("--out", help="Output directory (default static/dist)")
+    args = parser.parse_args(argv)
+
+    manifest = build(args.source, args.out)
+    for name, sizes in manifest.items():
+        variants = ", ".join(f"{k} {v}" for k, v in sizes.items() if k != "bytes")
+        print(f"{name:<28} {sizes['bytes']:>8} bytes ({variants})")
+    if brotli is None:
+        print("brotli not installed; only gzip variants were written")
+    return manifest
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
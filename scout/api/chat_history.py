@@ -0,0 +1,195 @@
+"""Trip chat history: keyset paging and retention compaction.
+
+Pages are read newest first with a keyset cursor over
+``(trip_id, created_at, id)``, which ``idx_chat_messages_page`` covers, so
+scrolling back costs the same on page 100 as on page 1.
+
+Messages older than ``SCOUT_CHAT_RETENTION_DAYS`` are compacted per trip
+and day into one ``digest`` row. The digest holds a short extractive
+summary as its content and the original messages zlib-compressed in
+``transcript``, and takes the time of the last message it replaces, so it
+pages in place of them and can be expanded on demand.
+
+    python -m scout.api.chat_history --older-than-days 30
+"""
+import argparse
+import base64
+import json
+import sys
+import time
+import zlib
+
+from scout.api import models
+from scout.api.archive import tiered
+from scout.config.settings import settings
+
+DIGEST_ROLE = "digest"
+DIGEST_TOPICS = 5
+TOPIC_CHARS = 80
+
+PAGE_COLUMNS = "id, role, content, created_at, message_count"
+PAGE_ORDER = "created_at DESC, id DESC"
+
+
+def encode_cursor(created_at: str, message_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at}|{message_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(created_at, id) from a cursor returned by ``history``.
+
+    Raises:
+        ValueError: Malformed cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.rsplit("|", 1)
+        return created_at, int(message_id)
+    except (UnicodeDecodeError, ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def page_query(trip_id: int, before: str = None) -> tuple:
+    """(query, params) for ``tiered`` selecting a trip's messages before ``before``."""
+    where, params = "trip_id = ?", [trip_id]
+    if before:
+        where += " AND (created_at, id) < (?, ?)"
+        params += decode_cursor(before)
+    return f"SELECT {PAGE_COLUMNS} FROM {{chat_messages}} WHERE {where}", params
+
+
+def history(trip_id: int, before: str = None, limit: int = None, include_archived: bool = False) -> dict:
+    """One page of a trip's chat, oldest first, ending just before ``before``.
+
+    Args:
+        trip_id: Trip whose conversation to read
+        before: Cursor from a previous page; None for the latest messages
+        limit: Messages per page
+        include_archived: Also read the archive
+
+    Returns:
+        dict with messages and next_cursor (None when there is nothing older)
+    """
+    limit = limit or settings.CHAT_PAGE_SIZE
+    query, params = page_query(trip_id, before)
+    conn = models.get_db()
+    sql, all_params = tiered(conn, query, params, include_archived, PAGE_ORDER)
+    rows = [dict(row) for row in conn.execute(sql + " LIMIT ?", (*all_params, limit + 1))]
+    conn.close()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    for row in rows:
+        if row["role"] != DIGEST_ROLE:
+            del row["message_count"]
+    next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if more else None
+    return {"messages": rows[::-1], "next_cursor": next_cursor}
+
+
+def transcript(trip_id: int, digest_id: int, include_archived: bool = False):
+    """The messages a digest replaced, or None if ``digest_id`` is not one of the trip's digests."""
+    conn = models.get_db()
+    row = conn.execute(*tiered(
+        conn, "SELECT transcript FROM {chat_messages} WHERE id = ? AND trip_id = ? AND role = ?",
+        (digest_id, trip_id, DIGEST_ROLE), include_archived,
+    )).fetchone()
+    conn.close()
+    if row is None:
+        return None
+    return json.loads(zlib.decompress(row[0]))
+
+
+def summarize(messages: list) -> str:
+    """Extractive digest text: message count, time span and the first user questions."""
+    topics = []
+    for message in messages:
+        if message["role"] == "user" and len(topics) < DIGEST_TOPICS:
+            text = " ".join(message["content"].split())
+            topics.append(text if len(text) <= TOPIC_CHARS else text[:TOPIC_CHARS - 1] + "…")
+    summary = f"{len(messages)} messages, {messages[0]['created_at']} to {messages[-1]['created_at']}"
+    if topics:
+        summary += "\n" + "\n".join(f"- {topic}" for topic in topics)
+    return summary
+
+
+def compact(older_than_days: int = None, batch_size: int = 100, db: str = None) -> dict:
+    """Replace each trip's messages from days before the cutoff with digest rows.
+
+    Each batch of ``batch_size`` (trip, day) groups is read on a plain
+    connection and applied as one atomic ``write_many`` call, so the job
+    queues behind request writes on the single writer instead of taking the
+    write lock itself. A digest is only written while all the messages it
+    replaces still exist, so a crashed or concurrent run can be repeated.
+    ``db`` names the database file to compact; the current user's by default.
+
+    Returns:
+        dict with messages compacted, digests written and seconds
+    """
+    from scout.api.writer import write_many
+
+    older_than_days = settings.CHAT_RETENTION_DAYS if older_than_days is None else older_than_days
+    started = time.perf_counter()
+    messages = digests = 0
+
+    conn = models.connect(db) if db else models.get_db()
+    try:
+        while True:
+            groups = conn.execute(
+                "SELECT DISTINCT trip_id, date(created_at) FROM chat_messages "
+                "WHERE trip_id IS NOT NULL AND role != ? AND created_at < date('now', ?) LIMIT ?",
+                (DIGEST_ROLE, f"-{int(older_than_days)} days", batch_size),
+            ).fetchall()
+            if not groups:
+                break
+            statements = []
+            for trip_id, day in groups:
+                rows = [dict(row) for row in conn.execute(
+                    "SELECT id, role, content, created_at FROM chat_messages "
+                    "WHERE trip_id = ? AND role != ? AND created_at >= ? AND created_at < date(?, '+1 day') "
+                    "ORDER BY created_at, id",
+                    (trip_id, DIGEST_ROLE, day, day),
+                )]
+                body = zlib.compress(json.dumps(
+                    [{k: row[k] for k in ("role", "content", "created_at")} for row in rows]
+                ).encode("utf-8"))
+                ids = [row["id"] for row in rows]
+                id_list = ", ".join("?" for _ in ids)
+                statements += [
+                    (
+                        "INSERT INTO chat_messages (trip_id, role, content, created_at, message_count, transcript) "
+                        f"SELECT ?, ?, ?, ?, ?, ? WHERE (SELECT COUNT(*) FROM chat_messages WHERE id IN ({id_list})) = ?",
+                        (trip_id, DIGEST_ROLE, summarize(rows), rows[-1]["created_at"], len(rows), body, *ids, len(ids)),
+                    ),
+                    (f"DELETE FROM chat_messages WHERE id IN ({id_list})", ids),
+                ]
+            results = write_many(statements, db=db)
+            digests += sum(result.rowcount for result in results[::2])
+            messages += sum(result.rowcount for result in results[1::2])
+    finally:
+        conn.close()
+
+    return {"messages": messages, "digests": digests, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact old chat messages into digest rows")
+    parser.add_argument("--older-than-days", type=int, default=None,
+                        help=f"Days before messages are compacted (default {settings.CHAT_RETENTION_DAYS})")
+    parser.add_argument("--batch-size", type=int, default=100, help="Trip-days per write")
+    parser.add_argument("--user", help="Only compact this user's shard (default: every shard)")
+    args = parser.parse_args(argv)
+
+    from scout.api.shards import shard_paths
+
+    if not settings.SHARD_BY_USER:
+        models.init_db()
+    paths = [models.database_path(args.user)] if args.user else list(shard_paths().values())
+    summaries = {}
+    for path in paths:
+        summaries[path] = compact(args.older_than_days, args.batch_size, db=path)
+        print(f"{path}: {summaries[path]}")
+    return summaries
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,244 @@
+"""iCalendar (RFC 5545) feeds of itinerary items.
+
+Feeds are streamed: rows come from the cursor in batches and each item's
+``VEVENT`` block is yielded as soon as it is available. Rendered blocks are
+kept in a bounded LRU keyed on the item's modification time (and the trip
+name it mentions), so an edit re-renders just that item while everything
+else comes from memory.
+
+Calendar clients poll subscriptions every few minutes. ``feed_version``
+returns the feed's Last-Modified time and ETag from the owning trips'
+``updated_at``, which triggers bump on every item change, so an unchanged
+feed is answered with 304 without reading any items. ``updated_at`` has
+millisecond precision but HTTP dates whole seconds, so Last-Modified is
+rounded up and never sent for a second that is still running: a client
+validating by date alone cannot miss an edit made in the same second as
+its last fetch.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from scout.api import models
+from scout.api.shards import DEFAULT_USER, shard_name
+from scout.config.settings import settings
+from scout.planning.conflicts import item_interval
+
+PRODID = "-//Scout//Travel Dashboard//EN"
+FETCH_ROWS = 500
+
+ITEM_QUERY = """
+    SELECT i.id, i.trip_id, i.title, i.description, i.item_type, i.start_datetime, i.end_datetime,
+           i.location, i.lat, i.lng, i.cost, i.booking_ref, i.notes,
+           COALESCE(i.updated_at, i.created_at) AS modified, t.name AS trip_name
+    FROM itinerary_items i JOIN trips t ON i.trip_id = t.id
+"""
+
+
+def escape_text(value) -> str:
+    """Escape a TEXT property value."""
+    return (
+        str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> str:
+    """Fold a content line into CRLF-terminated pieces of at most 75 octets."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    pieces = []
+    limit = 75
+    while data:
+        cut = min(limit, len(data))
+        # Never split a UTF-8 sequence
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        pieces.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+        limit = 74  # continuation lines start with a space
+    return "\r\n ".join(pieces) + "\r\n"
+
+
+def _utc_stamp(timestamp: str) -> str:
+    """SQLite UTC timestamp (``YYYY-MM-DD HH:MM:SS[.fff]``) to iCalendar UTC form."""
+    return datetime.fromisoformat(timestamp).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_event(item: dict, uid_domain: str) -> str:
+    """One ``VEVENT`` block for an itinerary item.
+
+    Itinerary times are local to the destination, so they are written as
+    floating times that display unchanged in any time zone.
+    """
+    start, end = item_interval(item)
+    stamp = _utc_stamp(item["modified"])
+    details = [item.get("description"), item.get("notes")]
+    if item.get("cost") is not None:
+        details.append(f"Cost: {item['cost']:.2f}")
+    if item.get("booking_ref"):
+        details.append(f"Booking: {item['booking_ref']}")
+    details.append(f"Trip: {item['trip_name']}")
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:item-{item['id']}@{uid_domain}",
+        f"DTSTAMP:{stamp}",
+        f"LAST-MODIFIED:{stamp}",
+        f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}",
+        f"DTEND:{end.strftime('%Y%m%dT%H%M%S')}",
+        f"SUMMARY:{escape_text(item['title'])}",
+        f"CATEGORIES:{escape_text(item['item_type'])}",
+        f"DESCRIPTION:{escape_text(chr(10).join(d for d in details if d))}",
+    ]
+    if item.get("location"):
+        lines.append(f"LOCATION:{escape_text(item['location'])}")
+    if item.get("lat") is not None and item.get("lng") is not None:
+        lines.append(f"GEO:{item['lat']:.6f};{item['lng']:.6f}")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+
+class EventCache:
+    """LRU of rendered ``VEVENT`` blocks keyed by (database, item id)."""
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version, render):
+        with self._lock:
+            cached = self._events.get(key)
+            if cached is not None and cached[0] == version:
+                self._events.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+        text = render()
+        with self._lock:
+            self.misses += 1
+            self._events[key] = (version, text)
+            self._events.move_to_end(key)
+            while len(self._events) > self.max_items:
+                self._events.popitem(last=False)
+        return text
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+            self.hits = self.misses = 0
+
+
+EVENTS = EventCache(settings.ICS_CACHE_MAX_ITEMS)
+
+
+def _uid_domain(user_id: str) -> str:
+    # Item IDs repeat across user shards, so shards get their own UID domain
+    if settings.SHARD_BY_USER:
+        return f"{shard_name(user_id or DEFAULT_USER)}.scout"
+    return "scout"
+
+
+def feed_version(user_id: str = None, trip_id: int = None):
+    """Last-Modified datetime and ETag of a feed.
+
+    Returns:
+        (last_modified, etag), or None when ``trip_id`` does not exist
+    """
+    conn = models.get_db(user_id)
+    where, params = ("WHERE id = ?", (trip_id,)) if trip_id is not None else ("", ())
+    count, latest, name = conn.execute(
+        f"SELECT COUNT(*), MAX(updated_at), MAX(name) FROM trips {where}", params
+    ).fetchone()
+    conn.close()
+    if trip_id is not None and not count:
+        return None
+    last_modified = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    if latest:
+        modified = datetime.fromisoformat(latest).replace(tzinfo=timezone.utc)
+        # Round up to whole seconds, so any later edit moves it
+        last_modified = modified.replace(microsecond=0)
+        if modified.microsecond:
+            last_modified += timedelta(seconds=1)
+    tag = hashlib.sha1(f"{count}|{latest}|{name if trip_id else ''}".encode()).hexdigest()[:16]
+    return last_modified, f'"{tag}"'
+
+
+def last_modified_header(last_modified: datetime) -> str:
+    """``Last-Modified`` value: ``last_modified``, but no later than the current
+    whole second, so a date a client sends back cannot cover edits still to
+    come in that second."""
+    now = datetime.fromtimestamp(int(time.time()), timezone.utc)
+    return format_datetime(min(last_modified, now), usegmt=True)
+
+
+def not_modified(headers, last_modified: datetime, etag: str) -> bool:
+    """Whether a conditional GET can be answered with 304.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def stream_feed(user_id: str = None, trip_id: int = None):
+    """Yield an ``.ics`` document for one trip or for all of a user's trips."""
+    conn = models.get_db(user_id)
+    try:
+        name = None
+        if trip_id is not None:
+            row = conn.execute("SELECT name FROM trips WHERE id = ?", (trip_id,)).fetchone()
+            name = row[0] if row else "Scout trip"
+        header = [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{escape_text(name or 'Scout trips')}",
+            f"REFRESH-INTERVAL;VALUE=DURATION:PT{settings.ICS_REFRESH_MINUTES}M",
+            f"X-PUBLISHED-TTL:PT{settings.ICS_REFRESH_MINUTES}M",
+        ]
+        yield "".join(fold(line) for line in header)
+
+        query, params = ITEM_QUERY, ()
+        if trip_id is not None:
+            query, params = ITEM_QUERY + " WHERE i.trip_id = ?", (trip_id,)
+        cursor = conn.execute(query + " ORDER BY i.start_datetime", params)
+        database = models.database_path(user_id)
+        domain = _uid_domain(user_id)
+        while True:
+            rows = cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                break
+            blocks = []
+            for row in rows:
+                item = dict(row)
+                try:
+                    blocks.append(EVENTS.get(
+                        (database, item["id"]),
+                        (item["modified"], item["trip_name"]),
+                        lambda: render_event(item, domain),
+                    ))
+                except (TypeError, ValueError):
+                    # Unparseable dates: leave the item out rather than break the feed
+                    continue
+            yield "".join(blocks)
+        yield "END:VCALENDAR\r\n"
+    finally:
+        conn.close()
@@ -1,71 +1,270 @@
 """Database models for Scout dashboard."""
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 import sqlite3
 import json
 import os
+import threading
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "../../data/scout.db")
+from scout.config.settings import settings
+from scout.metrics import TimedConnection
 
+DB_PATH = os.getenv(
+    "SCOUT_DB_PATH", os.path.join(os.path.dirname(__file__), "../../data/scout.db")
+)
 
-def get_db():
-    """Get database connection."""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+# Schema migrations, applied in order; a database's ``PRAGMA user_version``
+# is the number already applied. Append new steps, never edit old ones.
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS trips (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        destination TEXT NOT NULL,
+        start_date TEXT NOT NULL,
+        end_date TEXT NOT NULL,
+        budget REAL,
+        travelers INTEGER DEFAULT 1,
+        status TEXT DEFAULT 'planning',
+        lat REAL,
+        lng REAL,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_trips_start ON trips(start_date);
+    CREATE INDEX IF NOT EXISTS idx_trips_status ON trips(status, start_date);
+
+    CREATE TABLE IF NOT EXISTS itinerary_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        trip_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        item_type TEXT NOT NULL,
+        start_datetime TEXT NOT NULL,
+        end_datetime TEXT,
+        location TEXT,
+        lat REAL,
+        lng REAL,
+        cost REAL,
+        booking_ref TEXT,
+        notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (trip_id) REFERENCES trips(id) ON DELETE CASCADE
+    );
+    CREATE INDEX IF NOT EXISTS idx_itinerary_items_start ON itinerary_items(start_datetime);
+    CREATE INDEX IF NOT EXISTS idx_itinerary_items_trip ON itinerary_items(trip_id, start_datetime);
+
+    CREATE TABLE IF NOT EXISTS chat_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        trip_id INTEGER,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (trip_id) REFERENCES trips(id) ON DELETE CASCADE
+    );
+    CREATE INDEX IF NOT EXISTS idx_chat_messages_trip ON chat_messages(trip_id);
+
+    CREATE TABLE IF NOT EXISTS calendar_sync (
+        item_id INTEGER PRIMARY KEY,
+        trip_id INTEGER NOT NULL,
+        event_id TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        synced_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_calendar_sync_trip ON calendar_sync(trip_id);
+
+    CREATE TABLE IF NOT EXISTS trace_spans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT NOT NULL,
+        span_id TEXT NOT NULL,
+        parent_id TEXT,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        started_at REAL NOT NULL,
+        duration_ms REAL NOT NULL,
+        status TEXT DEFAULT 'ok',
+        attributes TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_trace_spans_run ON trace_spans(run_id);
+    CREATE INDEX IF NOT EXISTS idx_trace_spans_started ON trace_spans(started_at);
+    """,
+    # 2: item modification times (for ICS feeds); any change to a trip's
+    # items also bumps the trip's updated_at
+    """
+    ALTER TABLE itinerary_items ADD COLUMN updated_at TEXT;
+
+    CREATE TRIGGER IF NOT EXISTS itinerary_items_updated AFTER UPDATE ON itinerary_items
+    WHEN NEW.updated_at IS OLD.updated_at
+    BEGIN
+        UPDATE itinerary_items SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.id;
+        UPDATE trips SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id IN (OLD.trip_id, NEW.trip_id);
+    END;
+    CREATE TRIGGER IF NOT EXISTS itinerary_items_inserted AFTER INSERT ON itinerary_items
+    BEGIN
+        UPDATE trips SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.trip_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS itinerary_items_deleted AFTER DELETE ON itinerary_items
+    BEGIN
+        UPDATE trips SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = OLD.trip_id;
+    END;
+    """,
+    # 3: chat history paging, and digest rows standing in for compacted
+    # conversations (role 'digest', original messages zlib-compressed)
+    """
+    ALTER TABLE chat_messages ADD COLUMN message_count INTEGER;
+    ALTER TABLE chat_messages ADD COLUMN transcript BLOB;
+    DROP INDEX IF EXISTS idx_chat_messages_trip;
+    CREATE INDEX IF NOT EXISTS idx_chat_messages_page ON chat_messages(trip_id, created_at, id);
+    """,
+    # 4: flight price watches. Trips watching the same flights share a
+    # route; history keeps a row only when the route's price changes.
+    """
+    CREATE TABLE IF NOT EXISTS price_routes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        origin TEXT NOT NULL,
+        destination TEXT NOT NULL,
+        departure_date TEXT NOT NULL,
+        return_date TEXT NOT NULL DEFAULT '',
+        adults INTEGER NOT NULL DEFAULT 1,
+        direct_only INTEGER NOT NULL DEFAULT 0,
+        last_checked_at INTEGER,
+        last_price INTEGER,
+        UNIQUE (origin, destination, departure_date, return_date, adults, direct_only)
+    );
+    CREATE INDEX IF NOT EXISTS idx_price_routes_departure ON price_routes(departure_date);
+
+    CREATE TABLE IF NOT EXISTS price_watches (
+        trip_id INTEGER PRIMARY KEY,
+        route_id INTEGER NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (trip_id) REFERENCES trips(id) ON DELETE CASCADE
+    );
+    CREATE INDEX IF NOT EXISTS idx_price_watches_route ON price_watches(route_id);
+
+    CREATE TABLE IF NOT EXISTS price_history (
+        route_id INTEGER NOT NULL,
+        checked_at INTEGER NOT NULL,
+        price INTEGER NOT NULL,
+        PRIMARY KEY (route_id, checked_at)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS price_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        route_id INTEGER NOT NULL,
+        old_price INTEGER NOT NULL,
+        new_price INTEGER NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_price_events_route ON price_events(route_id, created_at);
+    """,
+    # 5: back off routes whose searches keep failing, and move a trip's
+    # watch to the new route when its dates change
+    """
+    ALTER TABLE price_routes ADD COLUMN failures INTEGER NOT NULL DEFAULT 0;
+
+    CREATE TRIGGER IF NOT EXISTS trips_dates_price_watch AFTER UPDATE OF start_date, end_date ON trips
+    WHEN NEW.start_date IS NOT OLD.start_date OR NEW.end_date IS NOT OLD.end_date
+    BEGIN
+        INSERT OR IGNORE INTO price_routes (origin, destination, departure_date, return_date, adults, direct_only)
+        SELECT r.origin, r.destination, NEW.start_date, COALESCE(NEW.end_date, ''), r.adults, r.direct_only
+        FROM price_watches w JOIN price_routes r ON r.id = w.route_id WHERE w.trip_id = NEW.id;
+        UPDATE price_watches SET route_id = (
+            SELECT n.id FROM price_routes o JOIN price_routes n
+                ON n.origin = o.origin AND n.destination = o.destination
+                AND n.adults = o.adults AND n.direct_only = o.direct_only
+            WHERE o.id = price_watches.route_id
+                AND n.departure_date = NEW.start_date AND n.return_date = COALESCE(NEW.end_date, '')
+        ) WHERE trip_id = NEW.id;
+    END;
+    """,
+]
+
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+
+def database_path(user_id: str = None) -> str:
+    """File holding ``user_id``'s data (the current user's by default).
+
+    Without ``SCOUT_SHARD_BY_USER`` every user shares ``DB_PATH``.
+    """
+    if not settings.SHARD_BY_USER:
+        return DB_PATH
+    from scout.api.shards import current_user, shard_path
+
+    return shard_path(user_id or current_user.get())
+
+
+def _statements(script: str):
+    statement = ""
+    for part in script.split(";"):
+        statement += part + ";"
+        if sqlite3.complete_statement(statement):
+            if statement.strip(" \n;"):
+                yield statement
+            statement = ""
+
+
+def migrate(conn) -> int:
+    """Bring ``conn``'s database up to the latest schema version.
+
+    Pending steps run in one ``BEGIN IMMEDIATE`` transaction together with
+    the ``user_version`` bump, so concurrent openers of a new shard apply
+    each step exactly once.
+
+    Returns:
+        The database's schema version
+    """
+    target = len(MIGRATIONS)
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= target:
+        return target
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for script in MIGRATIONS[version:]:
+                for statement in _statements(script):
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {max(version, target)}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = isolation_level
+    return target
+
+
+def connect(path: str):
+    """Open (and on first use in this process, migrate) the database at ``path``."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, factory=TimedConnection)
     conn.row_factory = sqlite3.Row
+    if path not in _migrated:
+        with _migrate_lock:
+            migrate(conn)
+            _migrated.add(path)
     return conn
 
 
-def init_db():
+def get_db(user_id: str = None):
+    """Get database connection.
+
+    Connects to the given (or current) user's database; a new user's shard
+    is created and migrated on first use.
+    """
+    return connect(database_path(user_id))
+
+
+def init_db(user_id: str = None):
     """Initialize database tables."""
-    conn = get_db()
-    conn.executescript("""
-        CREATE TABLE IF NOT EXISTS trips (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            destination TEXT NOT NULL,
-            start_date TEXT NOT NULL,
-            end_date TEXT NOT NULL,
-            budget REAL,
-            travelers INTEGER DEFAULT 1,
-            status TEXT DEFAULT 'planning',
-            lat REAL,
-            lng REAL,
-            notes TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        CREATE TABLE IF NOT EXISTS itinerary_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            trip_id INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            description TEXT,
-            item_type TEXT NOT NULL,
-            start_datetime TEXT NOT NULL,
-            end_datetime TEXT,
-            location TEXT,
-            lat REAL,
-            lng REAL,
-            cost REAL,
-            booking_ref TEXT,
-            notes TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (trip_id) REFERENCES trips(id) ON DELETE CASCADE
-        );
-        
-        CREATE TABLE IF NOT EXISTS chat_messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            trip_id INTEGER,
-            role TEXT NOT NULL,
-            content TEXT NOT NULL,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (trip_id) REFERENCES trips(id) ON DELETE CASCADE
-        );
-    """)
-    conn.commit()
-    conn.close()
+    path = database_path(user_id)
+    _migrated.discard(path)
+    connect(path).close()
 
 
 # Pydantic models
@@ -140,13 +339,22 @@ class ItineraryItem(BaseModel):
     booking_ref: Optional[str]
     notes: Optional[str]
     created_at: str
+    updated_at: Optional[str] = None
+
+
+class ItineraryItemCreated(ItineraryItem):
+    conflicts: List[dict] = []
+
+
+class PriceWatchCreate(BaseModel):
+    origin: str  # IATA airport code
+    destination: str  # IATA airport code
+    adults: Optional[int] = None  # defaults to the trip's travelers
+    direct_only: bool = False
 
 
 class ChatMessage(BaseModel):
     role: str
     content: str
     trip_id: Optional[int] = None
-
-
-# Initialize DB on import
-init_db()
+    thread_id: Optional[str] = None
@@ -0,0 +1,251 @@
+"""Background flight price watches for trips still being planned.
+
+A trip's watch points at a route (origin, destination, dates, party,
+direct only); trips flying the same route share it. Each round the
+scheduler collects due routes from every shard, searches each distinct
+route once and writes the result back to every shard that watches it, one
+writer batch per shard. No LLM is involved.
+
+Routes are due ``SCOUT_PRICE_WATCH_INTERVAL_MINUTES`` after their last
+check and are searched soonest departure first, as far as the global
+``SCOUT_PRICE_WATCH_SEARCHES_PER_HOUR`` budget allows; the rest wait for
+the next round. A failed search counts as a check too, and every
+consecutive failure doubles the route's interval (up to ``MAX_BACKOFF``
+times), so a broken route cannot eat the budget meant for the others.
+
+A watch follows its trip's dates: a trigger moves it to the matching route
+when they change. ``price_history`` stores a row only when a route's price
+changes, and a fall of at least ``SCOUT_PRICE_DROP_MIN_PERCENT`` records a
+``price_events`` row for the dashboard.
+
+    python -m scout.api.price_watch --once
+"""
+import argparse
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scout.api.shards import fan_out, shard_paths
+from scout.api.writer import write_many
+from scout.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 300
+MAX_BACKOFF = 8
+
+ROUTE_FIELDS = ("origin", "destination", "departure_date", "return_date", "adults", "direct_only")
+
+DUE_QUERY = f"""
+    SELECT r.id, r.last_price, {", ".join(f"r.{field}" for field in ROUTE_FIELDS)}
+    FROM price_routes r
+    WHERE r.departure_date >= date('now')
+      AND (r.last_checked_at IS NULL OR r.last_checked_at <= ? - ? * min(1 << r.failures, ?))
+      AND EXISTS (
+          SELECT 1 FROM price_watches w JOIN trips t ON t.id = w.trip_id
+          WHERE w.route_id = r.id AND t.status = 'planning'
+      )
+"""
+
+
+class RateBudget:
+    """Token bucket allowing ``per_hour`` searches, in bursts of up to ``per_hour``."""
+
+    def __init__(self, per_hour: int):
+        self.capacity = float(per_hour)
+        self.tokens = float(per_hour)
+        self._rate = per_hour / 3600.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        """Spend one search if the budget allows it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+BUDGET = RateBudget(settings.PRICE_WATCH_SEARCHES_PER_HOUR)
+
+
+def search_route(args: dict) -> dict:
+    """Run the flight search tool, sharing the result with agent runs."""
+    from scout.agent.tool_cache import canonical_args, is_cacheable, shared_cache, tool_call_key
+    from scout.tools.flights import search_flights
+
+    result = search_flights.invoke(args)
+    if is_cacheable("search_flights", result):
+        shared_cache.put(tool_call_key("search_flights", canonical_args(search_flights, args)), result)
+    return result
+
+
+def due_routes(now: int = None) -> list:
+    """Distinct due routes across all shards, soonest departure first.
+
+    Returns:
+        List of (route, watchers) with route a dict of ``ROUTE_FIELDS`` and
+        watchers a list of (database path, route id, last price)
+    """
+    now = int(time.time()) if now is None else now
+    paths = shard_paths()
+    routes = {}
+    params = (now, settings.PRICE_WATCH_INTERVAL_MINUTES * 60, MAX_BACKOFF)
+    for shard, rows in fan_out(DUE_QUERY, params).items():
+        if shard not in paths:
+            continue
+        for route_id, last_price, *key in rows:
+            routes.setdefault(tuple(key), []).append((paths[shard], route_id, last_price))
+    ordered = sorted(routes.items(), key=lambda entry: (entry[0][2], entry[0]))
+    return [(dict(zip(ROUTE_FIELDS, key)), watchers) for key, watchers in ordered]
+
+
+def _cheapest(result: dict):
+    prices = [flight["price"] for flight in result.get("flights", []) if flight.get("price") is not None]
+    return min(prices) if prices else None
+
+
+def run_once(search=None, budget: RateBudget = None, now: int = None) -> dict:
+    """Search every due route the budget allows and record the prices.
+
+    Args:
+        search: Callable taking ``search_flights`` arguments; the flight tool by default
+        budget: Rate budget to spend; the process-wide one by default
+
+    Returns:
+        dict with routes due, searched, deferred (over budget), failed and price drops
+    """
+    search = search or search_route
+    budget = budget or BUDGET
+    now = int(time.time()) if now is None else now
+    due = due_routes(now)
+    selected = []
+    for route, watchers in due:
+        if not budget.take():
+            break
+        selected.append((route, watchers))
+
+    def run(route):
+        args = {**route, "return_date": route["return_date"] or None, "direct_only": bool(route["direct_only"])}
+        try:
+            result = search(args)
+        except Exception:
+            logger.exception("Price watch search failed for %s-%s", route["origin"], route["destination"])
+            return None
+        if "error" in result:
+            logger.warning("Price watch search failed: %s", result["error"])
+            return None
+        return _cheapest(result)
+
+    prices = []
+    if selected:
+        with ThreadPoolExecutor(max_workers=max(1, min(settings.PRICE_WATCH_WORKERS, len(selected)))) as pool:
+            prices = list(pool.map(run, [route for route, _ in selected]))
+
+    statements = {}
+    failed = drops = 0
+    threshold = 1 - settings.PRICE_DROP_MIN_PERCENT / 100
+    for (route, watchers), price in zip(selected, prices):
+        if price is None:
+            failed += 1
+            for path, route_id, _ in watchers:
+                statements.setdefault(path, []).append((
+                    "UPDATE price_routes SET last_checked_at = ?, failures = failures + 1 WHERE id = ?", (now, route_id)
+                ))
+            continue
+        for path, route_id, last_price in watchers:
+            batch = statements.setdefault(path, [])
+            batch.append((
+                "UPDATE price_routes SET last_checked_at = ?, last_price = ?, failures = 0 WHERE id = ?",
+                (now, price, route_id),
+            ))
+            if price != last_price:
+                batch.append((
+                    "INSERT OR REPLACE INTO price_history (route_id, checked_at, price) VALUES (?, ?, ?)",
+                    (route_id, now, price),
+                ))
+            if last_price is not None and price <= last_price * threshold:
+                batch.append((
+                    "INSERT INTO price_events (route_id, old_price, new_price) VALUES (?, ?, ?)",
+                    (route_id, last_price, price),
+                ))
+                drops += 1
+    for path, batch in statements.items():
+        write_many(batch, db=path)
+
+    return {
+        "due": len(due),
+        "searched": len(selected),
+        "deferred": len(due) - len(selected),
+        "failed": failed,
+        "drops": drops,
+    }
+
+
+class Scheduler:
+    """Daemon thread calling ``run_once`` every ``poll_seconds``."""
+
+    def __init__(self, poll_seconds: float = POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="scout-price-watch", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                summary = run_once()
+                if summary["due"]:
+                    logger.info("Price watch round: %s", summary)
+            except Exception:
+                logger.exception("Price watch round failed")
+            self._stop.wait(self.poll_seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-search flight prices for watched trips")
+    parser.add_argument("--once", action="store_true", help="Run one round and exit")
+    parser.add_argument("--poll-seconds", type=float, default=POLL_SECONDS, help="Seconds between rounds")
+    args = parser.parse_args(argv)
+
+    from scout.api import models
+    from scout.api.writer import close_writer
+
+    logging.basicConfig(level=logging.INFO)
+    if not settings.SHARD_BY_USER:
+        models.init_db()
+    try:
+        if args.once:
+            summary = run_once()
+            print(summary)
+            return summary
+        scheduler = Scheduler(args.poll_seconds)
+        scheduler.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            scheduler.stop()
+    finally:
+        close_writer()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
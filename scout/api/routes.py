@@ -1,51 +1,80 @@
 """API routes for Scout dashboard."""
-from fastapi import APIRouter, HTTPException
+import json
+import time
+import uuid
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from typing import List, Optional
 from .models import (
     get_db, Trip, TripCreate, TripUpdate,
-    ItineraryItem, ItineraryItemCreate, ChatMessage
+    ItineraryItem, ItineraryItemCreate, ItineraryItemCreated, ChatMessage, PriceWatchCreate
 )
+from .archive import tiered
+from .shards import current_user, fan_out, merge_sorted
+from .serialization import JSONBytes, row_json, rows_json, select_list
+from .price_watch import ROUTE_FIELDS
+from .writer import write, write_many
+from scout.planning.conflicts import check_new_item, conflicts_for_trip
 
 router = APIRouter()
 
+TRIP_COLUMNS = select_list(Trip)
+ITEM_COLUMNS = select_list(ItineraryItem)
+
+# Hot queries, shared with the query plan checks in benchmarks.api_bench
+TRIPS_QUERY = f"SELECT {TRIP_COLUMNS} FROM {{trips}}"
+TRIPS_BY_STATUS = " WHERE status = ?"
+TRIPS_ORDER = "start_date DESC"
+ITINERARY_QUERY = f"SELECT {ITEM_COLUMNS} FROM {{itinerary_items}} WHERE trip_id = ?"
+ITINERARY_ORDER = "start_datetime"
+CALENDAR_QUERY = """
+    SELECT i.id, i.title, i.start_datetime, i.end_datetime, i.item_type, i.trip_id,
+           t.name, t.destination, i.location, i.cost, i.notes
+    FROM {itinerary_items} i
+    JOIN {trips} t ON i.trip_id = t.id
+"""
+CALENDAR_RANGE = " WHERE i.start_datetime >= ? AND i.start_datetime <= ?"
+CALENDAR_ORDER = "start_datetime"
+UPCOMING_TRIPS_QUERY = "SELECT COUNT(*) FROM trips WHERE start_date >= date('now') AND status != 'completed'"
+
 
 # Trip endpoints
 @router.get("/trips", response_model=List[Trip])
-def get_trips(status: Optional[str] = None):
+def get_trips(status: Optional[str] = None, include_archived: bool = False):
     """Get all trips, optionally filtered by status."""
     conn = get_db()
     if status:
-        rows = conn.execute(
-            "SELECT * FROM trips WHERE status = ? ORDER BY start_date DESC", (status,)
-        ).fetchall()
+        query, params = TRIPS_QUERY + TRIPS_BY_STATUS, (status,)
     else:
-        rows = conn.execute("SELECT * FROM trips ORDER BY start_date DESC").fetchall()
+        query, params = TRIPS_QUERY, ()
+    body = rows_json(conn.execute(*tiered(conn, query, params, include_archived, TRIPS_ORDER)))
     conn.close()
-    return [dict(row) for row in rows]
+    return JSONBytes(body)
 
 
 @router.get("/trips/{trip_id}", response_model=Trip)
-def get_trip(trip_id: int):
+def get_trip(trip_id: int, include_archived: bool = False):
     """Get a single trip by ID."""
     conn = get_db()
-    row = conn.execute("SELECT * FROM trips WHERE id = ?", (trip_id,)).fetchone()
+    body = row_json(conn.execute(*tiered(
+        conn, f"SELECT {TRIP_COLUMNS} FROM {{trips}} WHERE id = ?", (trip_id,), include_archived
+    )))
     conn.close()
-    if not row:
+    if body is None:
         raise HTTPException(status_code=404, detail="Trip not found")
-    return dict(row)
+    return JSONBytes(body)
 
 
 @router.post("/trips", response_model=Trip)
 def create_trip(trip: TripCreate):
     """Create a new trip."""
-    conn = get_db()
-    cursor = conn.execute("""
+    result = write("""
         INSERT INTO trips (name, destination, start_date, end_date, budget, travelers, lat, lng, notes)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (trip.name, trip.destination, trip.start_date, trip.end_date, 
           trip.budget, trip.travelers, trip.lat, trip.lng, trip.notes))
-    conn.commit()
-    row = conn.execute("SELECT * FROM trips WHERE id = ?", (cursor.lastrowid,)).fetchone()
+    conn = get_db()
+    row = conn.execute("SELECT * FROM trips WHERE id = ?", (result.lastrowid,)).fetchone()
     conn.close()
     return dict(row)
 
@@ -63,8 +92,7 @@ def update_trip(trip_id: int, trip: TripUpdate):
     if updates:
         set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
         values = list(updates.values()) + [trip_id]
-        conn.execute(f"UPDATE trips SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = ?", values)
-        conn.commit()
+        write(f"UPDATE trips SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = ?", values)
     
     row = conn.execute("SELECT * FROM trips WHERE id = ?", (trip_id,)).fetchone()
     conn.close()
@@ -74,31 +102,35 @@ def update_trip(trip_id: int, trip: TripUpdate):
 @router.delete("/trips/{trip_id}")
 def delete_trip(trip_id: int):
     """Delete a trip."""
-    conn = get_db()
-    conn.execute("DELETE FROM trips WHERE id = ?", (trip_id,))
-    conn.commit()
-    conn.close()
+    write("DELETE FROM trips WHERE id = ?", (trip_id,))
     return {"status": "deleted"}
 
 
 # Itinerary endpoints
 @router.get("/trips/{trip_id}/itinerary", response_model=List[ItineraryItem])
-def get_itinerary(trip_id: int):
+def get_itinerary(trip_id: int, include_archived: bool = False):
     """Get all itinerary items for a trip."""
     conn = get_db()
-    rows = conn.execute(
-        "SELECT * FROM itinerary_items WHERE trip_id = ? ORDER BY start_datetime",
-        (trip_id,)
-    ).fetchall()
+    body = rows_json(conn.execute(*tiered(conn, ITINERARY_QUERY, (trip_id,), include_archived, ITINERARY_ORDER)))
     conn.close()
-    return [dict(row) for row in rows]
+    return JSONBytes(body)
+
 
+@router.get("/trips/{trip_id}/conflicts")
+def get_trip_conflicts(trip_id: int):
+    """Overlapping items within the trip, with other trips' items, and overlapping trips."""
+    conn = get_db()
+    result = conflicts_for_trip(conn, trip_id)
+    conn.close()
+    if result is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    return result
 
-@router.post("/itinerary", response_model=ItineraryItem)
+
+@router.post("/itinerary", response_model=ItineraryItemCreated)
 def create_itinerary_item(item: ItineraryItemCreate):
     """Create a new itinerary item."""
-    conn = get_db()
-    cursor = conn.execute("""
+    result = write("""
         INSERT INTO itinerary_items 
         (trip_id, title, description, item_type, start_datetime, end_datetime, 
          location, lat, lng, cost, booking_ref, notes)
@@ -106,45 +138,48 @@ def create_itinerary_item(item: ItineraryItemCreate):
     """, (item.trip_id, item.title, item.description, item.item_type,
           item.start_datetime, item.end_datetime, item.location,
           item.lat, item.lng, item.cost, item.booking_ref, item.notes))
-    conn.commit()
-    row = conn.execute("SELECT * FROM itinerary_items WHERE id = ?", (cursor.lastrowid,)).fetchone()
+    conn = get_db()
+    row = dict(conn.execute("SELECT * FROM itinerary_items WHERE id = ?", (result.lastrowid,)).fetchone())
+    row["conflicts"] = check_new_item(conn, row)
     conn.close()
-    return dict(row)
+    return row
 
 
 @router.delete("/itinerary/{item_id}")
 def delete_itinerary_item(item_id: int):
     """Delete an itinerary item."""
-    conn = get_db()
-    conn.execute("DELETE FROM itinerary_items WHERE id = ?", (item_id,))
-    conn.commit()
-    conn.close()
+    write("DELETE FROM itinerary_items WHERE id = ?", (item_id,))
     return {"status": "deleted"}
 
 
+@router.post("/trips/{trip_id}/optimize")
+def optimize_trip_route(trip_id: int, apply: bool = False):
+    """Reorder each day's flexible items to shorten travel between stops."""
+    from scout.planning.optimizer import optimize_trip
+
+    result = optimize_trip(trip_id, apply=apply)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    return result
+
+
 # Calendar endpoint - returns all items formatted for calendar
 @router.get("/calendar")
-def get_calendar_events(start: Optional[str] = None, end: Optional[str] = None):
+def get_calendar_events(start: Optional[str] = None, end: Optional[str] = None, include_archived: bool = False):
     """Get all events for calendar view."""
     conn = get_db()
     
-    query = """
-        SELECT i.*, t.name as trip_name, t.destination 
-        FROM itinerary_items i
-        JOIN trips t ON i.trip_id = t.id
-    """
+    query = CALENDAR_QUERY
     params = []
     
     if start and end:
-        query += " WHERE i.start_datetime >= ? AND i.start_datetime <= ?"
+        query += CALENDAR_RANGE
         params = [start, end]
     
-    query += " ORDER BY i.start_datetime"
-    rows = conn.execute(query, params).fetchall()
-    conn.close()
+    cursor = conn.execute(*tiered(conn, query, params, include_archived, CALENDAR_ORDER))
+    cursor.row_factory = None
     
     # Format for FullCalendar
-    events = []
     colors = {
         'flight': '#3b82f6',
         'hotel': '#8b5cf6',
@@ -153,25 +188,154 @@ def get_calendar_events(start: Optional[str] = None, end: Optional[str] = None):
         'transport': '#6366f1'
     }
     
-    for row in rows:
-        events.append({
-            'id': row['id'],
-            'title': row['title'],
-            'start': row['start_datetime'],
-            'end': row['end_datetime'] or row['start_datetime'],
-            'color': colors.get(row['item_type'], '#6b7280'),
+    events = [
+        {
+            'id': item_id,
+            'title': title,
+            'start': start_at,
+            'end': end_at or start_at,
+            'color': colors.get(item_type, '#6b7280'),
             'extendedProps': {
-                'trip_id': row['trip_id'],
-                'trip_name': row['trip_name'],
-                'destination': row['destination'],
-                'item_type': row['item_type'],
-                'location': row['location'],
-                'cost': row['cost'],
-                'notes': row['notes']
+                'trip_id': trip_id,
+                'trip_name': trip_name,
+                'destination': destination,
+                'item_type': item_type,
+                'location': location,
+                'cost': cost,
+                'notes': notes
             }
-        })
+        }
+        for item_id, title, start_at, end_at, item_type, trip_id, trip_name, destination, location, cost, notes
+        in cursor
+    ]
+    conn.close()
     
-    return events
+    return JSONBytes(events)
+
+
+def _ics_feed(request: Request, user_id: str, trip_id: Optional[int] = None):
+    from .ics import feed_version, last_modified_header, not_modified, stream_feed
+
+    version = feed_version(user_id, trip_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    last_modified, etag = version
+    headers = {
+        "Last-Modified": last_modified_header(last_modified),
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+    }
+    if not_modified(request.headers, last_modified, etag):
+        return Response(status_code=304, headers=headers)
+    return StreamingResponse(
+        stream_feed(user_id, trip_id), media_type="text/calendar; charset=utf-8", headers=headers
+    )
+
+
+@router.get("/trips/{trip_id}/calendar.ics")
+def get_trip_ics(trip_id: int, request: Request, user: Optional[str] = None):
+    """Subscribable iCalendar feed of one trip's itinerary."""
+    return _ics_feed(request, user or current_user.get(), trip_id)
+
+
+@router.get("/users/{user_id}/calendar.ics")
+def get_user_ics(user_id: str, request: Request):
+    """Subscribable iCalendar feed of all of a user's trips."""
+    return _ics_feed(request, user_id)
+
+
+@router.post("/trips/{trip_id}/calendar/sync")
+def sync_trip_calendar(trip_id: int):
+    """Push the trip's itinerary to Google Calendar, sending only changes."""
+    from scout.calendar_sync import CalendarAuthError, sync_trip
+
+    try:
+        return sync_trip(trip_id)
+    except CalendarAuthError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except ImportError:
+        raise HTTPException(status_code=503, detail="Google Calendar libraries not installed")
+
+
+@router.post("/archive")
+def run_archive(older_than_days: Optional[int] = None, limit: Optional[int] = None):
+    """Move finished trips that ended long enough ago into the archive database."""
+    from .archive import archive_trips
+
+    return archive_trips(older_than_days=older_than_days, limit=limit)
+
+
+# Flight price watches
+@router.put("/trips/{trip_id}/price-watch")
+def watch_prices(trip_id: int, watch: PriceWatchCreate):
+    """Watch flight prices for a trip's dates; replaces any existing watch."""
+    conn = get_db()
+    trip = conn.execute("SELECT start_date, end_date, travelers FROM trips WHERE id = ?", (trip_id,)).fetchone()
+    conn.close()
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    route = (
+        watch.origin.upper(), watch.destination.upper(), trip["start_date"], trip["end_date"] or "",
+        watch.adults or trip["travelers"] or 1, int(watch.direct_only),
+    )
+    match = " AND ".join(f"{field} = ?" for field in ROUTE_FIELDS)
+    write_many([
+        (f"INSERT OR IGNORE INTO price_routes ({', '.join(ROUTE_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)", route),
+        (f"INSERT OR REPLACE INTO price_watches (trip_id, route_id) SELECT ?, id FROM price_routes WHERE {match}",
+         (trip_id, *route)),
+    ])
+    return get_price_watch(trip_id)
+
+
+@router.get("/trips/{trip_id}/price-watch")
+def get_price_watch(trip_id: int):
+    """A trip's watched route with its price history and drops."""
+    conn = get_db()
+    route = conn.execute("""
+        SELECT r.* FROM price_watches w JOIN price_routes r ON r.id = w.route_id WHERE w.trip_id = ?
+    """, (trip_id,)).fetchone()
+    if not route:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Price watch not found")
+    history = conn.execute(
+        "SELECT checked_at, price FROM price_history WHERE route_id = ? ORDER BY checked_at", (route["id"],)
+    ).fetchall()
+    events = conn.execute("""
+        SELECT old_price, new_price, created_at FROM price_events
+        WHERE route_id = ? ORDER BY created_at DESC, id DESC
+    """, (route["id"],)).fetchall()
+    conn.close()
+    route = {**dict(route), "direct_only": bool(route["direct_only"]), "return_date": route["return_date"] or None}
+    return {
+        "trip_id": trip_id,
+        "route": route,
+        "history": [dict(row) for row in history],
+        "drops": [dict(row) for row in events],
+    }
+
+
+@router.delete("/trips/{trip_id}/price-watch")
+def delete_price_watch(trip_id: int):
+    """Stop watching a trip's flight prices."""
+    write("DELETE FROM price_watches WHERE trip_id = ?", (trip_id,))
+    return {"status": "deleted"}
+
+
+@router.get("/price-drops")
+def get_price_drops(limit: int = 50):
+    """Recent price drops on watched trips, newest first."""
+    conn = get_db()
+    body = rows_json(conn.execute("""
+        SELECT e.id, w.trip_id, t.name AS trip_name, r.origin, r.destination, r.departure_date,
+               e.old_price, e.new_price, e.created_at
+        FROM price_events e
+        JOIN price_watches w ON w.route_id = e.route_id
+        JOIN trips t ON t.id = w.trip_id
+        JOIN price_routes r ON r.id = e.route_id
+        ORDER BY e.created_at DESC, e.id DESC LIMIT ?
+    """, (limit,)))
+    conn.close()
+    return JSONBytes(body)
 
 
 # Chat endpoint
@@ -179,24 +343,94 @@ def get_calendar_events(start: Optional[str] = None, end: Optional[str] = None):
 async def chat(message: ChatMessage):
     """Chat with Scout AI agent."""
     from main import run_scout
-    
-    response = run_scout(message.content)
+
+    # Conversations about a trip share one thread so follow-ups resume it
+    thread_id = message.thread_id
+    if not thread_id:
+        thread_id = f"trip-{message.trip_id}" if message.trip_id else uuid.uuid4().hex
+
+    run_id = uuid.uuid4().hex
+    response = run_scout(message.content, user_id=current_user.get(), thread_id=thread_id, run_id=run_id)
     
     # Store messages if trip_id provided
     if message.trip_id:
-        conn = get_db()
-        conn.execute(
-            "INSERT INTO chat_messages (trip_id, role, content) VALUES (?, ?, ?)",
-            (message.trip_id, "user", message.content)
+        write(
+            "INSERT INTO chat_messages (trip_id, role, content) VALUES (?, 'user', ?), (?, 'assistant', ?)",
+            (message.trip_id, message.content, message.trip_id, response),
         )
-        conn.execute(
-            "INSERT INTO chat_messages (trip_id, role, content) VALUES (?, ?, ?)",
-            (message.trip_id, "assistant", response)
-        )
-        conn.commit()
-        conn.close()
     
-    return {"response": response}
+    return {"response": response, "thread_id": thread_id, "run_id": run_id}
+
+
+@router.get("/trips/{trip_id}/chat")
+def get_chat_history(
+    trip_id: int, before: Optional[str] = None, limit: Optional[int] = None, include_archived: bool = False
+):
+    """Page back through a trip's conversation; pass next_cursor as before for older messages."""
+    from .chat_history import history
+
+    try:
+        page = history(trip_id, before, limit, include_archived)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not page["messages"] and before is None:
+        conn = get_db()
+        exists = conn.execute(*tiered(
+            conn, "SELECT 1 FROM {trips} WHERE id = ?", (trip_id,), include_archived
+        )).fetchone()
+        conn.close()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Trip not found")
+    return JSONBytes(page)
+
+
+@router.get("/trips/{trip_id}/chat/{digest_id}/transcript")
+def get_chat_transcript(trip_id: int, digest_id: int, include_archived: bool = False):
+    """The original messages behind a digest row."""
+    from .chat_history import transcript
+
+    messages = transcript(trip_id, digest_id, include_archived)
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Digest not found")
+    return JSONBytes(messages)
+
+
+# Run tracing endpoints
+@router.get("/runs/report")
+def get_runs_report(hours: float = 24):
+    """Get p50/p95 latency per stage over recent runs."""
+    from scout.tracing import stage_report
+
+    conn = get_db()
+    rows = conn.execute(
+        "SELECT kind, name, duration_ms FROM trace_spans WHERE started_at >= ?",
+        (time.time() - hours * 3600,)
+    ).fetchall()
+    runs = conn.execute(
+        "SELECT COUNT(DISTINCT run_id) FROM trace_spans WHERE started_at >= ?",
+        (time.time() - hours * 3600,)
+    ).fetchone()[0]
+    conn.close()
+    return {"runs": runs, "hours": hours, "stages": stage_report(tuple(row) for row in rows)}
+
+
+@router.get("/runs/{run_id}/trace")
+def get_run_trace(run_id: str):
+    """Get all spans recorded for an agent run."""
+    conn = get_db()
+    rows = conn.execute(
+        "SELECT * FROM trace_spans WHERE run_id = ? ORDER BY started_at, id", (run_id,)
+    ).fetchall()
+    conn.close()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Run not found")
+    spans = []
+    for row in rows:
+        span = dict(row)
+        span.pop("id")
+        span["attributes"] = json.loads(span["attributes"] or "{}")
+        spans.append(span)
+    return {"run_id": run_id, "spans": spans}
 
 
 # Stats endpoint
@@ -206,9 +440,7 @@ def get_stats():
     conn = get_db()
     
     total_trips = conn.execute("SELECT COUNT(*) FROM trips").fetchone()[0]
-    upcoming_trips = conn.execute(
-        "SELECT COUNT(*) FROM trips WHERE start_date >= date('now') AND status != 'completed'"
-    ).fetchone()[0]
+    upcoming_trips = conn.execute(UPCOMING_TRIPS_QUERY).fetchone()[0]
     total_budget = conn.execute(
         "SELECT COALESCE(SUM(budget), 0) FROM trips WHERE status != 'cancelled'"
     ).fetchone()[0]
@@ -222,3 +454,65 @@ def get_stats():
         "total_budget": total_budget,
         "total_items": total_items
     }
+
+
+# Spending analytics
+@router.get("/analytics")
+def get_analytics(
+    start: Optional[str] = None, end: Optional[str] = None, include_archived: bool = False, limit: int = 50
+):
+    """Spend by month, destination, item type and party size, and budget vs actual per trip."""
+    from .analytics import spending_report
+
+    return JSONBytes(spending_report(start, end, include_archived, limit))
+
+
+@router.get("/analytics/export")
+def export_analytics(table: str = "itinerary_items", format: str = "parquet", include_archived: bool = False):
+    """Stream a table as Parquet or an Arrow IPC stream."""
+    from .analytics import FORMATS, TABLES, export_stream
+
+    if table not in TABLES or format not in FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"table must be one of {', '.join(TABLES)}; format one of {', '.join(FORMATS)}"
+        )
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=503, detail="pyarrow not installed")
+    media_type, extension = FORMATS[format]
+    return StreamingResponse(
+        export_stream(table, format, include_archived),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'},
+    )
+
+
+# Admin endpoints spanning every user's shard
+@router.get("/admin/stats")
+def get_admin_stats():
+    """Dashboard statistics summed over all shards."""
+    results = fan_out("""
+        SELECT
+            (SELECT COUNT(*) FROM trips),
+            (SELECT COUNT(*) FROM trips WHERE start_date >= date('now') AND status != 'completed'),
+            (SELECT COALESCE(SUM(budget), 0) FROM trips WHERE status != 'cancelled'),
+            (SELECT COUNT(*) FROM itinerary_items)
+    """)
+    totals = [sum(column) for column in zip(*(rows[0] for rows in results.values()))] or [0, 0, 0, 0]
+    return {
+        "shards": len(results),
+        "total_trips": totals[0],
+        "upcoming_trips": totals[1],
+        "total_budget": totals[2],
+        "total_items": totals[3],
+    }
+
+
+@router.get("/admin/trips")
+def get_admin_trips(limit: int = 100):
+    """Most recent trips across all shards, each tagged with its shard."""
+    results = fan_out(f"SELECT {TRIP_COLUMNS} FROM trips ORDER BY start_date DESC LIMIT ?", (limit,))
+    fields = list(Trip.model_fields)
+    merged = merge_sorted(results, key=lambda row: row[fields.index("start_date")], reverse=True, limit=limit)
+    return JSONBytes([{"shard": shard, **dict(zip(fields, row))} for shard, row in merged])
@@ -0,0 +1,61 @@
+"""Fast JSON responses for database rows.
+
+List endpoints used to turn every ``sqlite3.Row`` into a dict, let FastAPI
+validate each dict against the response model and encode the result with the
+standard ``json`` module. Rows read from our own tables already have the
+model's shape (queries select exactly the model's fields via
+``select_list``), so ``rows_json`` skips that: it reads plain tuples, zips them
+with the column names and encodes them with orjson in one call. Routes keep
+their ``response_model`` for the OpenAPI schema and return ``JSONBytes``,
+which FastAPI passes through untouched.
+
+orjson is optional; without it the standard encoder is used.
+"""
+import json
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+def dumps(value) -> bytes:
+    """Encode ``value`` as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+
+class JSONBytes(Response):
+    """JSON response whose body is already encoded (or is encoded with ``dumps``)."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+def select_list(model) -> str:
+    """Column list matching a response model's fields, for ``SELECT``."""
+    return ", ".join(model.model_fields)
+
+
+def _columns(cursor) -> list:
+    # Rows come back as tuples rather than through the connection's row factory
+    cursor.row_factory = None
+    return [column[0] for column in cursor.description]
+
+
+def rows_json(cursor) -> bytes:
+    """Encode every remaining row of ``cursor`` as a JSON array of objects."""
+    columns = _columns(cursor)
+    return dumps([dict(zip(columns, row)) for row in cursor])
+
+
+def row_json(cursor):
+    """Encode the next row of ``cursor`` as a JSON object, or None if there is none."""
+    columns = _columns(cursor)
+    row = cursor.fetchone()
+    return None if row is None else dumps(dict(zip(columns, row)))
@@ -0,0 +1,113 @@
+"""Per-user database shards.
+
+With ``SCOUT_SHARD_BY_USER`` set, each user's trips, itinerary and chat
+history live in their own SQLite file under ``SCOUT_SHARD_DIR``, so tenants
+no longer queue on one database lock and every shard keeps its own small
+indexes. Each shard has its own group-committing writer; at most
+``SCOUT_SHARD_MAX_OPEN`` of them stay open, least recently used first out.
+
+The user is carried in a context variable: ``ShardMiddleware`` sets it from
+the ``X-Scout-User`` header for API requests and ``using_user()`` sets it for
+agent runs, so ``get_db()`` and ``write()`` pick the right file without
+threading the user through every call. Admin views that span users use
+``fan_out()`` to query every shard and ``merge_sorted()`` to combine them.
+"""
+import contextvars
+import glob
+import hashlib
+import heapq
+import itertools
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from starlette.datastructures import Headers
+
+from scout.config.settings import settings
+
+DEFAULT_USER = "default"
+USER_HEADER = "x-scout-user"
+
+current_user = contextvars.ContextVar("scout_user", default=DEFAULT_USER)
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def shard_name(user_id: str) -> str:
+    """File-safe, collision-free shard name: a readable slug plus a hash."""
+    slug = _UNSAFE.sub("_", user_id).strip("._")[:40] or "user"
+    return f"{slug}-{hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:8]}"
+
+
+def shard_path(user_id: str) -> str:
+    return os.path.join(settings.SHARD_DIR, f"{shard_name(user_id)}.db")
+
+
+@contextmanager
+def using_user(user_id: str):
+    """Route database access in this context to ``user_id``'s shard."""
+    token = current_user.set(user_id or DEFAULT_USER)
+    try:
+        yield
+    finally:
+        current_user.reset(token)
+
+
+def shard_paths() -> dict:
+    """Every existing shard, name -> path; the single database when not sharding."""
+    from scout.api import models
+
+    if not settings.SHARD_BY_USER:
+        return {"main": models.DB_PATH}
+    paths = sorted(glob.glob(os.path.join(settings.SHARD_DIR, "*.db")))
+    return {
+        os.path.splitext(os.path.basename(path))[0]: path
+        for path in paths if not path.endswith("-archive.db")
+    }
+
+
+def fan_out(query: str, params=(), workers: int = 8) -> dict:
+    """Run a read query on every shard concurrently.
+
+    Returns:
+        Shard name -> list of row tuples
+    """
+    from scout.api import models
+
+    def run(path):
+        conn = models.connect(path)
+        try:
+            return [tuple(row) for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    paths = shard_paths()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        return dict(zip(paths, pool.map(run, paths.values())))
+
+
+def merge_sorted(results: dict, key, reverse: bool = False, limit: int = None) -> list:
+    """Merge per-shard rows, each list already sorted by ``key``.
+
+    Returns:
+        (shard, row) pairs in overall ``key`` order, at most ``limit`` of them
+    """
+    streams = [[(shard, row) for row in rows] for shard, rows in results.items()]
+    merged = heapq.merge(*streams, key=lambda pair: key(pair[1]), reverse=reverse)
+    return list(itertools.islice(merged, limit))
+
+
+class ShardMiddleware:
+    """ASGI middleware that serves each request as the ``X-Scout-User`` user."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        user_id = Headers(scope=scope).get(USER_HEADER, "").strip() or DEFAULT_USER
+        with using_user(user_id):
+            await self.app(scope, receive, send)
@@ -0,0 +1,415 @@
+"""Single-writer path for the dashboard database.
+
+SQLite allows one writer at a time; with several uvicorn workers, the agent's
+tools and the trace sink all committing on their own connections, writers
+queue on the database lock and eventually fail with ``database is locked``,
+and every row pays for its own commit. Instead, all mutations go through one
+``Writer``: a thread that drains its queue for up to ``SCOUT_WRITER_WINDOW_MS``
+(or ``SCOUT_WRITER_MAX_BATCH`` writes), applies the batch in one transaction
+and resolves each caller's future with its row ID.
+
+Each write is a list of statements applied atomically under its own
+savepoint, so a failing write is rolled back and reported to its caller
+without affecting the rest of the batch.
+
+For multi-process deployments, run the writer as its own process::
+
+    python -m scout.api.writer --socket /tmp/scout-writer.sock
+
+and set ``SCOUT_WRITER_SOCKET`` so every worker sends its writes there.
+
+With per-user shards (``scout.api.shards``) each shard file gets its own
+writer from a ``WriterPool``, which keeps the most recently used ones open.
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import NamedTuple
+
+from scout.config.settings import settings
+from scout.metrics import TimedConnection
+
+
+class WriteResult(NamedTuple):
+    lastrowid: int
+    rowcount: int
+
+
+class WriterClosed(RuntimeError):
+    """The writer was closed (e.g. evicted from its pool) before the write was queued."""
+
+
+_STOP = object()
+
+# Batches committed per database file in this process, for readers that cache
+_generations = {}
+
+
+def generation(path: str) -> int:
+    """Number of batches this process's writers have committed to ``path``."""
+    return _generations.get(path, 0)
+
+
+def connect_writer(path: str) -> sqlite3.Connection:
+    """Open the writer connection: WAL, relaxed fsync, explicit transactions,
+    schema up to date."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, factory=TimedConnection)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={settings.WRITER_BUSY_TIMEOUT_MS}")
+    # A new shard may be written before anything has read it
+    from scout.api.models import migrate
+
+    migrate(conn)
+    return conn
+
+
+class Writer:
+    """Background thread that group-commits queued writes.
+
+    Args:
+        path: Database file
+        window_ms: How long to keep collecting writes after the first one
+        max_batch: Most writes committed in one transaction
+    """
+
+    def __init__(self, path: str, window_ms: float = None, max_batch: int = None):
+        self.path = path
+        self.window = (settings.WRITER_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_batch = max_batch or settings.WRITER_MAX_BATCH
+        self.stats = {"writes": 0, "batches": 0, "errors": 0}
+        self._closed = False
+        self._state_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._conn = connect_writer(path)
+        self._thread = threading.Thread(target=self._run, name="scout-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, statements: list) -> Future:
+        """Queue a write of ``[(sql, params), ...]``.
+
+        Returns:
+            Future resolving to one WriteResult per statement
+        """
+        future = Future()
+        with self._state_lock:
+            if self._closed:
+                raise WriterClosed(self.path)
+            self._queue.put((list(statements), future))
+        return future
+
+    def execute(self, sql: str, params=()) -> WriteResult:
+        """Write one statement and wait until it is committed."""
+        return self.submit([(sql, params)]).result()[0]
+
+    def close(self) -> None:
+        """Commit what is queued, then stop the thread."""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+        self._conn.close()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._commit(batch)
+            except Exception as e:
+                # Never let one batch stop the thread: later writers would wait forever
+                self._fail(batch, e)
+            if stopping:
+                return
+
+    def _commit(self, batch: list) -> None:
+        # Writes cancelled while queued are dropped; the rest can no longer be cancelled
+        batch = [(statements, future) for statements, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        outcomes = []
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for statements, future in batch:
+                self._conn.execute("SAVEPOINT write")
+                try:
+                    results = []
+                    for sql, params in statements:
+                        cursor = self._conn.execute(sql, params)
+                        results.append(WriteResult(cursor.lastrowid, cursor.rowcount))
+                    self._conn.execute("RELEASE write")
+                    outcomes.append((future, results, None))
+                except Exception as e:
+                    self._conn.execute("ROLLBACK TO write")
+                    self._conn.execute("RELEASE write")
+                    outcomes.append((future, None, e))
+            self._conn.execute("COMMIT")
+        except Exception as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            outcomes = [(future, None, e) for _, future in batch]
+
+        self.stats["batches"] += 1
+        _generations[self.path] = _generations.get(self.path, 0) + 1
+        for future, results, error in outcomes:
+            self.stats["writes"] += 1
+            if error is None:
+                future.set_result(results)
+            else:
+                self.stats["errors"] += 1
+                future.set_exception(error)
+
+    def _fail(self, batch: list, error: Exception) -> None:
+        try:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+        except sqlite3.Error:
+            pass
+        for _, future in batch:
+            if not future.done():
+                self.stats["errors"] += 1
+                future.set_exception(error)
+
+
+_socket_streams = threading.local()
+
+
+class SocketWriter:
+    """Client for a writer process listening on a Unix socket.
+
+    Each thread keeps one connection per socket, shared by all clients of
+    that socket; requests and replies are JSON lines.
+
+    Args:
+        path: Socket path
+        db: Database file the writes are for; the writer process's own
+            database when omitted
+    """
+
+    def __init__(self, path: str, db: str = None):
+        self.path = path
+        self.db = db
+
+    def _streams(self) -> dict:
+        if not hasattr(_socket_streams, "streams"):
+            _socket_streams.streams = {}
+        return _socket_streams.streams
+
+    def _file(self):
+        streams = self._streams()
+        stream = streams.get(self.path)
+        if stream is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.path)
+            stream = streams[self.path] = sock.makefile("rwb")
+        return stream
+
+    def submit(self, statements: list) -> Future:
+        future = Future()
+        request = {"statements": [[sql, list(params)] for sql, params in statements]}
+        if self.db:
+            request["db"] = os.path.abspath(self.db)
+        try:
+            stream = self._file()
+            stream.write(json.dumps(request).encode() + b"\n")
+            stream.flush()
+            reply = json.loads(stream.readline() or b'{"error": "writer closed the connection"}')
+        except OSError as e:
+            self._streams().pop(self.path, None)
+            future.set_exception(e)
+            return future
+        if "error" in reply:
+            error_type = getattr(sqlite3, reply.get("type", ""), sqlite3.DatabaseError)
+            future.set_exception(error_type(reply["error"]))
+        else:
+            future.set_result([WriteResult(*result) for result in reply["results"]])
+        return future
+
+    def execute(self, sql: str, params=()) -> WriteResult:
+        return self.submit([(sql, params)]).result()[0]
+
+    def close(self) -> None:
+        stream = self._streams().pop(self.path, None)
+        if stream is not None:
+            stream.close()
+
+
+class WriterPool:
+    """Writers keyed by database file, closing the least recently used.
+
+    Args:
+        max_open: Most writers kept open; defaults to ``SCOUT_SHARD_MAX_OPEN``
+            with per-user shards and to one otherwise
+    """
+
+    def __init__(self, max_open: int = None):
+        self.max_open = max_open
+        self._writers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _limit(self) -> int:
+        if self.max_open:
+            return self.max_open
+        return settings.SHARD_MAX_OPEN if settings.SHARD_BY_USER else 1
+
+    def get(self, path: str) -> Writer:
+        evicted = []
+        with self._lock:
+            writer = self._writers.get(path)
+            if writer is None:
+                writer = self._writers[path] = Writer(path)
+                while len(self._writers) > self._limit():
+                    evicted.append(self._writers.popitem(last=False)[1])
+            else:
+                self._writers.move_to_end(path)
+        # Closing commits the evicted writer's queue; done outside the lock
+        for old in evicted:
+            old.close()
+        return writer
+
+    def __len__(self) -> int:
+        return len(self._writers)
+
+    def close(self) -> None:
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+        for writer in writers:
+            writer.close()
+
+
+def serve_unix(socket_path: str, writer: Writer, pool: WriterPool = None) -> socketserver.ThreadingUnixStreamServer:
+    """Build a server that applies JSON-line write requests through ``writer``.
+
+    With ``pool``, every request is routed through ``pool``'s writer for the
+    database it names (``writer``'s database when it names none), so the
+    main database's writer is subject to the same LRU as the shards' and is
+    reopened if it was evicted.
+    """
+    default = os.path.abspath(writer.path)
+
+    def apply(db, statements):
+        if pool is None:
+            return writer.submit(statements).result()
+        while True:
+            try:
+                future = pool.get(os.path.abspath(db) if db else default).submit(statements)
+            except WriterClosed:
+                # Evicted between lookup and submit; the next lookup reopens it
+                continue
+            return future.result()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                request = json.loads(line)
+                statements = [(sql, tuple(params)) for sql, params in request["statements"]]
+                try:
+                    results = apply(request.get("db"), statements)
+                    reply = {"results": [list(result) for result in results]}
+                except Exception as e:
+                    reply = {"error": str(e), "type": type(e).__name__}
+                self.wfile.write(json.dumps(reply).encode() + b"\n")
+                self.wfile.flush()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    server.daemon_threads = True
+    return server
+
+
+_pool = WriterPool()
+
+
+def get_writer(db: str = None):
+    """Return the writer for ``db`` (the current user's database by default):
+    the socket client if configured, else a thread from the process's pool."""
+    from scout.api import models
+
+    db = db or models.database_path()
+    if settings.WRITER_SOCKET:
+        return SocketWriter(settings.WRITER_SOCKET, db)
+    return _pool.get(db)
+
+
+def close_writer() -> None:
+    """Flush and stop the process's writers."""
+    _pool.close()
+
+
+def _submit(statements: list, db: str = None) -> list:
+    while True:
+        try:
+            future = get_writer(db).submit(statements)
+        except WriterClosed:
+            # Evicted between lookup and submit; the next lookup reopens it
+            continue
+        return future.result()
+
+
+def write(sql: str, params=()) -> WriteResult:
+    """Apply one statement through the writer and wait for its commit."""
+    return _submit([(sql, params)])[0]
+
+
+def write_many(statements: list, db: str = None) -> list:
+    """Apply statements atomically through the writer; one WriteResult each.
+
+    ``db`` selects a database other than the current user's.
+    """
+    return _submit(statements, db)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scout single-writer process")
+    parser.add_argument("--socket", required=True, help="Unix socket path to listen on")
+    parser.add_argument("--db", help="Database file (defaults to SCOUT_DB_PATH)")
+    args = parser.parse_args(argv)
+
+    from scout.api import models
+
+    if args.db:
+        models.DB_PATH = args.db
+    models.init_db()
+    pool = WriterPool(settings.SHARD_MAX_OPEN)
+    writer = pool.get(os.path.abspath(models.DB_PATH))
+    server = serve_unix(args.socket, writer, pool)
+    print(f"Scout writer on {args.socket} -> {writer.path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+        os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Batch trip planning over a JSONL file of requests.
+
+Each input line is a JSON object with the request text in ``request`` (or
+``content``) and optional ``id`` and ``user_id``. Requests run concurrently,
+in threads (sharing the in-process tool and LLM caches) or in worker
+processes (sharing only the SQLite LLM cache). Results are appended to the
+output JSONL as each request finishes, so the output file doubles as the
+progress checkpoint: rerunning the same batch skips requests that already
+have a successful result and retries failed ones.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable
+
+
+def load_requests(path: str) -> list:
+    """Read planning requests, assigning line-based IDs where none is given."""
+    requests = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            text = item.get("request") or item.get("content")
+            if not text:
+                raise ValueError(f"{path}:{line_no}: missing 'request'")
+            requests.append({
+                "id": str(item.get("id", f"line-{line_no}")),
+                "request": text,
+                "user_id": item.get("user_id", "default"),
+            })
+    return requests
+
+
+def completed_ids(path: str) -> set:
+    """IDs that already have a successful result in the output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run
+                continue
+            if result.get("status") == "ok":
+                done.add(result["id"])
+    return done
+
+
+def run_request(runner: Callable, item: dict) -> dict:
+    """Plan one request and describe the outcome as an output record.
+
+    The record's ``thread_id`` names the conversation, so a result can be
+    followed up in chat.
+    """
+    started = time.perf_counter()
+    # Checkpoints outlive the batch, and IDs like "line-3" repeat across
+    # input files, so every attempt starts a conversation of its own
+    thread_id = f"batch-{item['id']}-{uuid.uuid4().hex[:12]}"
+    record = {"id": item["id"], "user_id": item["user_id"], "thread_id": thread_id}
+    try:
+        record["response"] = runner(item["request"], user_id=item["user_id"], thread_id=thread_id)
+        record["status"] = "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    record["finished_at"] = datetime.now(timezone.utc).isoformat()
+    return record
+
+
+def _terminate_last_line(path: str) -> None:
+    """Close a line left unfinished by an interrupted run before appending."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+async def _run_batch(runner, pending, output_path, concurrency, mode, on_result):
+    executor_cls = ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"ok": 0, "error": 0}
+
+    with executor_cls(max_workers=concurrency) as executor, open(output_path, "a") as out:
+        async def one(item):
+            async with semaphore:
+                record = await loop.run_in_executor(executor, run_request, runner, item)
+            # Written from the event loop only, so lines never interleave
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            if on_result:
+                on_result(record)
+
+        await asyncio.gather(*(one(item) for item in pending))
+    return counts
+
+
+def process_batch(
+    input_path: str,
+    output_path: str,
+    runner: Callable,
+    concurrency: int = 4,
+    mode: str = "thread",
+    on_result: Callable = None,
+) -> dict:
+    """Plan every request in input_path not yet completed in output_path.
+
+    Args:
+        input_path: JSONL file of planning requests
+        output_path: JSONL file results are appended to
+        runner: ``run_scout``-compatible callable; it must raise on failure
+            (and be picklable when mode is "process")
+        concurrency: Maximum requests in flight
+        mode: "thread" or "process"
+        on_result: Optional callback receiving each output record
+
+    Returns:
+        dict with "total", "skipped", "ok" and "error" counts
+    """
+    if mode not in ("thread", "process"):
+        raise ValueError(f"Unknown batch mode: {mode}")
+    requests = load_requests(input_path)
+    done = completed_ids(output_path)
+    pending = [item for item in requests if item["id"] not in done]
+    _terminate_last_line(output_path)
+    counts = asyncio.run(
+        _run_batch(runner, pending, output_path, max(concurrency, 1), mode, on_result)
+    )
+    return {"total": len(requests), "skipped": len(requests) - len(pending), **counts}
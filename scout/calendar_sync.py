@@ -0,0 +1,259 @@
+"""Google Calendar sync for trip itineraries.
+
+Credentials are loaded once per process and the Calendar service is built
+once per thread (``httplib2`` connections are not thread-safe), instead of
+re-reading ``token.json`` and rebuilding the discovery service on every
+event. ``sync_trip`` compares a trip's ``itinerary_items`` with what was
+last pushed (``calendar_sync`` table) and sends only the inserts, updates and
+deletes, grouped into batch HTTP requests of ``SCOUT_CALENDAR_BATCH_SIZE``.
+
+Setting ``GOOGLE_CALENDAR_API_URL`` points the service at a local stand-in
+(see ``benchmarks.fakes.FakeProviderServer``) with anonymous credentials.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from scout.api.models import get_db
+from scout.api.writer import write_many
+from scout.config.settings import settings
+
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
+
+_lock = threading.Lock()
+_credentials = None
+_local = threading.local()
+_trip_locks = {}
+
+
+class CalendarAuthError(Exception):
+    """Raised when no usable Google Calendar credentials are available."""
+
+
+def get_credentials():
+    """Return process-wide credentials, refreshing them when expired.
+
+    Raises:
+        CalendarAuthError: If token.json is missing or cannot be refreshed
+    """
+    global _credentials
+    with _lock:
+        if settings.GOOGLE_CALENDAR_API_URL:
+            if _credentials is None:
+                from google.auth.credentials import AnonymousCredentials
+
+                _credentials = AnonymousCredentials()
+            return _credentials
+
+        creds = _credentials
+        if creds is None and os.path.exists(settings.GOOGLE_TOKEN_PATH):
+            from google.oauth2.credentials import Credentials
+
+            creds = Credentials.from_authorized_user_file(settings.GOOGLE_TOKEN_PATH, SCOPES)
+        if creds is not None and not creds.valid and creds.expired and creds.refresh_token:
+            from google.auth.transport.requests import Request
+
+            creds.refresh(Request())
+        if creds is None or not creds.valid:
+            raise CalendarAuthError("Google Calendar authentication required. Run setup first.")
+        _credentials = creds
+        return creds
+
+
+def get_calendar_service():
+    """Return this thread's Calendar service, building it on first use."""
+    creds = get_credentials()
+    api_url = settings.GOOGLE_CALENDAR_API_URL
+    cached = getattr(_local, "service", None)
+    if cached is not None and cached[0] == (creds, api_url):
+        return cached[1]
+
+    from googleapiclient.discovery import build
+
+    options = {"api_endpoint": api_url.rstrip("/") + "/calendar/v3/"} if api_url else None
+    service = build(
+        "calendar", "v3", credentials=creds, client_options=options,
+        static_discovery=True, cache_discovery=False,
+    )
+    _local.service = ((creds, api_url), service)
+    return service
+
+
+def reset_calendar_service() -> None:
+    """Forget cached credentials and services (after re-authenticating or in tests)."""
+    global _credentials
+    with _lock:
+        _credentials = None
+    _local.__dict__.clear()
+
+
+def new_batch(service, callback=None):
+    """Create a batch request aimed at the same host as ``service``."""
+    from googleapiclient.http import BatchHttpRequest
+
+    api_url = settings.GOOGLE_CALENDAR_API_URL
+    if api_url:
+        return BatchHttpRequest(callback=callback, batch_uri=api_url.rstrip("/") + "/batch/calendar/v3")
+    return service.new_batch_http_request(callback=callback)
+
+
+def event_body(item: dict) -> dict:
+    """Build the Calendar event for an itinerary item."""
+    start = datetime.fromisoformat(item["start_datetime"])
+    end = datetime.fromisoformat(item["end_datetime"]) if item.get("end_datetime") else start + timedelta(hours=1)
+    description = "\n".join(
+        part for part in (
+            item.get("description"),
+            f"Booking ref: {item['booking_ref']}" if item.get("booking_ref") else None,
+            f"Cost: ${item['cost']:.2f}" if item.get("cost") is not None else None,
+        ) if part
+    )
+    return {
+        "summary": item["title"],
+        "location": item.get("location") or "",
+        "description": description,
+        "start": {"dateTime": start.isoformat(), "timeZone": settings.CALENDAR_TIME_ZONE},
+        "end": {"dateTime": end.isoformat(), "timeZone": settings.CALENDAR_TIME_ZONE},
+        "extendedProperties": {"private": {"scout_item_id": str(item["id"])}},
+    }
+
+
+def fingerprint(body: dict) -> str:
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+def _trip_lock(trip_id: int) -> threading.Lock:
+    with _lock:
+        return _trip_locks.setdefault(trip_id, threading.Lock())
+
+
+def plan_sync(items: list, synced: dict) -> tuple:
+    """Diff itinerary items against the last pushed state.
+
+    Args:
+        items: Itinerary item rows of the trip
+        synced: item_id -> {"event_id", "fingerprint"} from calendar_sync
+
+    Returns:
+        (operations, unchanged) where each operation is
+        (action, item_id, event_id, body, fingerprint)
+    """
+    remaining = dict(synced)
+    operations = []
+    unchanged = 0
+    for item in items:
+        body = event_body(item)
+        digest = fingerprint(body)
+        previous = remaining.pop(item["id"], None)
+        if previous is None:
+            operations.append(("insert", item["id"], None, body, digest))
+        elif previous["fingerprint"] != digest:
+            operations.append(("update", item["id"], previous["event_id"], body, digest))
+        else:
+            unchanged += 1
+    for item_id, previous in remaining.items():
+        operations.append(("delete", item_id, previous["event_id"], None, None))
+    return operations, unchanged
+
+
+def _status(exception) -> int:
+    resp = getattr(exception, "resp", None)
+    return int(getattr(resp, "status", 0) or 0)
+
+
+def sync_trip(trip_id: int, calendar_id: str = None, batch_size: int = None) -> dict:
+    """Push a trip's itinerary to Google Calendar, sending only what changed.
+
+    Args:
+        trip_id: Trip whose itinerary_items are synced
+        calendar_id: Target calendar (defaults to GOOGLE_CALENDAR_ID)
+        batch_size: Operations per batch HTTP request (defaults to CALENDAR_BATCH_SIZE)
+
+    Returns:
+        dict with counts of inserted, updated, deleted and unchanged events,
+        the number of batch requests sent and any per-item errors
+
+    Raises:
+        CalendarAuthError: If no usable credentials are available
+    """
+    calendar_id = calendar_id or settings.GOOGLE_CALENDAR_ID
+    batch_size = batch_size or settings.CALENDAR_BATCH_SIZE
+
+    with _trip_lock(trip_id):
+        conn = get_db()
+        try:
+            items = [dict(row) for row in conn.execute(
+                "SELECT * FROM itinerary_items WHERE trip_id = ? ORDER BY id", (trip_id,)
+            )]
+            synced = {
+                row["item_id"]: dict(row)
+                for row in conn.execute(
+                    "SELECT item_id, event_id, fingerprint FROM calendar_sync WHERE trip_id = ?",
+                    (trip_id,),
+                )
+            }
+        finally:
+            conn.close()
+
+        operations, unchanged = plan_sync(items, synced)
+        summary = {
+            "trip_id": trip_id, "inserted": 0, "updated": 0, "deleted": 0,
+            "unchanged": unchanged, "batches": 0, "errors": [],
+        }
+        if not operations:
+            return summary
+
+        service = get_calendar_service()
+        events = service.events()
+        responses = {}
+
+        def collect(request_id, response, exception):
+            responses[request_id] = (response, exception)
+
+        for offset in range(0, len(operations), batch_size):
+            batch = new_batch(service, callback=collect)
+            for index, (action, _, event_id, body, _) in enumerate(
+                operations[offset:offset + batch_size], start=offset
+            ):
+                if action == "insert":
+                    request = events.insert(calendarId=calendar_id, body=body)
+                elif action == "update":
+                    request = events.update(calendarId=calendar_id, eventId=event_id, body=body)
+                else:
+                    request = events.delete(calendarId=calendar_id, eventId=event_id)
+                batch.add(request, request_id=str(index))
+            batch.execute()
+            summary["batches"] += 1
+
+        statements = []
+        for index, (action, item_id, event_id, _, digest) in enumerate(operations):
+            response, exception = responses.get(str(index), (None, RuntimeError("no response in batch")))
+            status = _status(exception) if exception else 200
+            if action == "delete" and status in (200, 404, 410):
+                statements.append(("DELETE FROM calendar_sync WHERE item_id = ?", (item_id,)))
+                summary["deleted"] += 1
+            elif action == "update" and status in (404, 410):
+                # Event removed on the calendar side; insert it again next sync
+                statements.append(("DELETE FROM calendar_sync WHERE item_id = ?", (item_id,)))
+                summary["errors"].append({"item_id": item_id, "error": "event missing, will re-create"})
+            elif exception is not None:
+                summary["errors"].append({"item_id": item_id, "error": str(exception)})
+            elif action == "insert":
+                statements.append((
+                    "INSERT OR REPLACE INTO calendar_sync "
+                    "(item_id, trip_id, event_id, fingerprint, synced_at) "
+                    "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
+                    (item_id, trip_id, response["id"], digest),
+                ))
+                summary["inserted"] += 1
+            elif action == "update":
+                statements.append((
+                    "UPDATE calendar_sync SET fingerprint = ?, synced_at = CURRENT_TIMESTAMP "
+                    "WHERE item_id = ?",
+                    (digest, item_id),
+                ))
+                summary["updated"] += 1
+        write_many(statements)
+        return summary
@@ -22,11 +22,81 @@ class Settings:
 
     # Google Calendar
     GOOGLE_CREDENTIALS_PATH = os.getenv("GOOGLE_CREDENTIALS_PATH", "./credentials.json")
+    GOOGLE_TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "token.json")
+    # Root URL of a Calendar API stand-in; unset talks to Google with token.json
+    GOOGLE_CALENDAR_API_URL = os.getenv("GOOGLE_CALENDAR_API_URL", "")
+    GOOGLE_CALENDAR_ID = os.getenv("GOOGLE_CALENDAR_ID", "primary")
+    CALENDAR_TIME_ZONE = os.getenv("SCOUT_CALENDAR_TIME_ZONE", "UTC")
+    CALENDAR_BATCH_SIZE = int(os.getenv("SCOUT_CALENDAR_BATCH_SIZE", "50"))
+
+    # ICS feeds: rendered events kept in memory, suggested client poll interval
+    ICS_CACHE_MAX_ITEMS = int(os.getenv("SCOUT_ICS_CACHE_MAX_ITEMS", "20000"))
+    ICS_REFRESH_MINUTES = int(os.getenv("SCOUT_ICS_REFRESH_MINUTES", "15"))
 
     # Model Configuration
     MODEL_NAME = os.getenv("MODEL_NAME", "gemini-2.0-flash")
     MODEL_TEMPERATURE = float(os.getenv("MODEL_TEMPERATURE", "0"))
 
+    # Single writer for the dashboard database; set the socket to use a
+    # writer process shared by several server workers
+    WRITER_SOCKET = os.getenv("SCOUT_WRITER_SOCKET", "")
+    WRITER_WINDOW_MS = float(os.getenv("SCOUT_WRITER_WINDOW_MS", "2"))
+    WRITER_MAX_BATCH = int(os.getenv("SCOUT_WRITER_MAX_BATCH", "256"))
+    WRITER_BUSY_TIMEOUT_MS = int(os.getenv("SCOUT_WRITER_BUSY_TIMEOUT_MS", "5000"))
+
+    # One database file per user under SHARD_DIR instead of a shared one;
+    # at most SHARD_MAX_OPEN shard writers are kept open
+    SHARD_BY_USER = os.getenv("SCOUT_SHARD_BY_USER", "0") in ("1", "true", "True")
+    SHARD_DIR = os.getenv("SCOUT_SHARD_DIR", "./data/shards")
+    SHARD_MAX_OPEN = int(os.getenv("SCOUT_SHARD_MAX_OPEN", "64"))
+
+    # Finished trips moved to the archive database; the path defaults to
+    # <db>-archive.db next to the dashboard database
+    ARCHIVE_DB_PATH = os.getenv("SCOUT_ARCHIVE_DB_PATH", "")
+    ARCHIVE_AFTER_DAYS = int(os.getenv("SCOUT_ARCHIVE_AFTER_DAYS", "90"))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("SCOUT_ARCHIVE_BATCH_SIZE", "200"))
+
+    # Chat history: days before a day's messages are compacted into a digest
+    CHAT_RETENTION_DAYS = int(os.getenv("SCOUT_CHAT_RETENTION_DAYS", "30"))
+    CHAT_PAGE_SIZE = int(os.getenv("SCOUT_CHAT_PAGE_SIZE", "50"))
+
+    # Conversation checkpoints
+    CHECKPOINT_DB_PATH = os.getenv("SCOUT_CHECKPOINT_DB", "./data/checkpoints.db")
+    CHECKPOINT_KEEP_PER_THREAD = int(os.getenv("SCOUT_CHECKPOINT_KEEP_PER_THREAD", "2"))
+    CHECKPOINT_MAX_THREADS = int(os.getenv("SCOUT_CHECKPOINT_MAX_THREADS", "500"))
+
+    # Context compaction
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("SCOUT_CONTEXT_TOKEN_BUDGET", "8000"))
+    TOOL_DIGEST_MIN_CHARS = int(os.getenv("SCOUT_TOOL_DIGEST_MIN_CHARS", "800"))
+
+    # Tool result cache
+    TOOL_CACHE_TTL_SECONDS = int(os.getenv("SCOUT_TOOL_CACHE_TTL", "900"))
+    TOOL_CACHE_MAX_ENTRIES = int(os.getenv("SCOUT_TOOL_CACHE_MAX_ENTRIES", "256"))
+    TOOL_CACHE_MAX_PER_THREAD = int(os.getenv("SCOUT_TOOL_CACHE_MAX_PER_THREAD", "32"))
+
+    # LLM response cache (opt-in)
+    LLM_CACHE_ENABLED = os.getenv("SCOUT_LLM_CACHE", "0") in ("1", "true", "True")
+    LLM_CACHE_DB_PATH = os.getenv("SCOUT_LLM_CACHE_DB", "./data/llm_cache.db")
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("SCOUT_LLM_CACHE_MAX_ENTRIES", "2000"))
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("SCOUT_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+    # Run tracing: comma-separated sinks out of "sqlite" and "ndjson"
+    TRACE_SINKS = os.getenv("SCOUT_TRACE_SINKS", "sqlite")
+    TRACE_NDJSON_PATH = os.getenv("SCOUT_TRACE_NDJSON", "./data/traces.ndjson")
+    # Days of spans kept in trace_spans; 0 keeps them forever
+    TRACE_RETENTION_DAYS = int(os.getenv("SCOUT_TRACE_RETENTION_DAYS", "14"))
+
+    # Speculative flight/hotel searches after intake
+    PREFETCH_ENABLED = os.getenv("SCOUT_PREFETCH", "1") not in ("0", "false", "False")
+    PREFETCH_WORKERS = int(os.getenv("SCOUT_PREFETCH_WORKERS", "4"))
+
+    # Background flight price watches (opt-in: searches spend SerpApi quota)
+    PRICE_WATCH_ENABLED = os.getenv("SCOUT_PRICE_WATCH", "0") in ("1", "true", "True")
+    PRICE_WATCH_INTERVAL_MINUTES = int(os.getenv("SCOUT_PRICE_WATCH_INTERVAL_MINUTES", "360"))
+    PRICE_WATCH_SEARCHES_PER_HOUR = int(os.getenv("SCOUT_PRICE_WATCH_SEARCHES_PER_HOUR", "20"))
+    PRICE_WATCH_WORKERS = int(os.getenv("SCOUT_PRICE_WATCH_WORKERS", "4"))
+    PRICE_DROP_MIN_PERCENT = float(os.getenv("SCOUT_PRICE_DROP_MIN_PERCENT", "5"))
+
     @classmethod
     def validate(cls) -> list[str]:
         """Validate that required settings are present."""
@@ -0,0 +1,291 @@
+"""Process metrics in Prometheus text format.
+
+Counters, gauges and histograms live in a module-level registry and are
+rendered at ``/metrics``. Three sources feed them:
+
+- ``MetricsMiddleware`` times every HTTP request by route template and
+  tracks requests in flight;
+- ``TimedConnection``, the connection factory of the dashboard database,
+  times each statement under its normalized SQL;
+- ``observe_run()`` folds a finished agent run's trace spans into counters
+  for runs, node latency, LLM calls, tool calls and cache hits, once per run
+  rather than on every call.
+
+Recording an observation is a dict lookup plus a short locked update.
+"""
+import bisect
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+RUN_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, *labels) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}_total{_labels(self.labelnames, k)} {_number(v)}" for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, *labels) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, *labels) -> None:
+        self.inc(-amount, *labels)
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *labels) -> int:
+        state = self._values.get(labels)
+        return state[2] if state else 0
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+REGISTRY = []
+
+
+def _register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+HTTP_REQUESTS = _register(Counter(
+    "scout_http_requests", "HTTP requests by route template and status.", ("method", "route", "status")))
+HTTP_LATENCY = _register(Histogram(
+    "scout_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")))
+HTTP_IN_FLIGHT = _register(Gauge(
+    "scout_http_requests_in_flight", "HTTP requests currently being served."))
+DB_LATENCY = _register(Histogram(
+    "scout_db_statement_duration_seconds", "SQLite statement execution time by normalized SQL.",
+    ("statement",), DB_BUCKETS))
+DB_ERRORS = _register(Counter(
+    "scout_db_statement_errors", "SQLite statements that raised.", ("statement",)))
+AGENT_RUNS = _register(Counter("scout_agent_runs", "Agent runs by outcome.", ("status",)))
+AGENT_RUN_LATENCY = _register(Histogram(
+    "scout_agent_run_duration_seconds", "End-to-end agent run latency.", (), RUN_BUCKETS))
+NODE_LATENCY = _register(Histogram(
+    "scout_agent_node_duration_seconds", "Graph node latency.", ("node",), RUN_BUCKETS))
+LLM_CALLS = _register(Counter("scout_llm_calls", "LLM calls by node and cache outcome.", ("node", "cache")))
+TOOL_CALLS = _register(Counter(
+    "scout_tool_calls", "Tool calls by tool, cache outcome and status.", ("tool", "cache", "status")))
+CACHE_HITS = _register(Counter("scout_cache_hits", "Cache hits by cache.", ("cache",)))
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Clear every metric (for tests)."""
+    for metric in REGISTRY:
+        metric.clear()
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and literals so equal statements share one series."""
+    text = _SPACE.sub(" ", sql).strip()
+    text = _LITERALS.sub("?", text)
+    text = _IN_LISTS.sub("(?...)", text)
+    return text[:160]
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection that times ``execute``/``executemany``/``executescript``.
+
+    Timing covers preparing and running the statement up to its first row;
+    rows fetched later from the cursor are not included.
+    """
+
+    def _timed(self, method, sql, *args):
+        started = time.perf_counter()
+        try:
+            return method(sql, *args)
+        except Exception:
+            DB_ERRORS.inc(1, normalize_sql(sql))
+            raise
+        finally:
+            DB_LATENCY.observe(time.perf_counter() - started, normalize_sql(sql))
+
+    def execute(self, sql, *args):
+        return self._timed(super().execute, sql, *args)
+
+    def executemany(self, sql, *args):
+        return self._timed(super().executemany, sql, *args)
+
+    def executescript(self, sql):
+        return self._timed(super().executescript, sql)
+
+
+def observe_run(spans: list) -> None:
+    """Count a finished run's spans (dicts as produced by ``RunTrace.to_dicts``)."""
+    for s in spans:
+        kind = s["kind"]
+        attributes = s.get("attributes") or {}
+        seconds = s["duration_ms"] / 1000
+        if kind == "run":
+            AGENT_RUNS.inc(1, s["status"])
+            AGENT_RUN_LATENCY.observe(seconds)
+        elif kind == "node":
+            NODE_LATENCY.observe(seconds, s["name"])
+        elif kind == "llm":
+            cache = attributes.get("cache", "off")
+            LLM_CALLS.inc(1, s["name"], cache)
+            if cache == "hit":
+                CACHE_HITS.inc(1, "llm")
+        elif kind == "tool":
+            cache = attributes.get("cache", "off")
+            status = "error" if s["status"] == "error" or attributes.get("error") else "ok"
+            TOOL_CALLS.inc(1, s["name"], cache, status)
+            if cache == "hit":
+                CACHE_HITS.inc(1, "prefetch" if attributes.get("source") == "prefetch" else "tool")
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, including any router prefix."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    # Newer FastAPI versions match included routers without copying their
+    # routes, so the prefix lives on the include context
+    included = (scope.get("fastapi") or {}).get("included_router")
+    prefix = getattr(getattr(included, "include_context", None), "prefix", "") or ""
+    return prefix + path
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and status per route template.
+
+    The route template (``/api/trips/{trip_id}``) is read from the scope
+    after routing, so label cardinality stays bounded; unmatched paths share
+    the ``unmatched`` label.
+    """
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            template = route_template(scope)
+            HTTP_LATENCY.observe(elapsed, scope["method"], template)
+            HTTP_REQUESTS.inc(1, scope["method"], template, str(status["code"]))
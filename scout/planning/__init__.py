@@ -0,0 +1 @@
+"""Itinerary planning algorithms."""
@@ -0,0 +1,150 @@
+"""Overlap detection for itinerary items and trips.
+
+Intervals are sorted once and swept left to right, keeping the still-open
+intervals in a heap ordered by end time, so a full check costs
+O(n log n + k) for k reported overlaps instead of comparing every pair.
+
+Hotel stays span whole nights and would overlap every activity of the trip,
+so they are only checked against other hotel stays. Items without an end
+time are treated as lasting ``DEFAULT_DURATION``.
+"""
+import heapq
+from datetime import datetime, timedelta
+
+DEFAULT_DURATION = timedelta(hours=1)
+
+# Longest stay a single item may cover; bounds the indexed neighbour lookup
+LOOKBACK = {"presence": timedelta(hours=48), "lodging": timedelta(days=60)}
+
+
+def channel(item_type: str) -> str:
+    """Items only conflict with items on the same channel."""
+    return "lodging" if item_type == "hotel" else "presence"
+
+
+def item_interval(item: dict) -> tuple:
+    """(start, end) datetimes of an itinerary item."""
+    start = datetime.fromisoformat(item["start_datetime"])
+    end = datetime.fromisoformat(item["end_datetime"]) if item.get("end_datetime") else start + DEFAULT_DURATION
+    return start, max(end, start)
+
+
+def sweep_overlaps(intervals: list) -> list:
+    """Report every overlapping pair among ``(start, end, key)`` intervals.
+
+    Intervals are half-open, so one ending exactly when another starts does
+    not overlap it.
+
+    Returns:
+        List of (key_a, key_b) pairs with key_a starting no later than key_b
+    """
+    ordered = sorted(intervals, key=lambda interval: interval[0])
+    active = []  # heap of (end, sequence, key)
+    pairs = []
+    for sequence, (start, end, key) in enumerate(ordered):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        pairs.extend((other, key) for _, _, other in active)
+        heapq.heappush(active, (end, sequence, key))
+    return pairs
+
+
+def _describe(a: dict, b: dict) -> dict:
+    return {
+        "items": [a["id"], b["id"]],
+        "titles": [a["title"], b["title"]],
+        "trip_ids": [a["trip_id"], b["trip_id"]],
+        "overlap_start": max(item_interval(a)[0], item_interval(b)[0]).isoformat(),
+        "overlap_end": min(item_interval(a)[1], item_interval(b)[1]).isoformat(),
+    }
+
+
+def item_conflicts(items: list) -> list:
+    """All overlapping item pairs, checked per channel."""
+    by_id = {item["id"]: item for item in items}
+    conflicts = []
+    for name in ("presence", "lodging"):
+        intervals = [
+            (*item_interval(item), item["id"])
+            for item in items if channel(item["item_type"]) == name
+        ]
+        conflicts.extend(_describe(by_id[a], by_id[b]) for a, b in sweep_overlaps(intervals))
+    return conflicts
+
+
+def conflicts_for_trip(conn, trip_id: int) -> dict:
+    """Overlaps inside a trip, with its items in other trips, and with other trips.
+
+    Args:
+        conn: Open dashboard database connection
+        trip_id: Trip to check
+
+    Returns:
+        dict with "items" (pairs within the trip), "cross_trip_items" (pairs
+        with items of other trips) and "trips" (other trips whose dates overlap)
+    """
+    trip = conn.execute("SELECT id, name, start_date, end_date FROM trips WHERE id = ?", (trip_id,)).fetchone()
+    if trip is None:
+        return None
+    columns = "id, trip_id, title, item_type, start_datetime, end_datetime"
+    own = [dict(row) for row in conn.execute(
+        f"SELECT {columns} FROM itinerary_items WHERE trip_id = ?", (trip_id,)
+    )]
+    if own:
+        # Only items that can reach this trip's time span need to be swept
+        lower = min(item_interval(item)[0] for item in own) - LOOKBACK["lodging"]
+        upper = max(item_interval(item)[1] for item in own)
+        others = [dict(row) for row in conn.execute(
+            f"SELECT {columns} FROM itinerary_items "
+            "WHERE trip_id != ? AND start_datetime >= ? AND start_datetime < ?",
+            (trip_id, lower.isoformat(), upper.isoformat()),
+        )]
+    else:
+        others = []
+
+    within, cross = [], []
+    for conflict in item_conflicts(own + others):
+        a_trip, b_trip = conflict["trip_ids"]
+        if a_trip == trip_id and b_trip == trip_id:
+            within.append(conflict)
+        elif trip_id in (a_trip, b_trip):
+            cross.append(conflict)
+
+    trips = [dict(row) for row in conn.execute(
+        "SELECT id, name, start_date, end_date FROM trips "
+        "WHERE id != ? AND start_date < ? AND end_date > ?",
+        (trip_id, trip["end_date"], trip["start_date"]),
+    )]
+    return {"trip_id": trip_id, "items": within, "cross_trip_items": cross, "trips": trips}
+
+
+def check_new_item(conn, item: dict) -> list:
+    """Conflicts of one inserted item with existing items.
+
+    Uses the start_datetime index to fetch only neighbours that start within
+    the channel's lookback window before the item ends, so the check stays
+    O(log n) in the size of the user's history.
+
+    Args:
+        conn: Open dashboard database connection
+        item: The item row (with id) as stored
+
+    Returns:
+        List of conflict dicts as produced by ``item_conflicts``
+    """
+    start, end = item_interval(item)
+    name = channel(item["item_type"])
+    rows = conn.execute(
+        "SELECT id, trip_id, title, item_type, start_datetime, end_datetime FROM itinerary_items "
+        "WHERE start_datetime >= ? AND start_datetime < ? AND id != ?",
+        ((start - LOOKBACK[name]).isoformat(), end.isoformat(), item["id"]),
+    )
+    conflicts = []
+    for row in rows:
+        other = dict(row)
+        if channel(other["item_type"]) != name:
+            continue
+        other_start, other_end = item_interval(other)
+        if other_start < end and start < other_end:
+            conflicts.append(_describe(item, other))
+    return conflicts
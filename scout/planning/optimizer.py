@@ -0,0 +1,264 @@
+"""Day-by-day visiting order for itinerary items.
+
+Each day's items are split at fixed-time anchors (flights, transport, dining
+reservations, hotel check-ins and anything without coordinates). The free
+items between two anchors are reordered to shorten the walk from the earlier
+anchor to the later one: nearest neighbour gives a first tour, then 2-opt
+reversals are applied, each scored against the whole path in one NumPy
+step. The reordered items are packed into the segment's original time
+slots; an order that would run into the next anchor is packed tightly
+instead, and if even that does not fit the segment keeps its original
+order, so anchors keep their times and no overlaps are introduced.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+from scout.planning.conflicts import item_interval
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Item types with a booked time that must not move
+ANCHOR_TYPES = {"flight", "transport", "dining", "hotel"}
+
+
+def haversine_matrix(lat, lng) -> np.ndarray:
+    """Great-circle distances in km between every pair of points."""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lng = np.radians(np.asarray(lng, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlng = lng[:, None] - lng[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def path_length(dist: np.ndarray, path) -> float:
+    path = np.asarray(path)
+    return float(dist[path[:-1], path[1:]].sum())
+
+
+def nearest_neighbour(dist: np.ndarray, start: int, nodes) -> list:
+    """Visit ``nodes`` greedily from ``start``; returns the visiting order."""
+    remaining = list(nodes)
+    order = []
+    current = start
+    while remaining:
+        nearest = int(np.argmin(dist[current, remaining]))
+        current = remaining.pop(nearest)
+        order.append(current)
+    return order
+
+
+def two_opt(dist: np.ndarray, path: list, max_rounds: int = 1_000) -> list:
+    """Improve an open path with fixed endpoints by 2-opt reversals.
+
+    Reversing ``path[i+1..j]`` swaps edges (a, b), (c, d) for (a, c), (b, d).
+    Each sweep walks ``i`` along the path, scores every ``j`` for it in one
+    vectorised step and applies the best improving reversal straight away
+    (first improvement over ``i``), until a sweep finds nothing to improve.
+    """
+    path = np.asarray(path)
+    n = len(path)
+    if n < 4:
+        return path.tolist()
+    for _ in range(max_rounds):
+        improved = False
+        for i in range(n - 3):
+            a, b = path[i], path[i + 1]
+            c, d = path[i + 2:n - 1], path[i + 3:]
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            j = int(np.argmin(delta))
+            if delta[j] < -1e-9:
+                j += i + 2
+                path[i + 1:j + 1] = path[i + 1:j + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return path.tolist()
+
+
+def solve_segment(dist: np.ndarray, start, end, nodes) -> list:
+    """Order ``nodes`` for the path start -> nodes -> end.
+
+    Args:
+        dist: Distance matrix over all points of the day
+        start: Index of the preceding anchor, or None to start anywhere
+        end: Index of the following anchor, or None to end anywhere
+
+    Returns:
+        The nodes in visiting order
+    """
+    nodes = list(nodes)
+    if len(nodes) < 2:
+        return nodes
+    # Local matrix with slot 0 = start and slot -1 = end; a missing endpoint
+    # becomes a virtual point at distance 0 from everything.
+    index = [start if start is not None else 0] + nodes + [end if end is not None else 0]
+    local = dist[np.ix_(index, index)].copy()
+    if start is None:
+        local[0, :] = local[:, 0] = 0.0
+    if end is None:
+        local[-1, :] = local[:, -1] = 0.0
+    last = len(index) - 1
+    order = nearest_neighbour(local, 0, range(1, last))
+    path = two_opt(local, [0] + order + [last])
+    return [index[k] for k in path[1:-1]]
+
+
+def _is_anchor(item: dict) -> bool:
+    return item.get("item_type") in ANCHOR_TYPES or item.get("lat") is None or item.get("lng") is None
+
+
+def _day_distance(items: list) -> float:
+    points = [(i["lat"], i["lng"]) for i in items if i.get("lat") is not None and i.get("lng") is not None]
+    if len(points) < 2:
+        return 0.0
+    lat, lng = zip(*points)
+    dist = haversine_matrix(lat, lng)
+    return path_length(dist, range(len(points)))
+
+
+def optimize_day(items: list) -> list:
+    """Reorder one day's items between anchors.
+
+    Args:
+        items: Itinerary item dicts with lat, lng, item_type and start_datetime
+
+    Returns:
+        New item dicts in visiting order; moved items keep their durations
+        and are packed into the slots they fill
+    """
+    items = sorted(items, key=lambda i: i["start_datetime"])
+    located = [k for k, item in enumerate(items) if item.get("lat") is not None and item.get("lng") is not None]
+    if len(located) < 3:
+        return [dict(item) for item in items]
+
+    position = {k: n for n, k in enumerate(located)}
+    dist = haversine_matrix([items[k]["lat"] for k in located], [items[k]["lng"] for k in located])
+
+    result = []
+    segment = []
+    previous_anchor = None
+
+    def flush(next_anchor):
+        start = position.get(previous_anchor)
+        end = position.get(next_anchor)
+        order = solve_segment(dist, start, end, [position[k] for k in segment])
+        reordered = [items[located[n]] for n in order]
+        limit = item_interval(items[next_anchor])[0] if next_anchor is not None else None
+        result.extend(_fit_to_slots(reordered, [items[k] for k in segment], limit))
+        segment.clear()
+
+    for k, item in enumerate(items):
+        if _is_anchor(item):
+            flush(k)
+            result.append(dict(item))
+            previous_anchor = k
+        else:
+            segment.append(k)
+    flush(None)
+    return result
+
+
+def _end(item: dict):
+    """When an item is known to end; items without an end take no time."""
+    return item_interval(item)[1] if item.get("end_datetime") else item_interval(item)[0]
+
+
+def _pack(items: list, starts: list) -> list:
+    """Schedule ``items`` in order, each at its start or, if the previous one
+    is still running, when it ends."""
+    packed = []
+    cursor = None
+    for item, start in zip(items, starts):
+        if cursor is not None:
+            start = max(start, cursor)
+        moved = dict(item)
+        moved["start_datetime"] = start.isoformat()
+        if item.get("end_datetime"):
+            begin, end = item_interval(item)
+            moved["end_datetime"] = (start + (end - begin)).isoformat()
+        packed.append(moved)
+        cursor = _end(moved)
+    return packed
+
+
+def _fit_to_slots(items: list, slots: list, limit=None) -> list:
+    """Place a segment's reordered items in its time slots without passing ``limit``.
+
+    Items first take the slots' start times, later only if the previous
+    item is still running; items without an end time are not assumed to
+    take any, so they keep their slot times. If that runs past ``limit``
+    (the next anchor's start) they are packed back to back from the first
+    slot instead. An order that fits neither way is rejected and the
+    original items are returned.
+    """
+    if [id(item) for item in items] == [id(slot) for slot in slots]:
+        return [dict(slot) for slot in slots]
+    slot_starts = [item_interval(slot)[0] for slot in slots]
+    for starts in (slot_starts, slot_starts[:1] * len(items)):
+        packed = _pack(items, starts)
+        if limit is None or _end(packed[-1]) <= limit:
+            return packed
+    return [dict(slot) for slot in slots]
+
+
+def optimize_itinerary(items: list) -> dict:
+    """Optimize every day of an itinerary.
+
+    Returns:
+        dict with per-day results ("date", "order", "items", distances before
+        and after) and the total distance saved in km
+    """
+    days = defaultdict(list)
+    for item in items:
+        days[item["start_datetime"][:10]].append(item)
+
+    results = []
+    for date in sorted(days):
+        before = sorted(days[date], key=lambda i: i["start_datetime"])
+        after = optimize_day(before)
+        results.append({
+            "date": date,
+            "order": [item["id"] for item in after],
+            "items": after,
+            "distance_km_before": round(_day_distance(before), 3),
+            "distance_km_after": round(_day_distance(after), 3),
+        })
+    saved = sum(d["distance_km_before"] - d["distance_km_after"] for d in results)
+    return {"days": results, "distance_km_saved": round(saved, 3)}
+
+
+def optimize_trip(trip_id: int, apply: bool = False) -> dict:
+    """Optimize a trip's stored itinerary, optionally saving the new times.
+
+    Args:
+        trip_id: Trip whose itinerary_items are reordered
+        apply: Write the new start/end times back to itinerary_items
+
+    Returns:
+        The ``optimize_itinerary`` result plus "trip_id" and "applied", or
+        None if the trip does not exist
+    """
+    from scout.api.models import get_db
+    from scout.api.writer import write_many
+
+    conn = get_db()
+    try:
+        if conn.execute("SELECT 1 FROM trips WHERE id = ?", (trip_id,)).fetchone() is None:
+            return None
+        items = [dict(row) for row in conn.execute(
+            "SELECT * FROM itinerary_items WHERE trip_id = ? ORDER BY start_datetime", (trip_id,)
+        )]
+    finally:
+        conn.close()
+    result = optimize_itinerary(items)
+    if apply:
+        originals = {item["id"]: item for item in items}
+        write_many([
+            ("UPDATE itinerary_items SET start_datetime = ?, end_datetime = ? WHERE id = ?",
+             (item["start_datetime"], item["end_datetime"], item["id"]))
+            for day in result["days"] for item in day["items"]
+            if item["start_datetime"] != originals[item["id"]]["start_datetime"]
+        ])
+    return {"trip_id": trip_id, "applied": apply, **result}
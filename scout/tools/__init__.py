@@ -1,16 +1,34 @@
-"""Tools for Scout travel agent."""
-from .flights import search_flights
-from .hotels import search_hotels
-from .calendar import create_trip_event
-from .memory import store_preference, recall_preferences
-from .itinerary import add_itinerary_item, list_trips
+"""Tools for Scout travel agent.
 
-__all__ = [
-    "search_flights",
-    "search_hotels",
-    "create_trip_event",
-    "store_preference",
-    "recall_preferences",
-    "add_itinerary_item",
-    "list_trips",
-]
+Tool modules pull in langchain_core and httpx, so they are imported lazily on
+first attribute access rather than when the package is imported.
+"""
+import importlib
+
+_TOOL_MODULES = {
+    "search_flights": ".flights",
+    "search_hotels": ".hotels",
+    "create_trip_event": ".calendar",
+    "sync_trip_calendar": ".calendar",
+    "store_preference": ".memory",
+    "recall_preferences": ".memory",
+    "add_itinerary_item": ".itinerary",
+    "optimize_itinerary": ".itinerary",
+    "list_trips": ".itinerary",
+}
+
+__all__ = list(_TOOL_MODULES)
+
+
+def __getattr__(name: str):
+    """Import a tool's module the first time the tool is requested."""
+    module_name = _TOOL_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
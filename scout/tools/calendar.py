@@ -1,6 +1,6 @@
 """Google Calendar integration tool."""
 from langchain_core.tools import tool
-import os
+from scout.config.settings import settings
 
 
 @tool
@@ -24,29 +24,15 @@ def create_trip_event(
         dict with "event_id" and "link" to calendar event
     """
     try:
-        from google.oauth2.credentials import Credentials
-        from googleapiclient.discovery import build
-        from google.auth.transport.requests import Request
-        from google_auth_oauthlib.flow import InstalledAppFlow
+        from scout.calendar_sync import CalendarAuthError, get_calendar_service
 
-        SCOPES = ["https://www.googleapis.com/auth/calendar"]
-        creds = None
-
-        # Check if we have stored credentials
-        if os.path.exists("token.json"):
-            creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-
-        # If there are no (valid) credentials available, return instructions
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                return {
-                    "error": "Google Calendar authentication required. Run setup first.",
-                    "instructions": "Please authenticate with Google Calendar",
-                }
-
-        service = build("calendar", "v3", credentials=creds)
+        try:
+            service = get_calendar_service()
+        except CalendarAuthError as e:
+            return {
+                "error": str(e),
+                "instructions": "Please authenticate with Google Calendar",
+            }
 
         event = {
             "summary": title,
@@ -56,7 +42,7 @@ def create_trip_event(
             "end": {"date": end_date},
         }
 
-        result = service.events().insert(calendarId="primary", body=event).execute()
+        result = service.events().insert(calendarId=settings.GOOGLE_CALENDAR_ID, body=event).execute()
         return {"event_id": result["id"], "link": result.get("htmlLink", "")}
 
     except ImportError:
@@ -66,3 +52,34 @@ def create_trip_event(
         }
     except Exception as e:
         return {"error": f"Failed to create calendar event: {str(e)}"}
+
+
+@tool
+def sync_trip_calendar(trip_id: int) -> dict:
+    """Sync every itinerary item of a trip to Google Calendar.
+
+    Only items added, changed or removed since the last sync are sent.
+
+    Args:
+        trip_id: ID of the trip
+
+    Returns:
+        dict with counts of inserted, updated, deleted and unchanged events
+    """
+    try:
+        from scout.calendar_sync import CalendarAuthError, sync_trip
+
+        try:
+            return sync_trip(trip_id)
+        except CalendarAuthError as e:
+            return {
+                "error": str(e),
+                "instructions": "Please authenticate with Google Calendar",
+            }
+    except ImportError:
+        return {
+            "error": "Google Calendar libraries not installed",
+            "instructions": "Install with: pip install google-api-python-client google-auth-oauthlib",
+        }
+    except Exception as e:
+        return {"error": f"Failed to sync trip calendar: {str(e)}"}
@@ -4,6 +4,9 @@ from typing import Optional
 import httpx
 import os
 
+# Overridable so benchmarks and tests can point at a local stand-in
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search")
+
 
 @tool
 def search_flights(
@@ -45,7 +48,7 @@ def search_flights(
     }
 
     try:
-        response = httpx.get("https://serpapi.com/search", params=params, timeout=30.0)
+        response = httpx.get(SERPAPI_URL, params=params, timeout=30.0)
         response.raise_for_status()
         data = response.json()
 
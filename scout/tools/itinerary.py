@@ -1,6 +1,8 @@
 """Itinerary management tools."""
 from langchain_core.tools import tool
 from scout.api.models import get_db, ItineraryItemCreate
+from scout.api.writer import write
+from scout.planning.conflicts import check_new_item
 
 @tool
 def add_itinerary_item(
@@ -26,16 +28,51 @@ def add_itinerary_item(
         cost: Price in USD
     """
     try:
-        conn = get_db()
-        cursor = conn.execute("""
+        item_id = write("""
             INSERT INTO itinerary_items 
             (trip_id, title, description, item_type, start_datetime, end_datetime, location, cost)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (trip_id, title, description, item_type, start_datetime, end_datetime, location, cost))
-        conn.commit()
-        item_id = cursor.lastrowid
+        """, (trip_id, title, description, item_type, start_datetime, end_datetime, location, cost)).lastrowid
+        conn = get_db()
+        row = dict(conn.execute("SELECT * FROM itinerary_items WHERE id = ?", (item_id,)).fetchone())
+        conflicts = check_new_item(conn, row)
         conn.close()
-        return {"status": "success", "item_id": item_id, "message": f"Added {title} to itinerary"}
+        result = {"status": "success", "item_id": item_id, "message": f"Added {title} to itinerary"}
+        if conflicts:
+            clashes = ", ".join(c["titles"][1] for c in conflicts)
+            result["conflicts"] = conflicts
+            result["message"] += f" (overlaps with: {clashes})"
+        return result
+    except Exception as e:
+        return {"error": str(e)}
+
+@tool
+def optimize_itinerary(trip_id: int, apply: bool = False) -> dict:
+    """Reorder each day's activities to minimise travel between stops.
+
+    Flights, transport, dining reservations and hotel check-ins keep their
+    times; activities between them are reshuffled into the same time slots.
+
+    Args:
+        trip_id: ID of the trip
+        apply: Save the new order; by default it is only previewed, so
+            show it to the user and apply it once they agree
+    """
+    try:
+        from scout.planning.optimizer import optimize_trip
+
+        result = optimize_trip(trip_id, apply=apply)
+        if result is None:
+            return {"error": f"Trip {trip_id} not found"}
+        return {
+            "status": "success",
+            "applied": result["applied"],
+            "distance_km_saved": result["distance_km_saved"],
+            "days": [
+                {"date": day["date"], "order": [item["title"] for item in day["items"]]}
+                for day in result["days"]
+            ],
+        }
     except Exception as e:
         return {"error": str(e)}
 
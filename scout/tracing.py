@@ -0,0 +1,239 @@
+"""Per-run tracing of graph nodes, LLM calls and tool calls.
+
+A run is opened with ``start_run()``; code inside it records timed spans with
+``span()``. Spans are buffered in memory for the duration of the run and
+written to the configured sinks in one batch when it ends, so tracing adds no
+I/O to the hot path. Outside a run, ``span()`` is a no-op.
+
+    with start_run() as run:
+        with span("node", "research") as s:
+            ...
+            s.set(tokens=812)
+"""
+import contextvars
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+from scout.config.settings import settings
+from scout.metrics import observe_run
+
+logger = logging.getLogger(__name__)
+
+_current_run = contextvars.ContextVar("scout_trace_run", default=None)
+_current_span = contextvars.ContextVar("scout_trace_span", default=None)
+
+
+class Span:
+    """A timed operation within a run."""
+
+    __slots__ = ("span_id", "parent_id", "kind", "name", "started_at", "duration_ms", "status", "attributes")
+
+    def __init__(self, kind: str, name: str, parent_id: Optional[str], attributes: dict):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.kind = kind
+        self.name = name
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.status = "ok"
+        self.attributes = attributes
+
+    def set(self, **attributes) -> None:
+        """Attach attributes such as token counts or cache outcome."""
+        self.attributes.update(attributes)
+
+    def to_dict(self, run_id: str) -> dict:
+        return {
+            "run_id": run_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set(self, **attributes) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class RunTrace:
+    """Spans collected for one agent run."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.spans = []
+
+    def to_dicts(self) -> list:
+        return [s.to_dict(self.run_id) for s in self.spans]
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes):
+    """Record a span for the enclosed block in the current run."""
+    run = _current_run.get()
+    if run is None:
+        yield _NOOP
+        return
+    current = Span(kind, name, _current_span.get(), attributes)
+    token = _current_span.set(current.span_id)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes.setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - start) * 1000
+        _current_span.reset(token)
+        # list.append is atomic, so spans from worker threads need no lock
+        run.spans.append(current)
+
+
+def record_span(kind: str, name: str, duration_ms: float, **attributes) -> None:
+    """Record an already-timed operation that ended just now."""
+    run = _current_run.get()
+    if run is None:
+        return
+    recorded = Span(kind, name, _current_span.get(), attributes)
+    recorded.duration_ms = duration_ms
+    recorded.started_at = time.time() - duration_ms / 1000
+    run.spans.append(recorded)
+
+
+def traced(kind: str, name: str, fn):
+    """Wrap a graph node so each call is recorded as a span."""
+    def wrapper(state):
+        with span(kind, name):
+            return fn(state)
+
+    wrapper.__name__ = getattr(fn, "__name__", name)
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+def current_run_id() -> Optional[str]:
+    run = _current_run.get()
+    return run.run_id if run else None
+
+
+@contextmanager
+def start_run(run_id: Optional[str] = None, name: str = "run", sinks: Optional[list] = None, **attributes):
+    """Open a run, record a root span and flush all spans when it ends.
+
+    Args:
+        run_id: ID for the run; generated when omitted
+        name: Name of the root span
+        sinks: Callables receiving the list of span dicts; defaults to the
+            sinks named in ``SCOUT_TRACE_SINKS``
+    """
+    run = RunTrace(run_id or uuid.uuid4().hex)
+    token = _current_run.set(run)
+    try:
+        with span("run", name, **attributes):
+            yield run
+    finally:
+        _current_run.reset(token)
+        spans = run.to_dicts()
+        observe_run(spans)
+        for sink in default_sinks() if sinks is None else sinks:
+            try:
+                sink(spans)
+            except Exception:
+                logger.exception("Failed to write trace for run %s", run.run_id)
+
+
+# Seconds between trace_spans retention sweeps of a database
+PRUNE_INTERVAL_SECONDS = 3600
+
+_last_pruned = {}
+
+
+def sqlite_sink(spans: list) -> None:
+    """Write spans to the trace_spans table of the dashboard database.
+
+    At most once per ``PRUNE_INTERVAL_SECONDS`` per database, the same batch
+    also deletes spans older than ``SCOUT_TRACE_RETENTION_DAYS``.
+    """
+    from scout.api.models import database_path
+    from scout.api.writer import write_many
+
+    statements = [
+        ("""
+            INSERT INTO trace_spans
+            (run_id, span_id, parent_id, kind, name, started_at, duration_ms, status, attributes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (s["run_id"], s["span_id"], s["parent_id"], s["kind"], s["name"],
+              s["started_at"], s["duration_ms"], s["status"], json.dumps(s["attributes"], default=str)))
+        for s in spans
+    ]
+    db = database_path()
+    now = time.time()
+    if settings.TRACE_RETENTION_DAYS > 0 and now - _last_pruned.get(db, 0) >= PRUNE_INTERVAL_SECONDS:
+        _last_pruned[db] = now
+        statements.append((
+            "DELETE FROM trace_spans WHERE started_at < ?", (now - settings.TRACE_RETENTION_DAYS * 86400,)
+        ))
+    write_many(statements)
+
+
+def ndjson_sink(spans: list) -> None:
+    """Append spans to the NDJSON trace file, one span per line."""
+    path = settings.TRACE_NDJSON_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a") as f:
+        for s in spans:
+            f.write(json.dumps(s, default=str) + "\n")
+
+
+SINKS = {"sqlite": sqlite_sink, "ndjson": ndjson_sink}
+
+
+def default_sinks() -> list:
+    names = [n.strip() for n in settings.TRACE_SINKS.split(",") if n.strip()]
+    return [SINKS[n] for n in names if n in SINKS]
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def stage_report(spans) -> list:
+    """Aggregate span durations into count, p50, p95 and max per stage.
+
+    Args:
+        spans: Iterable of (kind, name, duration_ms) tuples
+    """
+    stages = {}
+    for kind, name, duration_ms in spans:
+        stages.setdefault((kind, name), []).append(duration_ms)
+    return [
+        {
+            "kind": kind,
+            "name": name,
+            "count": len(durations),
+            "p50_ms": round(percentile(durations, 50), 3),
+            "p95_ms": round(percentile(durations, 95), 3),
+            "max_ms": round(max(durations), 3),
+        }
+        for (kind, name), durations in sorted(stages.items())
+    ]
@@ -1,24 +1,59 @@
 """FastAPI server for Scout dashboard."""
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, PlainTextResponse
+from scout.api.assets import PrecompressedStaticFiles, shell_path
+from scout.api.models import init_db
+from scout.api.writer import close_writer
+from scout import metrics
+from scout.api.shards import ShardMiddleware
+from scout.config.settings import settings
 from scout.api.routes import router
 import os
 
-app = FastAPI(title="Scout Travel Dashboard", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare the database once at startup instead of at import time.
+
+    Per-user shards are created and migrated on first use instead.
+    """
+    if not settings.SHARD_BY_USER:
+        init_db()
+    scheduler = None
+    if settings.PRICE_WATCH_ENABLED:
+        from scout.api.price_watch import Scheduler
+
+        scheduler = Scheduler()
+        scheduler.start()
+    yield
+    if scheduler is not None:
+        scheduler.stop()
+    close_writer()
+
+
+app = FastAPI(title="Scout Travel Dashboard", version="1.0.0", lifespan=lifespan)
+app.add_middleware(ShardMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Mount API routes
 app.include_router(router, prefix="/api")
 
-# Serve static files
+# Serve static files (prebuilt by `python -m scout.api.assets` when available)
 static_dir = os.path.join(os.path.dirname(__file__), "static")
+static_files = PrecompressedStaticFiles(directory=static_dir, check_dir=False)
 if os.path.exists(static_dir):
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    app.mount("/static", static_files, name="static")
 
 
 @app.get("/")
-async def root():
-    return FileResponse(os.path.join(static_dir, "index.html"))
+async def root(request: Request):
+    return await static_files.get_response(shell_path(static_dir), request.scope)
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.get("/favicon.ico", include_in_schema=False)
@@ -0,0 +1,23 @@
+"""Shared fixtures for Scout tests."""
+import pytest
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Point the dashboard database at a fresh temporary file."""
+    from scout.api import models
+
+    path = str(tmp_path / "scout.db")
+    monkeypatch.setattr(models, "DB_PATH", path)
+    models.init_db()
+    return path
+
+
+@pytest.fixture
+def client(db_path):
+    """FastAPI test client running the app lifespan against the temp database."""
+    from fastapi.testclient import TestClient
+    import server
+
+    with TestClient(server.app) as test_client:
+        yield test_client
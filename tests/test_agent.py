@@ -1,8 +1,11 @@
 """Tests for Scout agent workflow."""
+import time
+
 import pytest
 from scout.agent.state import TravelState
-from scout.agent.nodes import should_use_tools
-from langchain_core.messages import HumanMessage, AIMessage
+from scout.agent.nodes import should_use_tools, route_after_research
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.tools import tool
 
 
 def test_travel_state_schema():
@@ -48,4 +51,241 @@ def test_should_use_tools_no_tools():
     assert result == "compare"
 
 
-# More comprehensive tests would require mocking the LLM
+def _search_turn(text, hotels):
+    """Messages for one turn in which research searched hotels, plus matching state."""
+    messages = [
+        HumanMessage(content=text),
+        AIMessage(content="", tool_calls=[{"id": "c1", "name": "search_hotels", "args": {}}]),
+        ToolMessage(content="hotels (...)", tool_call_id="c1", name="search_hotels"),
+        AIMessage(content="Here is what I found"),
+    ]
+    handles = [f"H{i + 1}" for i in range(hotels)]
+    return {
+        "messages": messages,
+        "hotel_options": handles,
+        "flight_options": [],
+        "side_store": {h: {"name": h} for h in handles},
+    }
+
+
+def test_route_after_research_decisions():
+    """Research hands off to the cheapest path that still answers the user."""
+    assert route_after_research(_search_turn("Tokyo in March", hotels=3)) == "compare"
+    assert route_after_research(_search_turn("Tokyo in March", hotels=1)) == "finalize"
+    assert route_after_research(_search_turn("Book H2 please", hotels=3)) == "compare_finalize"
+
+    question = {
+        "messages": [HumanMessage(content="Do I need a visa?"), AIMessage(content="No")],
+        "hotel_options": ["H1", "H2"],
+        "side_store": {"H1": {}, "H2": {}},
+    }
+    assert route_after_research(question) == "end"
+
+    calling = _search_turn("Tokyo in March", hotels=3)
+    calling["messages"].append(AIMessage(content="", tool_calls=[{"id": "c2", "name": "search_flights", "args": {}}]))
+    assert route_after_research(calling) == "tools"
+
+
+
+class ScriptedModel:
+    """Stand-in for the Gemini model: searches hotels once per turn, then answers."""
+
+    def __init__(self):
+        self.calls = []
+
+    def invoke(self, messages):
+        self.calls.append(list(messages))
+        last_human = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        system = messages[0].content
+        searched = any(isinstance(m, ToolMessage) for m in messages[last_human:])
+        if "researching" in system and not searched:
+            return AIMessage(
+                content="",
+                tool_calls=[{
+                    "id": f"call-{len(self.calls)}",
+                    "name": "search_hotels",
+                    "args": {"destination": "Tokyo", "checkin": "2025-03-15", "checkout": "2025-03-22"},
+                }],
+            )
+        return AIMessage(content=f"reply {len(self.calls)}")
+
+
+@pytest.fixture
+def scripted_agent(monkeypatch):
+    from langgraph.checkpoint.memory import InMemorySaver
+    from scout.agent import nodes
+    from scout.agent.graph import create_agent
+    from scout.agent.tool_cache import shared_cache
+    from scout.tools.hotels import search_hotels
+
+    searches = []
+
+    @tool("search_hotels")
+    def counting_search_hotels(destination: str, checkin: str, checkout: str) -> dict:
+        """Search hotels and count the calls."""
+        searches.append(destination)
+        return search_hotels.invoke({"destination": destination, "checkin": checkin, "checkout": checkout})
+
+    model = ScriptedModel()
+    monkeypatch.setattr(nodes, "get_model_with_tools", lambda: model)
+    shared_cache.clear()
+    agent = create_agent(tools=[counting_search_hotels], checkpointer=InMemorySaver())
+    return agent, searches
+
+
+def test_follow_up_turn_resumes_thread(scripted_agent):
+    """A second turn on the same thread sees the first turn and reuses its search."""
+    agent, searches = scripted_agent
+    config = {"configurable": {"thread_id": "trip-1"}}
+
+    agent.invoke({"messages": [HumanMessage(content="Tokyo in March")], "stage": "intake"}, config)
+    first_turn = agent.get_state(config).values
+    assert len(first_turn["tool_cache"]) == 1
+
+    result = agent.invoke({"messages": [HumanMessage(content="Cheaper please")], "stage": "intake"}, config)
+
+    contents = [m.content for m in result["messages"] if isinstance(m, HumanMessage)]
+    assert contents == ["Tokyo in March", "Cheaper please"]
+    tool_messages = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert len(tool_messages) == 2
+    assert searches == ["Tokyo"]
+
+
+def test_resumed_thread_ignores_expired_searches(scripted_agent, monkeypatch):
+    """Thread-cached results past the cache TTL are searched again."""
+    from scout.agent import tool_cache
+
+    agent, searches = scripted_agent
+    config = {"configurable": {"thread_id": "trip-old"}}
+    agent.invoke({"messages": [HumanMessage(content="Tokyo in March")], "stage": "intake"}, config)
+    tool_cache.shared_cache.clear()
+
+    later = time.time() + tool_cache.settings.TOOL_CACHE_TTL_SECONDS + 1
+    monkeypatch.setattr(tool_cache.time, "time", lambda: later)
+    agent.invoke({"messages": [HumanMessage(content="Cheaper please")], "stage": "intake"}, config)
+
+    assert searches == ["Tokyo", "Tokyo"]
+    assert all(entry[0] == later for entry in agent.get_state(config).values["tool_cache"].values())
+
+
+def test_thread_cache_reducer_caps_entries(monkeypatch):
+    from scout.agent.tool_cache import merge_thread_cache, settings
+
+    monkeypatch.setattr(settings, "TOOL_CACHE_MAX_PER_THREAD", 2)
+    now = time.time()
+    left = {"a": [now - 3, "A"], "b": [now - 2, "B"], "stale": [now - 10 ** 6, "S"], "legacy": {"flights": []}}
+
+    assert merge_thread_cache(left, {"c": [now, "C"]}) == {"b": [now - 2, "B"], "c": [now, "C"]}
+
+
+def test_follow_up_run_starts_a_fresh_side_store(scripted_agent, monkeypatch, db_path):
+    """Each run drops earlier rows, keeping the latest options' handles resolvable."""
+    import main
+    from scout.agent import graph
+
+    agent, _ = scripted_agent
+    monkeypatch.setattr(graph, "get_agent", lambda: agent)
+    monkeypatch.setattr(type(main.settings), "GOOGLE_API_KEY", "test")
+    for text in ("Tokyo in March", "Cheaper please", "Something central"):
+        main.run_scout(text, thread_id="trip-4", raise_errors=True)
+
+    state = agent.get_state({"configurable": {"thread_id": "trip-4"}}).values
+    assert sorted(state["side_store"]) == sorted(state["hotel_options"] + ["H4", "H5", "H6"])
+    assert len(state["side_store"]) == 6
+
+
+def test_merge_dicts_reset():
+    from scout.agent.state import RESET, merge_dicts
+
+    assert merge_dicts({"F1": 1}, {"F2": 2}) == {"F1": 1, "F2": 2}
+    assert merge_dicts({"F1": 1, "H1": 3}, {RESET: True, "H1": 3}) == {"H1": 3}
+
+
+def test_prune_checkpoints_bounds_store(tmp_path, monkeypatch):
+    """Pruning keeps only the newest checkpoints of the most recent threads."""
+    import sqlite3
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    from scout.agent import checkpoint, nodes
+    from scout.agent.graph import create_agent
+
+    saver = SqliteSaver(sqlite3.connect(tmp_path / "cp.db", check_same_thread=False))
+    monkeypatch.setattr(checkpoint, "_checkpointer", saver)
+    monkeypatch.setattr(nodes, "get_model_with_tools", lambda: ScriptedModel())
+    agent = create_agent(tools=[], checkpointer=saver)
+    for thread in ("a", "b", "c"):
+        config = {"configurable": {"thread_id": thread}}
+        agent.invoke({"messages": [HumanMessage(content="hi")], "stage": "intake"}, config)
+
+    assert checkpoint.prune_checkpoints(keep_per_thread=1, max_threads=2) > 0
+
+    rows = saver.conn.execute("SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id").fetchall()
+    assert sorted(rows) == [("b", 1), ("c", 1)]
+    assert agent.get_state({"configurable": {"thread_id": "c"}}).values["messages"]
+
+
+def test_search_results_are_encoded_with_handles(scripted_agent):
+    """Hotel rows reach the model as a table; full records stay in the side store."""
+    agent, _ = scripted_agent
+    config = {"configurable": {"thread_id": "trip-2"}}
+
+    result = agent.invoke({"messages": [HumanMessage(content="Tokyo in March")], "stage": "intake"}, config)
+
+    table = next(m for m in result["messages"] if isinstance(m, ToolMessage)).content
+    assert table.splitlines()[0].startswith("hotels (3 rows")
+    assert "H1|" in table
+    assert result["hotel_options"] == ["H1", "H2", "H3"]
+    assert result["side_store"]["H2"]["name"] == "Budget Stay Tokyo"
+
+
+def test_prefetch_serves_research_search(scripted_agent):
+    """Searches predicted after intake are reused by the tools node."""
+    from scout.agent.prefetch import prefetch_stats
+
+    agent, searches = scripted_agent
+    config = {"configurable": {"thread_id": "trip-3"}}
+
+    agent.invoke(
+        {"messages": [HumanMessage(content="Tokyo 2025-03-15 to 2025-03-22")], "stage": "intake"},
+        config,
+    )
+
+    assert searches == ["Tokyo"]
+    stats = prefetch_stats()
+    assert stats["issued"] == 1
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 1.0
+
+
+def test_prefetch_hits_are_counted_under_their_own_label(scripted_agent):
+    from scout import metrics
+    from scout.tracing import start_run
+
+    agent, _ = scripted_agent
+    metrics.reset()
+    with start_run(sinks=[]):
+        agent.invoke(
+            {"messages": [HumanMessage(content="Tokyo 2025-03-15 to 2025-03-22")], "stage": "intake"},
+            {"configurable": {"thread_id": "trip-5"}},
+        )
+
+    assert metrics.CACHE_HITS.value("prefetch") == 1
+    assert metrics.CACHE_HITS.value("tool") == 0
+
+
+def test_choosing_an_option_skips_separate_compare(scripted_agent):
+    """Once the user picks a handle, confirming and finalizing share one LLM call."""
+    from scout.agent import nodes
+
+    agent, _ = scripted_agent
+    model = nodes.get_model_with_tools()
+    config = {"configurable": {"thread_id": "trip-4"}}
+    agent.invoke({"messages": [HumanMessage(content="Tokyo in March")], "stage": "intake"}, config)
+    model.calls.clear()
+
+    result = agent.invoke({"messages": [HumanMessage(content="Book H2")], "stage": "intake"}, config)
+
+    systems = [call[0].content for call in model.calls]
+    assert not any(s.startswith("Present the flight and hotel options") for s in systems)
+    assert "chosen H2" in systems[-1]
+    assert result["selected_hotel"]["id"] == "H2"
+    assert result["stage"] == "complete"
@@ -0,0 +1,95 @@
+"""Tests for the spending analytics engine and columnar export."""
+import pytest
+
+from scout.api import analytics
+
+
+def _seed(client):
+    trips = [
+        client.post("/api/trips", json={
+            "name": name, "destination": destination, "start_date": "2025-01-01",
+            "end_date": "2025-01-05", "budget": budget, "travelers": travelers,
+        }).json()
+        for name, destination, budget, travelers in [
+            ("Tokyo spring", "Tokyo", 1000, 2), ("Paris", "Paris", 100, 1), ("Tokyo fall", "Tokyo", None, 2),
+        ]
+    ]
+    items = [
+        (0, "flight", "2025-01-01T08:00:00", 600), (0, "dining", "2025-02-03T19:00:00", 50),
+        (1, "hotel", "2025-01-10T15:00:00", 300), (2, "activity", "2025-02-01T10:00:00", 40),
+        (2, "activity", "2025-02-02T10:00:00", None),
+    ]
+    for trip, item_type, start, cost in items:
+        client.post("/api/itinerary", json={
+            "trip_id": trips[trip]["id"], "title": item_type, "item_type": item_type,
+            "start_datetime": start, "cost": cost,
+        })
+    return trips
+
+
+def test_report_groups_spend(client):
+    trips = _seed(client)
+
+    report = client.get("/api/analytics").json()
+
+    assert report["items"] == 5 and report["total_spend"] == 990
+    assert report["by_month"] == [
+        {"month": "2025-01", "spend": 900, "items": 2}, {"month": "2025-02", "spend": 90, "items": 3}
+    ]
+    assert {row["destination"]: row["spend"] for row in report["by_destination"]} == {"Paris": 300, "Tokyo": 690}
+    assert {row["item_type"]: row["items"] for row in report["by_item_type"]}["activity"] == 2
+    assert report["by_travelers"] == [
+        {"travelers": 1, "trips": 1, "spend": 300, "per_traveler": 300},
+        {"travelers": 2, "trips": 2, "spend": 690, "per_traveler": 172.5},
+    ]
+    budget = report["budget_vs_actual"]
+    assert budget["over_budget"] == 1 and budget["with_budget"] == 2
+    assert [t["trip_id"] for t in budget["trips_by_variance"]] == [trips[1]["id"], trips[0]["id"], trips[2]["id"]]
+    assert budget["trips_by_variance"][0]["variance"] == -200
+    assert budget["trips_by_variance"][2]["variance"] is None
+
+
+def test_report_date_filter_and_cache_invalidation(client):
+    trips = _seed(client)
+
+    february = client.get("/api/analytics", params={"start": "2025-02-01", "end": "2025-02-28"}).json()
+    cached = analytics.load()
+    assert analytics.load() is cached
+    client.post("/api/itinerary", json={
+        "trip_id": trips[1]["id"], "title": "Museum", "item_type": "activity",
+        "start_datetime": "2025-02-10T10:00:00", "cost": 20,
+    })
+    after = client.get("/api/analytics", params={"start": "2025-02-01"}).json()
+
+    assert february["items"] == 3 and february["total_spend"] == 90
+    assert after["items"] == 4 and after["total_spend"] == 110
+    assert analytics.load() is not cached
+
+
+def test_report_on_empty_database(client):
+    report = client.get("/api/analytics").json()
+
+    assert report["items"] == 0 and report["by_month"] == [] and report["budget_vs_actual"]["trips"] == 0
+
+
+def test_export_rejects_unknown_table(client):
+    assert client.get("/api/analytics/export", params={"table": "trace_spans"}).status_code == 400
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_streams_columnar_tables(client, fmt):
+    pa = pytest.importorskip("pyarrow")
+    _seed(client)
+
+    response = client.get("/api/analytics/export", params={"table": "itinerary_items", "format": fmt})
+
+    assert response.status_code == 200
+    if fmt == "parquet":
+        import io
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(io.BytesIO(response.content))
+    else:
+        table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 5
+    assert table.schema.field("cost").type == pa.float64()
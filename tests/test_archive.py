@@ -0,0 +1,90 @@
+"""Tests for archiving finished trips into the attached archive database."""
+import os
+import sqlite3
+
+from scout.api import archive
+from scout.api.models import get_db
+
+
+def _trip(client, name, end_date, status):
+    trip = client.post("/api/trips", json={
+        "name": name, "destination": name, "start_date": "2020-01-01", "end_date": end_date,
+    }).json()
+    client.put(f"/api/trips/{trip['id']}", json={"status": status})
+    client.post("/api/itinerary", json={
+        "trip_id": trip["id"], "title": f"{name} tour", "item_type": "activity",
+        "start_datetime": "2020-01-02T10:00:00",
+    })
+    conn = get_db()
+    conn.execute("INSERT INTO chat_messages (trip_id, role, content) VALUES (?, 'user', 'hi')", (trip["id"],))
+    conn.commit()
+    conn.close()
+    return trip
+
+
+def _count(table, schema="main", path=None):
+    conn = sqlite3.connect(path) if path else get_db()
+    count = conn.execute(f"SELECT COUNT(*) FROM {schema}.{table}").fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_archives_old_finished_trips_in_batches(client):
+    for i in range(3):
+        _trip(client, f"Old {i}", "2020-01-05", "completed")
+    cancelled = _trip(client, "Cancelled", "2020-01-05", "cancelled")
+    recent = _trip(client, "Recent", "2999-01-05", "completed")
+    live = _trip(client, "Live", "2020-01-05", "planning")
+
+    summary = archive.archive_trips(older_than_days=30, batch_size=2)
+
+    assert summary["trips"] == 4 and summary["itinerary_items"] == 4 and summary["chat_messages"] == 4
+    assert summary["batches"] == 2
+    assert {t["id"] for t in client.get("/api/trips").json()} == {recent["id"], live["id"]}
+    assert _count("trips", path=archive.archive_path()) == 4
+    assert _count("chat_messages") == 2
+    assert client.get(f"/api/trips/{cancelled['id']}").status_code == 404
+    # A second run finds nothing left to move
+    assert archive.archive_trips(older_than_days=30)["trips"] == 0
+
+
+def test_include_archived_unions_the_archive(client):
+    archived = _trip(client, "Kyoto", "2020-01-05", "completed")
+    live = _trip(client, "Oslo", "2020-01-05", "booked")
+    archive.archive_trips(older_than_days=30)
+
+    trips = client.get("/api/trips", params={"include_archived": True}).json()
+    completed = client.get("/api/trips", params={"status": "completed", "include_archived": True}).json()
+    one = client.get(f"/api/trips/{archived['id']}", params={"include_archived": True}).json()
+    items = client.get(f"/api/trips/{archived['id']}/itinerary", params={"include_archived": True}).json()
+    events = client.get("/api/calendar", params={"include_archived": True}).json()
+
+    assert {t["id"] for t in trips} == {archived["id"], live["id"]}
+    assert [t["name"] for t in completed] == ["Kyoto"]
+    assert one["name"] == "Kyoto" and "archived_at" not in one
+    assert [i["title"] for i in items] == ["Kyoto tour"]
+    assert {e["extendedProps"]["trip_name"] for e in events} == {"Kyoto", "Oslo"}
+    assert client.get(f"/api/trips/{archived['id']}/itinerary").json() == []
+
+
+def test_include_archived_without_archive_file(client):
+    _trip(client, "Rome", "2999-01-05", "planning")
+
+    trips = client.get("/api/trips", params={"include_archived": True}).json()
+
+    assert [t["name"] for t in trips] == ["Rome"]
+    assert not os.path.exists(archive.archive_path())
+
+
+def test_archive_picks_up_new_hot_columns(db_path):
+    conn = get_db()
+    conn.isolation_level = None
+    archive.attach(conn, create=True)
+    conn.execute("ALTER TABLE main.trips ADD COLUMN cover_url TEXT")
+    conn.execute("DETACH DATABASE archive")
+    archive.attach(conn, create=True)
+
+    columns = [row[1] for row in conn.execute("PRAGMA archive.table_info(trips)")]
+    conn.close()
+
+    assert "cover_url" in columns and "archived_at" in columns
@@ -0,0 +1,76 @@
+"""Tests for the dashboard asset build and precompressed static serving."""
+import gzip
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from scout.api import assets
+
+SHELL = """<html><head>
+<script src="https://cdn.example/lib.js"></script>
+<script>window.config = {dark: true};</script>
+<style>body { color: red; }</style>
+</head><body><script>console.log(window.config);</script></body></html>
+"""
+
+
+def _build(tmp_path):
+    static = tmp_path / "static"
+    static.mkdir()
+    (static / "index.html").write_text(SHELL)
+    manifest = assets.build(str(static / "index.html"), str(static / assets.DIST))
+    return static, manifest
+
+
+def test_build_splits_and_hashes_inline_assets(tmp_path):
+    static, manifest = _build(tmp_path)
+    shell = (static / "dist" / "index.html").read_text()
+
+    names = [name for name in manifest if name != "index.html"]
+    assert len(names) == 3 and all(assets.cache_control(name) == assets.IMMUTABLE for name in names)
+    assert "<style>" not in shell and "window.config = " not in shell
+    # External scripts stay put and extracted ones keep their position
+    assert shell.index("cdn.example") < shell.index(".js") < shell.index(".css")
+    css = next(name for name in names if name.endswith(".css"))
+    assert gzip.decompress((static / "dist" / f"{css}.gz").read_bytes()) == b"body { color: red; }\n"
+    assert manifest[css]["gzip"] == len((static / "dist" / f"{css}.gz").read_bytes())
+
+
+def test_accepted_encodings_honours_q_zero():
+    assert assets.accepted_encodings("gzip, deflate, br;q=0") == {"gzip", "deflate"}
+    assert assets.accepted_encodings("") == set()
+
+
+def test_serves_precompressed_variants_with_cache_headers(tmp_path):
+    static, manifest = _build(tmp_path)
+    files = assets.PrecompressedStaticFiles(directory=str(static))
+    app = FastAPI()
+    app.mount("/static", files)
+
+    @app.get("/")
+    async def root(request: Request):
+        return await files.get_response(assets.shell_path(str(static)), request.scope)
+
+    js = next(name for name in manifest if name.endswith(".js"))
+    with TestClient(app) as client:
+        hashed = client.get(f"/static/dist/{js}", headers={"Accept-Encoding": "gzip"})
+        plain = client.get(f"/static/dist/{js}", headers={"Accept-Encoding": "identity"})
+        shell = client.get("/", headers={"Accept-Encoding": "gzip"})
+        revalidated = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": shell.headers["etag"]})
+
+    assert hashed.headers["content-encoding"] == "gzip"
+    assert hashed.headers["content-type"].startswith(("text/javascript", "application/javascript"))
+    assert hashed.headers["cache-control"] == assets.IMMUTABLE
+    assert hashed.headers["vary"] == "Accept-Encoding"
+    assert hashed.content == plain.content  # the client decoded the gzip body
+    assert "content-encoding" not in plain.headers
+    assert shell.headers["cache-control"] == assets.REVALIDATE
+    assert "/static/dist/" in shell.text
+    assert revalidated.status_code == 304
+
+
+def test_dashboard_root_falls_back_to_source_shell(client):
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == assets.REVALIDATE
@@ -0,0 +1,104 @@
+"""Tests for batch trip planning."""
+import json
+import threading
+
+import pytest
+
+from scout.batch import load_requests, process_batch
+
+
+def echo_runner(request, user_id="default", thread_id=None):
+    if "fail" in request:
+        raise RuntimeError("planning failed")
+    return f"planned: {request} for {user_id}"
+
+
+def _write_requests(path, requests):
+    path.write_text("\n".join(json.dumps(r) for r in requests) + "\n")
+
+
+def _results(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_load_requests_assigns_ids(tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text('{"request": "Tokyo"}\n\n{"id": 7, "content": "Paris", "user_id": "bob"}\n')
+
+    assert load_requests(str(path)) == [
+        {"id": "line-1", "request": "Tokyo", "user_id": "default"},
+        {"id": "7", "request": "Paris", "user_id": "bob"},
+    ]
+
+
+def test_batch_streams_results_and_resumes(tmp_path):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_requests(source, [{"id": i, "request": f"trip {i}"} for i in range(10)] + [{"id": "bad", "request": "fail"}])
+    # A previous run finished two requests and was cut off mid-line
+    output.write_text(
+        json.dumps({"id": "0", "status": "ok"}) + "\n" + json.dumps({"id": "1", "status": "ok"}) + "\n" + '{"id": "2", "sta'
+    )
+
+    seen = []
+    summary = process_batch(str(source), str(output), echo_runner, concurrency=4, on_result=seen.append)
+
+    assert summary == {"total": 11, "skipped": 2, "ok": 8, "error": 1}
+    assert len(seen) == 9
+    failed = next(r for r in seen if r["id"] == "bad")
+    assert failed["status"] == "error" and "planning failed" in failed["error"]
+
+    # Only the failed request is retried on the next run
+    summary = process_batch(str(source), str(output), echo_runner, concurrency=4)
+    assert summary == {"total": 11, "skipped": 10, "ok": 0, "error": 1}
+
+
+def test_batch_respects_concurrency(tmp_path):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_requests(source, [{"request": f"trip {i}"} for i in range(12)])
+    active, peak, lock = [0], [0], threading.Lock()
+    gate = threading.Event()
+
+    def slow_runner(request, user_id="default", thread_id=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        gate.wait(0.02)
+        with lock:
+            active[0] -= 1
+        return thread_id
+
+    process_batch(str(source), str(output), slow_runner, concurrency=3)
+
+    assert peak[0] <= 3
+    results = _results(output)
+    assert all(r["response"] == r["thread_id"] for r in results)
+    assert sorted(r["thread_id"] for r in results)[0].startswith("batch-line-1-")
+
+
+def test_batch_attempts_get_their_own_threads(tmp_path):
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    _write_requests(first, [{"request": "Tokyo"}])
+    _write_requests(second, [{"request": "Paris"}])
+    output = tmp_path / "out.jsonl"
+
+    process_batch(str(first), str(tmp_path / "a-out.jsonl"), echo_runner)
+    process_batch(str(second), str(output), lambda *a, **k: 1 / 0)
+    process_batch(str(second), str(output), echo_runner)
+
+    threads = [r["thread_id"] for r in _results(tmp_path / "a-out.jsonl") + _results(output)]
+    assert len(set(threads)) == 3
+
+
+def test_batch_process_mode(tmp_path):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_requests(source, [{"request": "Rome", "user_id": "ann"}])
+
+    summary = process_batch(str(source), str(output), echo_runner, concurrency=2, mode="process")
+
+    assert summary["ok"] == 1
+    assert _results(output)[0]["response"] == "planned: Rome for ann"
+
+
+def test_unknown_mode(tmp_path):
+    with pytest.raises(ValueError):
+        process_batch("in", "out", echo_runner, mode="cluster")
@@ -0,0 +1,80 @@
+"""Smoke tests for the offline benchmark harness."""
+from benchmarks import api_bench
+from benchmarks.agent_bench import run_benchmark
+
+
+def test_agent_benchmark_runs_offline(monkeypatch):
+    monkeypatch.setenv("SERPAPI_API_KEY", "offline-benchmark")
+
+    report = run_benchmark(runs=3, concurrency=[1, 2], llm_latency_ms=0, api_latency_ms=0)
+
+    assert [level["concurrency"] for level in report["levels"]] == [1, 2]
+    for level in report["levels"]:
+        assert level["runs_per_sec"] > 0
+        # research twice (tool call, then summary), compare, finalize
+        assert level["llm_calls_per_run"] == 4
+        assert level["tool_calls_per_run"] == 3
+        stages = {(s["kind"], s["name"]) for s in level["stages"]}
+        assert ("node", "tools") in stages and ("tool", "search_flights") in stages
+    assert report["provider_requests"]["/search"] == 6
+
+
+def test_api_benchmark_on_generated_database(tmp_path, monkeypatch):
+    from scout.api import models
+
+    monkeypatch.setattr(models, "DB_PATH", models.DB_PATH)
+
+    report = api_bench.run_benchmark(
+        tier="tiny", requests=10, concurrency=2, db_path=str(tmp_path / "tiny.db")
+    )
+
+    assert report["dataset"]["items"] == 1000
+    assert set(report["endpoints"]) == set(api_bench.ENDPOINTS)
+    for result in report["endpoints"].values():
+        assert result["errors"] == 0
+        assert result["p99_ms"] >= result["p50_ms"] > 0
+    assert all(check["ok"] for check in report["query_plans"]), report["query_plans"]
+
+
+def test_query_plan_check_flags_missing_index(db_path):
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX idx_itinerary_items_trip")
+    conn.close()
+
+    checks = {check["name"]: check["ok"] for check in api_bench.check_query_plans(db_path)}
+
+    assert checks["trip_itinerary"] is False
+    assert checks["trip_itinerary_archived"] is False
+    assert checks["calendar_range"] is True
+    assert checks["calendar_range_archived"] is True
+    assert checks["chat_page"] is True and checks["chat_page_archived"] is True
+
+
+def test_query_plan_checks_use_the_endpoint_sql(db_path, monkeypatch):
+    from scout.api import routes
+
+    checks = {check["name"]: check for check in api_bench.check_query_plans(db_path)}
+    assert all(check["ok"] for check in checks.values()), checks
+    assert "MERGE (UNION ALL)" in checks["trips_by_start_archived"]["plan"]
+
+    # An endpoint sorting on an unindexed column needs a temp B-tree
+    monkeypatch.setattr(routes, "TRIPS_ORDER", "name")
+    checks = {check["name"]: check["ok"] for check in api_bench.check_query_plans(db_path)}
+
+    assert checks["trips_by_start"] is False
+    assert checks["trips_by_start_archived"] is False
+    assert checks["trip_itinerary_archived"] is True
+
+
+def test_shard_benchmark_runs(db_path):
+    from benchmarks.shard_bench import run_benchmark
+    from scout.api import models
+    from scout.config.settings import settings
+
+    report = run_benchmark(tenant_counts=[2], writes=10, threads_per_tenant=1)
+
+    assert [level["tenants"] for level in report["levels"]] == [2]
+    assert report["levels"][0]["sharded_writes_per_sec"] > 0
+    assert models.DB_PATH == db_path and not settings.SHARD_BY_USER
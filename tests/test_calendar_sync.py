@@ -0,0 +1,73 @@
+"""Tests for batched, incremental Google Calendar sync."""
+import pytest
+
+from benchmarks.fakes import FakeProviderServer
+
+
+@pytest.fixture
+def calendar(db_path, monkeypatch):
+    from scout import calendar_sync
+    from scout.config.settings import settings
+
+    with FakeProviderServer() as server:
+        monkeypatch.setattr(settings, "GOOGLE_CALENDAR_API_URL", server.url)
+        calendar_sync.reset_calendar_service()
+        yield server
+    calendar_sync.reset_calendar_service()
+
+
+def _add_items(count):
+    from scout.api.models import get_db
+
+    conn = get_db()
+    trip_id = conn.execute(
+        "INSERT INTO trips (name, destination, start_date, end_date) VALUES ('T', 'Tokyo', '2025-03-15', '2025-03-22')"
+    ).lastrowid
+    for i in range(count):
+        conn.execute(
+            "INSERT INTO itinerary_items (trip_id, title, item_type, start_datetime) VALUES (?, ?, 'activity', ?)",
+            (trip_id, f"Item {i}", f"2025-03-{15 + i % 7:02d}T{9 + i % 10:02d}:00:00"),
+        )
+    conn.commit()
+    conn.close()
+    return trip_id
+
+
+def test_sync_batches_and_sends_only_changes(calendar):
+    from scout.api.models import get_db
+    from scout.calendar_sync import sync_trip
+
+    trip_id = _add_items(30)
+
+    first = sync_trip(trip_id, batch_size=20)
+    assert (first["inserted"], first["batches"], first["errors"]) == (30, 2, [])
+    assert len(calendar.events) == 30
+    assert calendar.requests["/batch/calendar/v3"] == 2
+
+    conn = get_db()
+    conn.execute("UPDATE itinerary_items SET title = 'Renamed' WHERE id = (SELECT MIN(id) FROM itinerary_items)")
+    conn.execute("DELETE FROM itinerary_items WHERE id = (SELECT MAX(id) FROM itinerary_items)")
+    conn.commit()
+    conn.close()
+
+    second = sync_trip(trip_id, batch_size=20)
+    assert (second["updated"], second["deleted"], second["unchanged"], second["batches"]) == (1, 1, 28, 1)
+    assert len(calendar.events) == 29
+    assert "Renamed" in {event["summary"] for event in calendar.events.values()}
+
+    assert sync_trip(trip_id)["batches"] == 0
+
+
+def test_service_is_built_once_per_thread(calendar):
+    from scout.calendar_sync import get_calendar_service
+
+    assert get_calendar_service() is get_calendar_service()
+
+
+def test_sync_endpoint(calendar, client):
+    trip_id = _add_items(3)
+
+    response = client.post(f"/api/trips/{trip_id}/calendar/sync")
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 3
@@ -0,0 +1,60 @@
+"""Tests for chat history paging and compaction."""
+from scout.api import chat_history
+from scout.api.models import get_db
+
+
+def _messages(trip_id, count, created_at="datetime('now')"):
+    conn = get_db()
+    for i in range(count):
+        conn.execute(
+            f"INSERT INTO chat_messages (trip_id, role, content, created_at) VALUES (?, ?, ?, {created_at})",
+            (trip_id, "user" if i % 2 == 0 else "assistant", f"message {i}"),
+        )
+    conn.commit()
+    conn.close()
+
+
+def _trip(client):
+    return client.post("/api/trips", json={
+        "name": "Kyoto", "destination": "Kyoto", "start_date": "2025-04-01", "end_date": "2025-04-08",
+    }).json()
+
+
+def test_pages_back_through_history(client):
+    trip = _trip(client)
+    _messages(trip["id"], 7)
+
+    pages, before = [], None
+    while True:
+        params = {"limit": 3, **({"before": before} if before else {})}
+        page = client.get(f"/api/trips/{trip['id']}/chat", params=params).json()
+        pages.append([m["content"] for m in page["messages"]])
+        before = page["next_cursor"]
+        if before is None:
+            break
+
+    assert pages == [
+        ["message 4", "message 5", "message 6"],
+        ["message 1", "message 2", "message 3"],
+        ["message 0"],
+    ]
+    assert client.get(f"/api/trips/{trip['id']}/chat", params={"before": "@@"}).status_code == 400
+    assert client.get("/api/trips/999/chat").status_code == 404
+
+
+def test_compacts_old_days_into_digests(client):
+    trip = _trip(client)
+    _messages(trip["id"], 4, "datetime('now', '-60 days')")
+    _messages(trip["id"], 2)
+
+    summary = chat_history.compact(older_than_days=30)
+    page = client.get(f"/api/trips/{trip['id']}/chat").json()["messages"]
+
+    assert summary["messages"] == 4 and summary["digests"] == 1
+    assert [m["role"] for m in page] == ["digest", "user", "assistant"]
+    digest = page[0]
+    assert digest["message_count"] == 4 and "- message 0\n- message 2" in digest["content"]
+    original = client.get(f"/api/trips/{trip['id']}/chat/{digest['id']}/transcript").json()
+    assert [m["content"] for m in original] == [f"message {i}" for i in range(4)]
+    assert client.get(f"/api/trips/{trip['id']}/chat/{page[1]['id']}/transcript").status_code == 404
+    assert chat_history.compact(older_than_days=30)["digests"] == 0
@@ -0,0 +1,68 @@
+"""Tests for itinerary conflict detection."""
+import random
+from datetime import datetime, timedelta
+
+from scout.planning.conflicts import item_conflicts, sweep_overlaps
+
+
+def test_sweep_matches_pairwise_check():
+    rng = random.Random(3)
+    base = datetime(2025, 3, 15)
+    intervals = []
+    for key in range(300):
+        start = base + timedelta(minutes=rng.randrange(0, 7 * 24 * 60))
+        intervals.append((start, start + timedelta(minutes=rng.randrange(0, 240)), key))
+
+    expected = {
+        frozenset((a[2], b[2]))
+        for i, a in enumerate(intervals) for b in intervals[i + 1:]
+        if a[0] < b[1] and b[0] < a[1]
+    }
+
+    assert {frozenset(pair) for pair in sweep_overlaps(intervals)} == expected
+
+
+def test_back_to_back_items_do_not_conflict():
+    items = [
+        {"id": 1, "trip_id": 1, "title": "Flight", "item_type": "flight",
+         "start_datetime": "2025-03-15T08:00:00", "end_datetime": "2025-03-15T12:00:00"},
+        {"id": 2, "trip_id": 1, "title": "Lunch", "item_type": "dining",
+         "start_datetime": "2025-03-15T12:00:00", "end_datetime": None},
+        {"id": 3, "trip_id": 1, "title": "Hotel", "item_type": "hotel",
+         "start_datetime": "2025-03-15T09:00:00", "end_datetime": "2025-03-18T11:00:00"},
+    ]
+
+    assert item_conflicts(items) == []
+
+
+def _create_trip(client, name, start, end):
+    return client.post("/api/trips", json={
+        "name": name, "destination": name, "start_date": start, "end_date": end,
+    }).json()["id"]
+
+
+def test_insert_reports_conflicts_and_endpoint_lists_them(client):
+    tokyo = _create_trip(client, "Tokyo", "2025-03-15", "2025-03-22")
+    osaka = _create_trip(client, "Osaka", "2025-03-20", "2025-03-25")
+    client.post("/api/itinerary", json={
+        "trip_id": tokyo, "title": "Flight to Tokyo", "item_type": "flight",
+        "start_datetime": "2025-03-15T08:00:00", "end_datetime": "2025-03-15T20:00:00",
+    })
+
+    dinner = client.post("/api/itinerary", json={
+        "trip_id": tokyo, "title": "Sushi dinner", "item_type": "dining",
+        "start_datetime": "2025-03-15T19:00:00",
+    }).json()
+    train = client.post("/api/itinerary", json={
+        "trip_id": osaka, "title": "Shinkansen", "item_type": "transport",
+        "start_datetime": "2025-03-15T18:30:00", "end_datetime": "2025-03-15T19:30:00",
+    }).json()
+
+    assert [c["titles"] for c in dinner["conflicts"]] == [["Sushi dinner", "Flight to Tokyo"]]
+    assert len(train["conflicts"]) == 2
+
+    report = client.get(f"/api/trips/{tokyo}/conflicts").json()
+    assert len(report["items"]) == 1
+    assert len(report["cross_trip_items"]) == 2
+    assert [t["id"] for t in report["trips"]] == [osaka]
+    assert client.get("/api/trips/999/conflicts").status_code == 404
@@ -0,0 +1,63 @@
+"""Tests for message history compaction."""
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+
+from scout.agent.context import DIGEST_PREFIX, SUMMARY_MARKER, compact_history, estimate_tokens
+
+
+def _search_turn(n: int) -> list:
+    hotels = [{"name": f"Hotel {i}", "price_per_night": 100 + i, "amenities": ["WiFi"] * 20} for i in range(10)]
+    return [
+        AIMessage(
+            content="",
+            id=f"ai-{n}",
+            tool_calls=[{"id": f"call-{n}", "name": "search_hotels", "args": {"destination": "Tokyo"}}],
+        ),
+        ToolMessage(content=json.dumps({"hotels": hotels}), name="search_hotels", tool_call_id=f"call-{n}", id=f"tool-{n}"),
+    ]
+
+
+def test_consumed_tool_results_are_digested():
+    """Tool results the model already answered from are replaced by digests."""
+    history = [HumanMessage(content="Tokyo hotels", id="h-0")] + _search_turn(0) + [AIMessage(content="Found 10", id="ai-done")]
+
+    updates, compacted = compact_history(history, budget=100_000, digest_min_chars=200)
+
+    assert [u.id for u in updates] == ["tool-0"]
+    assert updates[0].content.startswith(DIGEST_PREFIX)
+    assert "hotels: 10 items, price_per_night 100-109" in updates[0].content
+    assert estimate_tokens(compacted) < estimate_tokens(history)
+
+
+def test_unread_tool_results_are_kept():
+    """Results the model has not seen yet stay verbatim."""
+    history = [HumanMessage(content="Tokyo hotels", id="h-0")] + _search_turn(0)
+
+    updates, _ = compact_history(history, budget=100_000, digest_min_chars=200)
+
+    assert updates == []
+
+
+def test_old_turns_fold_into_summary():
+    """Over budget, old turns are dropped together with their tool results."""
+    history = [HumanMessage(content="Plan Tokyo in March", id="h-0")]
+    for n in range(6):
+        history += [HumanMessage(content=f"question {n}", id=f"h-{n + 1}")] + _search_turn(n)
+        history += [AIMessage(content=f"answer {n} " + "x" * 400, id=f"a-{n}")]
+
+    updates, compacted = compact_history(history, budget=600, digest_min_chars=200)
+
+    assert estimate_tokens(compacted) <= 600
+    removed = {u.id for u in updates if isinstance(u, RemoveMessage)}
+    assert "ai-0" in removed and "tool-0" in removed
+    summary = next(u for u in updates if u.id == "h-0")
+    assert summary.content.startswith("Plan Tokyo in March")
+    assert SUMMARY_MARKER in summary.content and "question 0" in summary.content
+    # The latest turn is never dropped
+    assert compacted[-1].id == "a-5" and any(m.id == "h-6" for m in compacted)
+    # Every remaining tool result still follows its tool call
+    ids = [m.id for m in compacted]
+    for m in compacted:
+        if isinstance(m, ToolMessage):
+            assert f"ai-{m.id.split('-')[1]}" in ids
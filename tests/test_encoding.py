@@ -0,0 +1,59 @@
+"""Tests for compact tool result encoding."""
+from scout.agent.encoding import encode_tool_result, resolve_handles, summarize_table
+from scout.agent.nodes import select_options
+from langchain_core.messages import AIMessage, HumanMessage
+
+FLIGHTS = {
+    "flights": [
+        {"price": 420, "airline": "ANA", "stops": 0, "booking_token": "x" * 300},
+        {"price": 515, "airline": "JAL", "stops": 1, "booking_token": "y" * 300},
+    ]
+}
+
+
+def test_flights_render_as_table_without_tokens():
+    content, rows = encode_tool_result("search_flights", FLIGHTS, {})
+
+    assert content.splitlines()[1:] == ["id|price|airline|stops", "F1|420|ANA|0", "F2|515|JAL|1"]
+    assert "xxx" not in content
+    assert rows["F2"]["booking_token"] == "y" * 300
+
+
+def test_handles_continue_across_searches():
+    _, first = encode_tool_result("search_flights", FLIGHTS, {})
+    content, second = encode_tool_result("search_flights", FLIGHTS, first)
+
+    assert list(second) == ["F3", "F4"]
+    assert summarize_table(content) == "flights: 2 rows F3-F4"
+
+
+def test_constant_columns_and_lists_are_compacted():
+    result = {"hotels": [
+        {"name": "A", "amenities": ["WiFi", "Pool"], "location": "Tokyo"},
+        {"name": "B", "amenities": ["WiFi"], "location": "Tokyo"},
+    ]}
+
+    content, _ = encode_tool_result("search_hotels", result, {})
+
+    assert "all rows: location=Tokyo" in content
+    assert "H1|A|WiFi,Pool" in content
+
+
+def test_non_tabular_results_pass_through():
+    content, rows = encode_tool_result("search_flights", {"error": "SERPAPI_API_KEY not configured"}, {})
+
+    assert content == '{"error":"SERPAPI_API_KEY not configured"}'
+    assert rows == {}
+
+
+def test_finalize_selection_resolves_handles():
+    _, side_store = encode_tool_result("search_flights", FLIGHTS, {})
+    state = {
+        "messages": [AIMessage(content="I recommend F1"), HumanMessage(content="Book F2 please")],
+        "side_store": side_store,
+    }
+
+    assert resolve_handles("F1 or F9", side_store) == {"F1": side_store["F1"]}
+    selected = select_options(state)
+    assert selected["selected_flights"]["id"] == "F2"
+    assert selected["selected_flights"]["booking_token"] == "y" * 300
@@ -0,0 +1,114 @@
+"""Tests for the iCalendar feeds."""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from scout.api import ics
+from scout.api.models import get_db
+
+
+def _trip(client, name="Lisbon"):
+    trip = client.post("/api/trips", json={
+        "name": name, "destination": name, "start_date": "2025-05-01", "end_date": "2025-05-04",
+    }).json()
+    for title, start in [("Tram 28; Alfama, Baixa", "2025-05-02T10:00:00"), ("Dinner", "2025-05-02T20:00:00")]:
+        client.post("/api/itinerary", json={
+            "trip_id": trip["id"], "title": title, "item_type": "activity",
+            "start_datetime": start, "location": "Lisbon", "cost": 12.5,
+        })
+    return trip
+
+
+def test_fold_keeps_lines_within_75_octets():
+    folded = ics.fold("DESCRIPTION:" + "é" * 100)
+
+    lines = folded.split("\r\n")[:-1]
+    assert all(len(line.encode("utf-8")) <= 75 for line in lines)
+    assert "".join(line[1:] if i else line for i, line in enumerate(lines)) == "DESCRIPTION:" + "é" * 100
+
+
+def test_trip_feed_renders_events(client):
+    trip = _trip(client)
+
+    response = client.get(f"/api/trips/{trip['id']}/calendar.ics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/calendar")
+    body = response.text
+    assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+    assert body.count("BEGIN:VEVENT") == 2
+    assert "SUMMARY:Tram 28\\; Alfama\\, Baixa\r\n" in body
+    assert "DTSTART:20250502T100000\r\nDTEND:20250502T110000\r\n" in body
+    assert "X-WR-CALNAME:Lisbon" in body
+    assert client.get("/api/trips/999/calendar.ics").status_code == 404
+
+
+def _set_updated_at(trip_id, value):
+    conn = get_db()
+    conn.execute("UPDATE trips SET updated_at = ? WHERE id = ?", (value, trip_id))
+    conn.commit()
+    conn.close()
+
+
+def test_feed_answers_conditional_requests(client):
+    trip = _trip(client)
+    url = f"/api/trips/{trip['id']}/calendar.ics"
+    _set_updated_at(trip["id"], "2025-06-01 10:00:00.200")
+    first = client.get(url)
+
+    by_date = client.get(url, headers={"If-Modified-Since": first.headers["last-modified"]})
+    by_tag = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+    client.post("/api/itinerary", json={
+        "trip_id": trip["id"], "title": "Fado", "item_type": "activity", "start_datetime": "2025-05-03T21:00:00",
+    })
+    changed = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+
+    assert by_date.status_code == 304 and by_tag.status_code == 304
+    assert changed.status_code == 200 and changed.text.count("BEGIN:VEVENT") == 3
+
+
+def test_edit_in_the_same_second_is_not_hidden(client, monkeypatch):
+    trip = _trip(client)
+    url = f"/api/trips/{trip['id']}/calendar.ics"
+    now = datetime(2025, 6, 1, 10, 0, 0, 500000, tzinfo=timezone.utc).timestamp()
+    monkeypatch.setattr(ics, "time", SimpleNamespace(time=lambda: now))
+    _set_updated_at(trip["id"], "2025-06-01 10:00:00.200")
+    first = client.get(url)
+
+    _set_updated_at(trip["id"], "2025-06-01 10:00:00.700")
+    by_date = client.get(url, headers={"If-Modified-Since": first.headers["last-modified"]})
+    now += 60
+    settled = client.get(url)
+    unchanged = client.get(url, headers={"If-Modified-Since": settled.headers["last-modified"]})
+
+    assert first.headers["last-modified"] == "Sun, 01 Jun 2025 10:00:00 GMT"
+    assert by_date.status_code == 200
+    assert settled.headers["last-modified"] == "Sun, 01 Jun 2025 10:00:01 GMT"
+    assert unchanged.status_code == 304
+
+
+def test_events_are_cached_until_the_item_changes(client):
+    trip = _trip(client)
+    url = f"/api/trips/{trip['id']}/calendar.ics"
+    ics.EVENTS.clear()
+    client.get(url)
+    client.get(url)
+    assert (ics.EVENTS.hits, ics.EVENTS.misses) == (2, 2)
+
+    conn = get_db()
+    conn.execute("UPDATE itinerary_items SET title = 'Tram 12' WHERE title LIKE 'Tram 28%'")
+    conn.commit()
+    updated = conn.execute("SELECT updated_at FROM itinerary_items WHERE title = 'Tram 12'").fetchone()[0]
+    conn.close()
+    body = client.get(url).text
+
+    assert updated is not None
+    assert "SUMMARY:Tram 12" in body and (ics.EVENTS.hits, ics.EVENTS.misses) == (3, 3)
+
+
+def test_user_feed_covers_all_trips(client):
+    _trip(client, "Lisbon")
+    _trip(client, "Porto")
+
+    body = client.get("/api/users/default/calendar.ics").text
+
+    assert body.count("BEGIN:VEVENT") == 4 and "X-WR-CALNAME:Scout trips" in body
@@ -0,0 +1,53 @@
+"""Import-time budget for the server and CLI entry points."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that only the agent needs; importing them at startup defeats lazy loading
+HEAVY_MODULES = (
+    "langgraph",
+    "langchain_core",
+    "langchain_google_genai",
+    "googleapiclient",
+    "pinecone",
+)
+
+# Cumulative import time budget in milliseconds, overridable for slow CI hosts
+IMPORT_BUDGET_MS = float(os.getenv("SCOUT_IMPORT_BUDGET_MS", "1500"))
+
+
+def _import_times(module: str) -> dict:
+    """Run ``python -X importtime`` and return cumulative microseconds per module."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "SCOUT_DB_PATH": os.devnull},
+    )
+    assert proc.returncode == 0, proc.stderr
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+@pytest.mark.parametrize("module", ["server", "main", "scout.tools", "scout.api.models"])
+def test_entry_points_skip_agent_stack(module):
+    """Entry points must not import the LLM and tool stack eagerly."""
+    times = _import_times(module)
+    loaded = [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+    assert loaded == [], f"{module} eagerly imports {sorted(set(loaded))[:5]}"
+
+
+def test_server_import_budget():
+    """Importing the server stays within the cold-start budget."""
+    times = _import_times("server")
+    assert times["server"] / 1000 < IMPORT_BUDGET_MS
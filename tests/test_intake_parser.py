@@ -0,0 +1,133 @@
+"""Tests for the rule-based intake parser."""
+from datetime import date
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from scout.agent import nodes
+from scout.agent.intake_parser import parse_travel_request
+
+TODAY = date(2026, 10, 19)
+
+
+def test_complete_request():
+    details = parse_travel_request(
+        "Plan a trip to Tokyo March 15-22 for 2 people from SFO, budget $3,000, direct flights, 4-star hotel",
+        today=TODAY,
+    )
+
+    assert details["destination"] == "Tokyo"
+    assert details["dates"] == {"start": "2027-03-15", "end": "2027-03-22"}
+    assert details["budget"] == {"total": 3000}
+    assert details["travelers"] == 2
+    assert details["preferences"] == {
+        "destination_airport": "NRT",
+        "origin": "SFO",
+        "direct_only": True,
+        "hotel_stars": 4,
+    }
+
+
+@pytest.mark.parametrize("text, dates", [
+    ("London 2026-12-01 to 2026-12-08", {"start": "2026-12-01", "end": "2026-12-08"}),
+    ("Paris 15-22 November", {"start": "2026-11-15", "end": "2026-11-22"}),
+    ("Rome Dec 28 to Jan 3", {"start": "2026-12-28", "end": "2027-01-03"}),
+    ("Lisbon from November 3 for 5 nights", {"start": "2026-11-03", "end": "2026-11-08"}),
+    ("Seoul in April", {"month": 4}),
+])
+def test_date_forms(text, dates):
+    assert parse_travel_request(text, today=TODAY)["dates"] == dates
+
+
+@pytest.mark.parametrize("text, dates", [
+    ("Trip to Paris 2026-02-30 to 2026-03-05", {"end": "2026-03-05"}),
+    ("Paris from Feb 29 to Mar 3", {"start": "2028-02-29", "end": "2028-03-03"}),
+    ("Paris Feb 29 to Mar 3, 2027", {"end": "2027-03-03"}),
+])
+def test_impossible_dates_keep_the_valid_part(text, dates):
+    assert parse_travel_request(text, today=TODAY)["dates"] == dates
+
+
+def test_impossible_iso_date_is_skipped():
+    assert "dates" not in parse_travel_request("visit Tokyo 2026-13-01", today=TODAY)
+
+
+@pytest.mark.parametrize("text, travelers, budget", [
+    ("Osaka trip with my partner, $2.5k", 2, {"total": 2500}),
+    ("family of four, 4000 USD", 4, {"total": 4000}),
+    ("solo, hotel under $180 per night", 1, {"hotel_per_night": 180}),
+])
+def test_travelers_and_budget(text, travelers, budget):
+    details = parse_travel_request(text, today=TODAY)
+    assert details["travelers"] == travelers
+    assert details["budget"] == budget
+
+
+def test_airport_codes_and_origin_city():
+    details = parse_travel_request("Fly from San Francisco to HND, USD is fine", today=TODAY)
+
+    assert details["preferences"]["origin"] == "SFO"
+    assert details["preferences"]["destination_airport"] == "HND"
+
+
+def test_intake_skips_llm_when_complete(monkeypatch):
+    def no_model():
+        raise AssertionError("intake should not call the LLM")
+
+    monkeypatch.setattr(nodes, "get_model_with_tools", no_model)
+    state = {"messages": [HumanMessage(content="Tokyo 2026-11-03 to 2026-11-10 for 2 people")]}
+
+    update = nodes.intake_node(state)
+
+    assert "messages" not in update
+    assert update["destination"] == "Tokyo"
+    assert update["travelers"] == 2
+    assert update["stage"] == "research"
+
+
+def test_follow_up_keeps_known_fields(monkeypatch):
+    monkeypatch.setattr(nodes, "get_model_with_tools", lambda: pytest.fail("unexpected LLM call"))
+    state = {
+        "messages": [HumanMessage(content="Make it $1500 total")],
+        "destination": "Tokyo",
+        "dates": {"start": "2026-11-03", "end": "2026-11-10"},
+        "budget": {"total": 3000, "hotel_per_night": 200},
+    }
+
+    update = nodes.intake_node(state)
+
+    assert update["budget"] == {"total": 1500, "hotel_per_night": 200}
+
+
+def test_intake_falls_back_to_llm_on_impossible_date(monkeypatch):
+    calls = []
+    monkeypatch.setattr(nodes, "get_model_with_tools", lambda: calls.append(1))
+    monkeypatch.setattr(nodes, "invoke_cached", lambda name, model, messages: AIMessage(content="Which dates?"))
+    state = {"messages": [HumanMessage(content="Trip to Paris 2026-02-30 to 2026-03-05")]}
+
+    update = nodes.intake_node(state)
+
+    assert calls and update["messages"][0].content == "Which dates?"
+    assert update["destination"] == "Paris"
+    assert update["dates"] == {"end": "2026-03-05"}
+
+
+@pytest.mark.parametrize("text, destination, origin", [
+    ("Flights Boston to Paris March 3-10", "Paris", "BOS"),
+    ("I live in Chicago and want to go to Rome May 1-8", "Rome", "ORD"),
+    ("Leaving Seattle for Tokyo in April", "Tokyo", "SEA"),
+    ("Not Paris, Rome please June 2-9", "Rome", None),
+    ("Kyoto trip, flying into KIX from LGA", "Kyoto", "LGA"),
+])
+def test_destination_and_origin_phrasings(text, destination, origin):
+    details = parse_travel_request(text, today=TODAY)
+
+    assert details["destination"] == destination
+    assert details.get("preferences", {}).get("origin") == origin
+
+
+def test_ambiguous_destination_is_left_to_the_llm():
+    details = parse_travel_request("Paris or Rome, June 2-9", today=TODAY)
+
+    assert "destination" not in details
+    assert "destination_airport" not in details.get("preferences", {})
@@ -0,0 +1,65 @@
+"""Tests for the persistent LLM response cache."""
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from scout.agent import llm_cache
+from scout.agent.llm_cache import LLMCache, cache_key, invoke_cached
+
+
+class CountingModel:
+    model = "fake-model"
+    temperature = 0
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return AIMessage(
+            content="",
+            tool_calls=[{"id": "call-1", "name": "search_hotels", "args": {"destination": "Tokyo"}}],
+        )
+
+
+def _history(message_id: str, call_id: str) -> list:
+    return [
+        SystemMessage(content="You are researching travel options."),
+        HumanMessage(content="Tokyo in March", id=message_id),
+        AIMessage(content="", id=f"ai-{message_id}", tool_calls=[{"id": call_id, "name": "search_hotels", "args": {}}]),
+        ToolMessage(content="hotels (3 rows)", tool_call_id=call_id, id=f"tool-{message_id}"),
+    ]
+
+
+def test_key_ignores_generated_ids():
+    model = CountingModel()
+
+    assert cache_key(model, _history("a", "x1")) == cache_key(model, _history("b", "y2"))
+    assert cache_key(model, _history("a", "x1")) != cache_key(model, _history("a", "x1")[:2])
+
+
+def test_invoke_cached_hits_and_stats(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache.settings, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache, "_cache", LLMCache(str(tmp_path / "llm.db"), 10, 3600))
+    model = CountingModel()
+
+    first = invoke_cached("research", model, _history("a", "x1"))
+    second = invoke_cached("research", model, _history("b", "y2"))
+
+    assert model.calls == 1
+    assert second.tool_calls[0]["args"] == first.tool_calls[0]["args"]
+    assert second.tool_calls[0]["id"] != first.tool_calls[0]["id"]
+    assert llm_cache.llm_cache_stats() == {"research": {"hits": 1, "misses": 1, "hit_rate": 0.5}}
+
+
+def test_ttl_and_lru_eviction(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache, "EVICT_EVERY_PUTS", 1)
+    cache = LLMCache(str(tmp_path / "llm.db"), max_entries=2, ttl_seconds=3600)
+    for key in ("a", "b"):
+        cache.put(key, AIMessage(content=key))
+    cache.get("a")
+    cache.put("c", AIMessage(content="c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a").content == "a"
+
+    cache.ttl_seconds = -1
+    assert cache.get("c") is None
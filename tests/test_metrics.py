@@ -0,0 +1,54 @@
+"""Tests for the Prometheus metrics subsystem."""
+from scout import metrics
+from scout.api.routes import TRIP_COLUMNS
+from scout.tracing import span, start_run
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_latency_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "/a")
+
+    lines = histogram.render()
+
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 3' in lines
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_count{route="/a"} 4' in lines
+
+
+def test_normalize_sql_collapses_literals():
+    assert metrics.normalize_sql("SELECT *  FROM trips\n WHERE id = 42 AND name = 'x'") == (
+        "SELECT * FROM trips WHERE id = ? AND name = ?"
+    )
+    assert metrics.normalize_sql("DELETE FROM t WHERE id IN (?, ?, ?)") == "DELETE FROM t WHERE id IN (?...)"
+
+
+def test_run_spans_feed_agent_counters():
+    metrics.reset()
+    with start_run(sinks=[]):
+        with span("node", "research"):
+            with span("llm", "research", cache="hit"):
+                pass
+        with span("tool", "search_hotels", cache="miss"):
+            pass
+
+    assert metrics.AGENT_RUNS.value("ok") == 1
+    assert metrics.LLM_CALLS.value("research", "hit") == 1
+    assert metrics.CACHE_HITS.value("llm") == 1
+    assert metrics.TOOL_CALLS.value("search_hotels", "miss", "ok") == 1
+    assert metrics.NODE_LATENCY.count("research") == 1
+
+
+def test_metrics_endpoint_reports_routes_and_sql(client):
+    metrics.reset()
+    client.get("/api/trips")
+    client.get("/api/trips/12345")
+
+    body = client.get("/metrics").text
+
+    assert 'scout_http_requests_total{method="GET",route="/api/trips",status="200"} 1' in body
+    assert 'scout_http_requests_total{method="GET",route="/api/trips/{trip_id}",status="404"} 1' in body
+    statement = f"SELECT {TRIP_COLUMNS} FROM main.trips ORDER BY start_date DESC"
+    assert f'scout_db_statement_duration_seconds_count{{statement="{statement}"}} 1' in body
+    assert "scout_http_requests_in_flight 0" in body
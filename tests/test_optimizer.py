@@ -0,0 +1,115 @@
+"""Tests for the itinerary route optimizer."""
+import time
+
+import numpy as np
+
+from scout.planning.optimizer import haversine_matrix, optimize_day, optimize_itinerary
+
+
+def _activity(item_id, lat, lng, hour, item_type="activity"):
+    return {
+        "id": item_id, "title": f"Stop {item_id}", "item_type": item_type,
+        "lat": lat, "lng": lng, "start_datetime": f"2025-03-15T{hour:02d}:00:00",
+        "end_datetime": f"2025-03-15T{hour:02d}:45:00",
+    }
+
+
+def test_haversine_matrix_known_distance():
+    # Tokyo Station to Osaka Station is about 403 km
+    dist = haversine_matrix([35.6812, 34.7025], [139.7671, 135.4959])
+    assert abs(dist[0, 1] - 403) < 3
+    assert dist[0, 0] == 0
+    assert np.allclose(dist, dist.T)
+
+
+def test_optimize_day_untangles_zigzag_and_keeps_anchors():
+    # Points along a line visited in zigzag order, with dinner fixed at the end
+    items = [
+        _activity(1, 35.0, 139.00, 9),
+        _activity(2, 35.0, 139.30, 10),
+        _activity(3, 35.0, 139.10, 11),
+        _activity(4, 35.0, 139.40, 12),
+        _activity(5, 35.0, 139.20, 13),
+        _activity(6, 35.0, 139.50, 19, item_type="dining"),
+    ]
+
+    result = optimize_day(items)
+
+    assert [item["id"] for item in result] == [1, 3, 5, 2, 4, 6]
+    assert [item["start_datetime"][11:13] for item in result] == ["09", "10", "11", "12", "13", "19"]
+    assert result[-1] == items[-1]
+
+
+def test_optimize_day_never_runs_into_the_next_anchor():
+    breakfast = _activity(1, 35.0, 139.0, 8, item_type="dining")
+    long_walk = {**_activity(2, 35.0, 139.5, 9), "start_datetime": "2025-03-15T09:30:00",
+                 "end_datetime": "2025-03-15T13:00:00"}
+    museum = _activity(3, 35.0, 139.1, 13)
+    lunch = _activity(4, 35.0, 139.6, 14, item_type="dining")
+
+    result = optimize_day([breakfast, long_walk, museum, lunch])
+
+    assert [item["id"] for item in result] == [1, 3, 2, 4]
+    times = [(item["start_datetime"][11:16], item["end_datetime"][11:16]) for item in result]
+    assert times == [("08:00", "08:45"), ("09:30", "10:15"), ("10:15", "13:45"), ("14:00", "14:45")]
+
+
+def test_optimize_day_keeps_times_of_items_without_end():
+    items = [
+        {k: v for k, v in _activity(i, 35.0, lng, hour).items() if k != "end_datetime"}
+        for i, (lng, hour) in enumerate([(139.0, 9), (139.3, 9), (139.1, 14), (139.2, 17)], start=1)
+    ]
+    items[1]["start_datetime"] = "2025-03-15T09:20:00"
+
+    result = optimize_day(items)
+
+    assert [item["id"] for item in result] == [1, 3, 4, 2]
+    times = [item["start_datetime"][11:16] for item in result]
+    assert times == ["09:00", "09:20", "14:00", "17:00"]
+    assert all("end_datetime" not in item for item in result)
+
+
+def test_optimize_itinerary_reports_savings_per_day():
+    items = [_activity(i, 35.0, 139.0 + 0.1 * ((i * 7) % 10), 8 + i) for i in range(10)]
+
+    result = optimize_itinerary(items)
+
+    day = result["days"][0]
+    assert sorted(day["order"]) == list(range(10))
+    assert day["distance_km_after"] < day["distance_km_before"]
+    assert result["distance_km_saved"] > 0
+
+
+def test_optimize_day_scales_to_hundreds_of_stops():
+    rng = np.random.default_rng(7)
+    items = [
+        {"id": i, "item_type": "activity", "lat": 35.6 + rng.random() * 0.2,
+         "lng": 139.6 + rng.random() * 0.2, "start_datetime": f"2025-03-15T{8 + i // 60:02d}:{i % 60:02d}:00"}
+        for i in range(500)
+    ]
+
+    started = time.perf_counter()
+    result = optimize_day(items)
+    elapsed = time.perf_counter() - started
+
+    assert len(result) == 500
+    assert elapsed < 1.0
+
+
+def test_optimize_endpoint_applies_new_times(client):
+    trip = client.post("/api/trips", json={
+        "name": "Tokyo", "destination": "Tokyo", "start_date": "2025-03-15", "end_date": "2025-03-16",
+    }).json()
+    for item in ([_activity(1, 35.0, 139.0, 9), _activity(2, 35.0, 139.3, 10), _activity(3, 35.0, 139.1, 11)]):
+        payload = {k: item[k] for k in ("title", "item_type", "lat", "lng", "start_datetime", "end_datetime")}
+        client.post("/api/itinerary", json={"trip_id": trip["id"], **payload})
+
+    response = client.post(f"/api/trips/{trip['id']}/optimize", params={"apply": True})
+
+    assert response.json()["applied"] is True
+    titles = [i["title"] for i in client.get(f"/api/trips/{trip['id']}/itinerary").json()]
+    assert titles == ["Stop 1", "Stop 3", "Stop 2"]
+
+
+def test_optimize_endpoint_unknown_trip_is_404(client):
+    assert client.post("/api/trips/999/optimize").status_code == 404
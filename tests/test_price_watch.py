@@ -0,0 +1,91 @@
+"""Tests for the flight price-watch scheduler."""
+from scout.api import price_watch
+
+
+def _watched_trip(client, name, start="2999-05-01", origin="SFO"):
+    trip = client.post("/api/trips", json={
+        "name": name, "destination": "Tokyo", "start_date": start, "end_date": "2999-05-10", "travelers": 2,
+    }).json()
+    response = client.put(f"/api/trips/{trip['id']}/price-watch", json={"origin": origin, "destination": "nrt"})
+    assert response.status_code == 200
+    return trip
+
+
+class FakeSearch:
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    def __call__(self, args):
+        self.calls.append(args)
+        return {"flights": [{"price": self.prices[args["origin"]]}, {"price": 9999}]}
+
+
+def test_searches_each_route_once_and_records_drops(client):
+    first = _watched_trip(client, "Tokyo")
+    _watched_trip(client, "Tokyo again")
+    search = FakeSearch({"SFO": 800})
+
+    summary = price_watch.run_once(search, price_watch.RateBudget(10), now=1000)
+
+    assert summary == {"due": 1, "searched": 1, "deferred": 0, "failed": 0, "drops": 0}
+    assert search.calls == [{
+        "origin": "SFO", "destination": "NRT", "departure_date": "2999-05-01",
+        "return_date": "2999-05-10", "adults": 2, "direct_only": False,
+    }]
+    # Not due again until the interval has passed
+    assert price_watch.run_once(search, price_watch.RateBudget(10), now=1001)["due"] == 0
+
+    search.prices["SFO"] = 700
+    later = 1000 + price_watch.settings.PRICE_WATCH_INTERVAL_MINUTES * 60
+    assert price_watch.run_once(search, price_watch.RateBudget(10), now=later)["drops"] == 1
+
+    watch = client.get(f"/api/trips/{first['id']}/price-watch").json()
+    assert watch["history"] == [{"checked_at": 1000, "price": 800}, {"checked_at": later, "price": 700}]
+    assert watch["drops"][0]["old_price"] == 800 and watch["drops"][0]["new_price"] == 700
+    drops = client.get("/api/price-drops").json()
+    assert sorted(drop["trip_name"] for drop in drops) == ["Tokyo", "Tokyo again"]
+
+
+def test_budget_favours_soonest_departures(client):
+    _watched_trip(client, "Later", start="2999-06-01", origin="LAX")
+    _watched_trip(client, "Sooner", start="2999-05-01", origin="SFO")
+    planned = _watched_trip(client, "Booked", start="2999-04-01", origin="SEA")
+    client.put(f"/api/trips/{planned['id']}", json={"status": "booked"})
+    search = FakeSearch({"SFO": 800, "LAX": 900})
+
+    summary = price_watch.run_once(search, price_watch.RateBudget(1), now=1000)
+
+    assert summary["due"] == 2 and summary["searched"] == 1 and summary["deferred"] == 1
+    assert [call["origin"] for call in search.calls] == ["SFO"]
+    assert client.delete(f"/api/trips/{planned['id']}/price-watch").status_code == 200
+    assert client.get(f"/api/trips/{planned['id']}/price-watch").status_code == 404
+
+
+def test_failed_searches_back_off(client):
+    _watched_trip(client, "Tokyo")
+    interval = price_watch.settings.PRICE_WATCH_INTERVAL_MINUTES * 60
+
+    def broken(args):
+        return {"error": "upstream unavailable"}
+
+    rounds = [
+        price_watch.run_once(broken, price_watch.RateBudget(10), now=now)["searched"]
+        for now in (1000, 1300, 1000 + interval, 1000 + 2 * interval, 1000 + 5 * interval)
+    ]
+
+    # Checked at 0, then not until twice the interval, then four times after that
+    assert rounds == [1, 0, 0, 1, 0]
+    assert price_watch.run_once(broken, price_watch.RateBudget(10), now=1000 + 6 * interval)["searched"] == 1
+
+
+def test_watch_follows_trip_dates(client):
+    trip = _watched_trip(client, "Tokyo")
+
+    client.put(f"/api/trips/{trip['id']}", json={"start_date": "2999-07-01", "end_date": "2999-07-09"})
+
+    route = client.get(f"/api/trips/{trip['id']}/price-watch").json()["route"]
+    assert (route["origin"], route["departure_date"], route["return_date"]) == ("SFO", "2999-07-01", "2999-07-09")
+    search = FakeSearch({"SFO": 800})
+    price_watch.run_once(search, price_watch.RateBudget(10), now=1000)
+    assert [call["departure_date"] for call in search.calls] == ["2999-07-01"]
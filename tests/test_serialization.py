@@ -0,0 +1,64 @@
+"""Tests for the direct row-to-JSON response path."""
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.serialization_bench import run_benchmark
+from scout.api.models import ItineraryItem, Trip, get_db
+from scout.api.serialization import row_json, rows_json, select_list
+
+
+def _add_trip(client):
+    trip = client.post("/api/trips", json={
+        "name": "Lisbon", "destination": "Lisbon", "start_date": "2025-05-01",
+        "end_date": "2025-05-04", "budget": 1200, "notes": "café",
+    }).json()
+    client.post("/api/itinerary", json={
+        "trip_id": trip["id"], "title": "Tram 28", "item_type": "activity",
+        "start_datetime": "2025-05-02T10:00:00", "cost": 3.5,
+    })
+    return trip
+
+
+def test_rows_match_validated_models(client):
+    trip = _add_trip(client)
+    conn = get_db()
+
+    items = rows_json(conn.execute(f"SELECT {select_list(ItineraryItem)} FROM itinerary_items"))
+    one = row_json(conn.execute(f"SELECT {select_list(Trip)} FROM trips WHERE id = ?", (trip["id"],)))
+    missing = row_json(conn.execute("SELECT id FROM trips WHERE id = -1"))
+    validated = jsonable_encoder(Trip(**dict(conn.execute("SELECT * FROM trips").fetchone())))
+    conn.close()
+
+    assert json.loads(one) == validated
+    assert [item["title"] for item in json.loads(items)] == ["Tram 28"]
+    assert missing is None
+
+
+def test_list_endpoints_keep_shape_and_schema(client):
+    trip = _add_trip(client)
+
+    trips = client.get("/api/trips")
+    itinerary = client.get(f"/api/trips/{trip['id']}/itinerary").json()
+    events = client.get("/api/calendar").json()
+    schema = client.get("/openapi.json").json()
+
+    assert trips.headers["content-type"] == "application/json"
+    assert list(trips.json()[0]) == list(Trip.model_fields)
+    assert trips.json()[0]["notes"] == "café"
+    assert client.get(f"/api/trips/{trip['id']}").json() == trips.json()[0]
+    assert client.get("/api/trips/999").status_code == 404
+    assert list(itinerary[0]) == list(ItineraryItem.model_fields)
+    assert events[0]["end"] == events[0]["start"] == "2025-05-02T10:00:00"
+    assert events[0]["extendedProps"]["trip_name"] == "Lisbon"
+    list_schema = schema["paths"]["/api/trips"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert list_schema["items"]["$ref"].endswith("/Trip")
+
+
+def test_serialization_benchmark_agrees(tmp_path):
+    report = run_benchmark(sizes=[20, 50], repeat=1, db_path=str(tmp_path / "bench.db"))
+
+    assert [(r["endpoint"], r["rows"]) for r in report["results"]] == [
+        ("trips", 20), ("trips", 50), ("itinerary", 20), ("itinerary", 50)
+    ]
+    assert all(r["validated_ms"] > 0 and r["direct_ms"] > 0 for r in report["results"])
@@ -0,0 +1,106 @@
+"""Tests for per-user database shards."""
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scout.api import models, shards, writer
+from scout.config.settings import settings
+
+
+@pytest.fixture
+def sharded(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SHARD_BY_USER", True)
+    monkeypatch.setattr(settings, "SHARD_DIR", str(tmp_path / "shards"))
+    yield tmp_path / "shards"
+    writer.close_writer()
+
+
+def _create(client, user, name, start="2025-06-01"):
+    return client.post("/api/trips", headers={"X-Scout-User": user}, json={
+        "name": name, "destination": name, "start_date": start, "end_date": start,
+    }).json()
+
+
+def test_each_user_reads_and_writes_their_own_shard(sharded, client):
+    _create(client, "alice", "Lisbon")
+    _create(client, "bob", "Oslo")
+    _create(client, "bob", "Bergen")
+
+    alice = client.get("/api/trips", headers={"X-Scout-User": "alice"}).json()
+    bob = client.get("/api/trips", headers={"X-Scout-User": "bob"}).json()
+
+    assert [t["name"] for t in alice] == ["Lisbon"]
+    assert {t["name"] for t in bob} == {"Oslo", "Bergen"}
+    assert os.path.exists(shards.shard_path("alice")) and os.path.exists(shards.shard_path("bob"))
+    conn = sqlite3.connect(shards.shard_path("alice"))
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(models.MIGRATIONS)
+    conn.close()
+
+
+def test_shard_names_are_safe_and_distinct():
+    assert shards.shard_name("../etc/passwd").startswith("etc_passwd-")
+    assert shards.shard_name("a b") != shards.shard_name("a_b")
+
+
+def test_admin_views_fan_out_over_shards(sharded, client):
+    _create(client, "alice", "Lisbon", "2025-06-01")
+    _create(client, "bob", "Oslo", "2025-07-01")
+    _create(client, "carol", "Quito", "2025-05-01")
+
+    stats = client.get("/api/admin/stats").json()
+    trips = client.get("/api/admin/trips", params={"limit": 2}).json()
+
+    assert stats["shards"] == 3 and stats["total_trips"] == 3
+    assert [t["name"] for t in trips] == ["Oslo", "Lisbon"]
+    assert trips[0]["shard"] == shards.shard_name("bob")
+
+
+def test_pool_closes_least_recently_used_writers(sharded, monkeypatch):
+    monkeypatch.setattr(settings, "SHARD_MAX_OPEN", 2)
+    insert = ("INSERT INTO trips (name, destination, start_date, end_date) "
+              "VALUES ('t', 'd', '2025-01-01', '2025-01-02')")
+
+    def add(user):
+        with shards.using_user(user):
+            return writer.write(insert).lastrowid
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(add, [f"user{i % 5}" for i in range(100)]))
+
+    assert len(writer._pool) <= 2
+    counts = [sqlite3.connect(shards.shard_path(f"user{i}")).execute("SELECT COUNT(*) FROM trips").fetchone()[0]
+              for i in range(5)]
+    assert counts == [20] * 5
+
+
+def test_closed_writer_rejects_new_writes(db_path):
+    w = writer.Writer(db_path)
+    w.close()
+
+    with pytest.raises(writer.WriterClosed):
+        w.submit([("SELECT 1", ())])
+
+
+def test_maintenance_clis_cover_every_shard(sharded, client):
+    from scout.api import archive, chat_history
+
+    for user in ("alice", "bob"):
+        trip = _create(client, user, f"{user} trip", start="2020-01-01")
+        client.put(f"/api/trips/{trip['id']}", headers={"X-Scout-User": user}, json={"status": "completed"})
+        conn = models.get_db(user)
+        conn.execute(
+            "INSERT INTO chat_messages (trip_id, role, content, created_at) "
+            "VALUES (?, 'user', 'hi', datetime('now', '-60 days'))", (trip["id"],)
+        )
+        conn.commit()
+        conn.close()
+
+    compacted = chat_history.main(["--older-than-days", "30"])
+    archived = archive.main(["--older-than-days", "30"])
+
+    assert sorted(s["digests"] for s in compacted.values()) == [1, 1]
+    assert sorted(s["trips"] for s in archived.values()) == [1, 1]
+    assert all(os.path.exists(archive.archive_path(path)) for path in archived)
+    assert list(archive.main(["--user", "alice"])) == [shards.shard_path("alice")]
@@ -0,0 +1,121 @@
+"""Tests for run tracing."""
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from scout.tracing import percentile, span, sqlite_sink, stage_report, start_run
+
+
+def test_spans_nest_and_flush_to_sinks():
+    flushed = []
+    with start_run("run-1", sinks=[flushed.extend]) as run:
+        with span("node", "research"):
+            with span("llm", "research") as s:
+                s.set(input_tokens=120)
+
+    spans = {s["name"] + "/" + s["kind"]: s for s in flushed}
+    assert run.run_id == "run-1"
+    assert spans["research/llm"]["parent_id"] == spans["research/node"]["span_id"]
+    assert spans["research/llm"]["attributes"] == {"input_tokens": 120}
+    assert spans["run/run"]["parent_id"] is None
+    assert spans["research/node"]["parent_id"] == spans["run/run"]["span_id"]
+
+
+def test_span_outside_run_is_noop():
+    with span("node", "intake") as s:
+        s.set(anything=1)
+
+
+def test_errors_are_marked():
+    flushed = []
+    with pytest.raises(ValueError):
+        with start_run(sinks=[flushed.extend]):
+            with span("tool", "search_flights"):
+                raise ValueError("boom")
+
+    failed = [s for s in flushed if s["status"] == "error"]
+    assert {s["kind"] for s in failed} == {"tool", "run"}
+    assert failed[0]["attributes"]["error"] == "ValueError: boom"
+
+
+def test_stage_report_percentiles():
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    report = stage_report([("node", "research", float(ms)) for ms in range(1, 101)])
+    assert report == [{"kind": "node", "name": "research", "count": 100, "p50_ms": 50.0, "p95_ms": 95.0, "max_ms": 100.0}]
+
+
+def test_agent_run_records_nodes_llm_and_tools(monkeypatch):
+    from langgraph.checkpoint.memory import InMemorySaver
+    from scout.agent import nodes
+    from scout.agent.graph import create_agent
+    from scout.agent.tool_cache import shared_cache
+    from scout.config.settings import settings
+    from scout.tools.hotels import search_hotels
+
+    responses = iter([
+        AIMessage(content="", tool_calls=[{"id": "c1", "name": "search_hotels", "args": {
+            "destination": "Tokyo", "checkin": "2025-03-15", "checkout": "2025-03-22"}}]),
+        AIMessage(content="found", usage_metadata={"input_tokens": 50, "output_tokens": 5, "total_tokens": 55}),
+        AIMessage(content="compare"),
+        AIMessage(content="done"),
+    ])
+
+    class Model:
+        def invoke(self, messages):
+            return next(responses)
+
+    monkeypatch.setattr(nodes, "get_model_with_tools", Model)
+    monkeypatch.setattr(settings, "PREFETCH_ENABLED", False)
+    shared_cache.clear()
+    agent = create_agent(tools=[search_hotels], checkpointer=InMemorySaver())
+
+    flushed = []
+    with start_run(sinks=[flushed.extend]):
+        agent.invoke(
+            {"messages": [HumanMessage(content="Tokyo 2025-03-15 to 2025-03-22")], "stage": "intake"},
+            {"configurable": {"thread_id": "t"}},
+        )
+
+    kinds = {(s["kind"], s["name"]) for s in flushed}
+    assert {("node", n) for n in ("context", "intake", "research", "tools", "compare", "finalize")} <= kinds
+    llm = [s for s in flushed if s["kind"] == "llm"]
+    assert [s["name"] for s in llm] == ["research", "research", "compare", "finalize"]
+    assert llm[1]["attributes"]["input_tokens"] == 50
+    tool = next(s for s in flushed if s["kind"] == "tool")
+    assert tool["name"] == "search_hotels" and tool["attributes"]["cache"] == "miss"
+    node_ids = {s["span_id"] for s in flushed if s["kind"] == "node"}
+    assert all(s["parent_id"] in node_ids for s in llm)
+
+
+def test_trace_endpoints(client):
+    with start_run("run-api", sinks=[sqlite_sink]):
+        with span("node", "research"):
+            pass
+
+    trace = client.get("/api/runs/run-api/trace").json()
+    assert [s["name"] for s in trace["spans"]] == ["run", "research"]
+    assert client.get("/api/runs/missing/trace").status_code == 404
+
+    report = client.get("/api/runs/report").json()
+    assert report["runs"] == 1
+    assert {s["name"] for s in report["stages"]} == {"run", "research"}
+
+
+def test_sqlite_sink_prunes_old_spans(client, monkeypatch):
+    import time
+
+    from scout import tracing
+    from scout.api.models import get_db
+
+    monkeypatch.setattr(tracing, "_last_pruned", {})
+    old = {"run_id": "old", "span_id": "s1", "parent_id": None, "kind": "node", "name": "research",
+           "started_at": time.time() - 30 * 86400, "duration_ms": 1.0, "status": "ok", "attributes": {}}
+    monkeypatch.setattr(tracing.settings, "TRACE_RETENTION_DAYS", 0)
+    sqlite_sink([old])
+    monkeypatch.setattr(tracing.settings, "TRACE_RETENTION_DAYS", 14)
+
+    sqlite_sink([{**old, "run_id": "new", "started_at": time.time()}])
+
+    conn = get_db()
+    runs = [row[0] for row in conn.execute("SELECT run_id FROM trace_spans")]
+    conn.close()
+    assert runs == ["new"]
@@ -0,0 +1,137 @@
+"""Tests for the single-writer queue."""
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scout.api.writer import SocketWriter, Writer, serve_unix
+
+
+@pytest.fixture
+def writer(db_path):
+    writer = Writer(db_path, window_ms=20)
+    yield writer
+    writer.close()
+
+
+def _insert_trip(name):
+    return (
+        "INSERT INTO trips (name, destination, start_date, end_date) VALUES (?, 'Tokyo', '2025-03-15', '2025-03-22')",
+        (name,),
+    )
+
+
+def test_concurrent_writes_are_group_committed(writer, db_path):
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        ids = list(pool.map(lambda i: writer.execute(*_insert_trip(f"trip {i}")).lastrowid, range(200)))
+
+    assert sorted(ids) == list(range(1, 201))
+    assert writer.stats["writes"] == 200
+    assert writer.stats["batches"] < 200
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM trips").fetchone()[0] == 200
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_failed_write_is_rolled_back_alone(writer, db_path):
+    good = writer.submit([_insert_trip("ok")])
+    bad = writer.submit([_insert_trip("half"), ("INSERT INTO trips (name) VALUES (?)", ("no dates",))])
+
+    assert good.result()[0].lastrowid == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        bad.result()
+    names = [row[0] for row in sqlite3.connect(db_path).execute("SELECT name FROM trips")]
+    assert names == ["ok"]
+
+
+def test_writer_survives_a_broken_batch(writer, db_path, monkeypatch):
+    bad = writer.submit([("INSERT INTO trips (name) VALUES ('no params')",)])
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+
+    original = writer._commit
+
+    def broken(batch):
+        monkeypatch.setattr(writer, "_commit", original)
+        raise RuntimeError("broken batch")
+
+    monkeypatch.setattr(writer, "_commit", broken)
+    with pytest.raises(RuntimeError):
+        writer.submit([_insert_trip("lost")]).result(timeout=5)
+
+    cancelled = writer.submit([_insert_trip("cancelled")])
+    cancelled.cancel()
+    assert writer.submit([_insert_trip("ok")]).result(timeout=5)[0].rowcount == 1
+    names = [row[0] for row in sqlite3.connect(db_path).execute("SELECT name FROM trips")]
+    assert names == ["ok"]
+
+
+def test_socket_writer_round_trip(writer, tmp_path):
+    import threading
+
+    path = str(tmp_path / "writer.sock")
+    server = serve_unix(path, writer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = SocketWriter(path)
+    try:
+        assert client.execute(*_insert_trip("via socket")).lastrowid == 1
+        with pytest.raises(sqlite3.IntegrityError):
+            client.execute("INSERT INTO trips (name) VALUES (?)", ("no dates",))
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_socket_writer_routes_other_databases_through_pool(writer, tmp_path):
+    import threading
+
+    from scout.api.models import connect
+    from scout.api.writer import WriterPool
+
+    other = str(tmp_path / "other.db")
+    pool = WriterPool(max_open=2)
+    path = str(tmp_path / "writer.sock")
+    server = serve_unix(path, writer, pool)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = SocketWriter(path, db=other)
+    try:
+        assert client.execute(*_insert_trip("elsewhere")).lastrowid == 1
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+        pool.close()
+    conn = connect(other)
+    assert [row[0] for row in conn.execute("SELECT name FROM trips")] == ["elsewhere"]
+    conn.close()
+    assert writer.stats["writes"] == 0
+
+
+def test_socket_server_reopens_evicted_main_writer(tmp_path):
+    import threading
+
+    from scout.api.models import connect
+    from scout.api.writer import WriterPool
+
+    main_db = str(tmp_path / "main.db")
+    pool = WriterPool(max_open=2)
+    writer = pool.get(main_db)
+    path = str(tmp_path / "writer.sock")
+    server = serve_unix(path, writer, pool)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for name in ("a", "b", "c"):
+            shard = SocketWriter(path, db=str(tmp_path / f"{name}.db"))
+            shard.execute(*_insert_trip(name))
+            shard.close()
+        client = SocketWriter(path)
+        assert client.execute(*_insert_trip("main")).lastrowid == 1
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        pool.close()
+    conn = connect(main_db)
+    assert [row[0] for row in conn.execute("SELECT name FROM trips")] == ["main"]
+    conn.close()